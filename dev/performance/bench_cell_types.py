@@ -0,0 +1,114 @@
+##############################################################################
+#
+# Simple Python program to benchmark the per cell overhead of the worksheet
+# _write_cell() method for each cell type.
+#
+# It compares the cell type tag dispatch with the previous dispatch via
+# type(cell).__name__ string comparisons, which is reproduced below.
+#
+# python bench_cell_types.py [num_cells]
+#
+# Copyright 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import sys
+from timeit import default_timer
+
+from xlsxwriter.compatibility import StringIO
+from xlsxwriter.worksheet import Worksheet
+from xlsxwriter.worksheet import cell_number_tuple
+from xlsxwriter.worksheet import cell_string_tuple
+from xlsxwriter.worksheet import cell_blank_tuple
+from xlsxwriter.worksheet import cell_boolean_tuple
+from xlsxwriter.worksheet import cell_formula_tuple
+from xlsxwriter.format import Format
+
+# Default to 200,000 cells of each type.
+if len(sys.argv) > 1:
+    num_cells = int(sys.argv[1])
+else:
+    num_cells = 200000
+
+cell_format = Format({'xf_index': 1})
+
+cells = [
+    ('Number', cell_number_tuple(1.5, None)),
+    ('String', cell_string_tuple(7, None)),
+    ('Blank', cell_blank_tuple(cell_format)),
+    ('Boolean', cell_boolean_tuple(1, None)),
+    ('Formula', cell_formula_tuple('A1+B1', None, '#N/A')),
+]
+
+
+def write_cell_by_name(worksheet, row, col, cell):
+    """ The previous _write_cell() dispatch on the cell type name. """
+    error_codes = ['#DIV/0!', '#N/A', '#NAME?', '#NULL!',
+                   '#NUM!', '#REF!', '#VALUE!']
+
+    attributes = worksheet._get_cell_attributes(row, col, cell.format)
+
+    if type(cell).__name__ == 'Number':
+        worksheet._xml_number_element(cell.number, attributes)
+
+    elif type(cell).__name__ == 'String':
+        worksheet._xml_string_element(cell.string, attributes)
+
+    elif type(cell).__name__ == 'Formula':
+        value = cell.value
+        if isinstance(cell.value, str):
+            if cell.value in error_codes:
+                attributes.append(('t', 'e'))
+            else:
+                attributes.append(('t', 'str'))
+        worksheet._xml_formula_element(cell.formula, value, attributes)
+
+    elif type(cell).__name__ == 'ArrayFormula':
+        pass
+
+    elif type(cell).__name__ == 'Blank':
+        worksheet._xml_empty_tag('c', attributes)
+
+    elif type(cell).__name__ == 'Boolean':
+        attributes.append(('t', 'b'))
+        worksheet._xml_start_tag('c', attributes)
+        worksheet._write_cell_value(cell.boolean)
+        worksheet._xml_end_tag('c')
+
+
+def time_cells(write_cell, cell):
+    """ Return the best time in ns per cell to write num_cells cells. """
+    best = None
+
+    for _ in range(5):
+        worksheet = Worksheet()
+        worksheet._set_filehandle(StringIO())
+
+        start_time = default_timer()
+
+        for row in range(num_cells):
+            write_cell(worksheet, row, 3, cell)
+
+        elapsed = default_timer() - start_time
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best * 1e9 / num_cells
+
+
+# The current _write_cell() dispatch on the cell type tag.
+write_cell_by_tag = Worksheet._write_cell
+
+
+print("")
+print("Time per cell (ns) for %d cells of each type:" % num_cells)
+print("")
+print("    %-10s %10s %10s %8s" % ('Type', 'By name', 'By tag', 'Gain'))
+
+for name, cell in cells:
+    by_name = time_cells(write_cell_by_name, cell)
+    by_tag = time_cells(write_cell_by_tag, cell)
+
+    print("    %-10s %10.0f %10.0f %7.1f%%"
+          % (name, by_name, by_tag, 100.0 * (by_name - by_tag) / by_name))
+
+print("")
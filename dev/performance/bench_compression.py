@@ -0,0 +1,74 @@
+##############################################################################
+#
+# Simple Python program to benchmark the time taken by Workbook close() to
+# compress a large worksheet with and without the 'compression_threads'
+# option.
+#
+# The worksheet is written in constant_memory mode so that most of the time
+# in close() is spent compressing the worksheet XML file.
+#
+# python bench_compression.py [num_rows] [num_threads]
+#
+# Copyright 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import sys
+import zipfile
+from timeit import default_timer
+
+import xlsxwriter
+
+# Default to 1,000,000 rows x 10 cols and a thread per CPU.
+if len(sys.argv) > 1:
+    row_max = int(sys.argv[1])
+else:
+    row_max = 1000000
+
+if len(sys.argv) > 2:
+    num_threads = int(sys.argv[2])
+else:
+    num_threads = os.cpu_count()
+
+col_max = 10
+filename = 'bench_compression.xlsx'
+
+
+def time_close(compression_threads):
+    """ Return the time taken to close a workbook and the file size. """
+    workbook = xlsxwriter.Workbook(filename,
+                                   {'constant_memory': True,
+                                    'compression_threads':
+                                        compression_threads})
+    worksheet = workbook.add_worksheet()
+
+    for row in range(row_max):
+        worksheet.write_row(row, 0, [row * col_max + col
+                                     for col in range(col_max)])
+
+    start_time = default_timer()
+    workbook.close()
+    elapsed = default_timer() - start_time
+
+    # Check that the worksheet can be read back.
+    zipfile.ZipFile(filename).testzip()
+    size = os.path.getsize(filename)
+    os.remove(filename)
+
+    return elapsed, size
+
+
+print("")
+print("Time to close() a %d x %d workbook:" % (row_max, col_max))
+print("")
+
+single_time, single_size = time_close(0)
+print("    %-12s: %6.2fs %10d bytes" % ('1 thread', single_time, single_size))
+
+multi_time, multi_size = time_close(num_threads)
+print("    %-12s: %6.2fs %10d bytes"
+      % ('%d threads' % num_threads, multi_time, multi_size))
+
+print("")
+print("    Speedup     : %6.2fx" % (single_time / multi_time))
+print("")
@@ -0,0 +1,115 @@
+##############################################################################
+#
+# Simple Python program to benchmark the XMLwriter _escape_attributes() and
+# _escape_data() methods with typical and worst case values.
+#
+# It compares the current methods with the previous regex check and chained
+# str.replace() calls, reproduced below, and with str.translate().
+#
+# python bench_xml_escape.py [num_calls]
+#
+# Copyright 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import re
+import sys
+from timeit import default_timer
+
+from xlsxwriter.xmlwriter import XMLwriter
+
+# Default to 200,000 calls for each value.
+if len(sys.argv) > 1:
+    num_calls = int(sys.argv[1])
+else:
+    num_calls = 200000
+
+values = [
+    ('Integer', 12345),
+    ('Float', 1.5),
+    ('Cell range', 'Sheet1!$A$1:$D$100'),
+    ('Short text', 'Total sales'),
+    ('Long text', 'The quick brown fox jumps over the lazy dog. ' * 10),
+    ('One escape', 'Profit & Loss'),
+    ('Long, one', 'The quick brown fox jumps over the lazy dog. ' * 10 + '&'),
+    ('All escapes', '<a href="x">&</a>\n' * 10),
+]
+
+escapes = re.compile('["&<>\n]')
+
+attribute_table = {
+    ord('&'): '&amp;',
+    ord('"'): '&quot;',
+    ord('<'): '&lt;',
+    ord('>'): '&gt;',
+    ord('\n'): '&#xA;',
+}
+
+
+def escape_by_replace(writer, attribute):
+    """ The previous _escape_attributes() method. """
+    try:
+        if not escapes.search(attribute):
+            return attribute
+    except TypeError:
+        return attribute
+
+    attribute = attribute.replace('&', '&amp;')
+    attribute = attribute.replace('"', '&quot;')
+    attribute = attribute.replace('<', '&lt;')
+    attribute = attribute.replace('>', '&gt;')
+    attribute = attribute.replace('\n', '&#xA;')
+
+    return attribute
+
+
+def escape_by_translate(writer, attribute):
+    """ An _escape_attributes() method using str.translate(). """
+    if not isinstance(attribute, str):
+        return attribute
+
+    if not escapes.search(attribute):
+        return attribute
+
+    return attribute.translate(attribute_table)
+
+
+def time_escape(escape, value):
+    """ Return the best time in ns per call to escape a value. """
+    best = None
+    writer = XMLwriter()
+
+    for _ in range(5):
+        start_time = default_timer()
+
+        for _ in range(num_calls):
+            escape(writer, value)
+
+        elapsed = default_timer() - start_time
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best * 1e9 / num_calls
+
+
+# Check that the methods give the same results.
+for name, value in values:
+    expected = escape_by_replace(None, value)
+    assert XMLwriter()._escape_attributes(value) == expected
+    assert escape_by_translate(None, value) == expected
+
+
+print("")
+print("Time per call (ns) for %d calls of each value:" % num_calls)
+print("")
+print("    %-12s %10s %10s %10s" % ('Value', 'Previous', 'Translate',
+                                    'Current'))
+
+for name, value in values:
+    by_replace = time_escape(escape_by_replace, value)
+    by_translate = time_escape(escape_by_translate, value)
+    current = time_escape(XMLwriter._escape_attributes, value)
+
+    print("    %-12s %10.0f %10.0f %10.0f"
+          % (name, by_replace, by_translate, current))
+
+print("")
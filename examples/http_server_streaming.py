@@ -0,0 +1,45 @@
+##############################################################################
+#
+# Example of using Python and XlsxWriter to stream an Excel XLSX file directly
+# to the client of a HTTP server as it is created, without storing the file
+# in memory or in a temp file first.
+#
+# Copyright 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+# Note: This example requires Python 3.6 or later.
+
+import http.server
+import socketserver
+
+import xlsxwriter
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+
+    def do_GET(self):
+        # Construct a server response. The file size isn't known in advance
+        # so the response is ended by closing the connection.
+        self.send_response(200)
+        self.send_header('Content-Disposition', 'attachment; filename=test.xlsx')
+        self.send_header('Content-type',
+                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        # Write the workbook directly to the non-seekable output stream.
+        workbook = xlsxwriter.Workbook(self.wfile, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+
+        # Write some test data.
+        for row in range(100000):
+            worksheet.write_row(row, 0, ['Hello, world!', row])
+
+        # The data is streamed to the client as the workbook is closed.
+        workbook.close()
+        self.close_connection = True
+
+
+print('Server listening on port 8000...')
+httpd = socketserver.TCPServer(('', 8000), Handler)
+httpd.serve_forever()
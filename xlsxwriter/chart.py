@@ -59,6 +59,7 @@ class Chart(xmlwriter.XMLwriter):
         self.val_axis_position = 'l'
         self.formula_ids = {}
         self.formula_data = []
+        self.range_callback = None
         self.horiz_cat_axis = 0
         self.horiz_val_axis = 1
         self.protection = 0
@@ -889,6 +890,10 @@ class Chart(xmlwriter.XMLwriter):
 
             self.formula_data.append(data)
             self.formula_ids[formula] = formula_id
+
+            # Register the range so that the workbook can store its data.
+            if data is None and self.range_callback:
+                self.range_callback(formula)
         else:
             # Formula already seen. Return existing id.
             formula_id = self.formula_ids[formula]
@@ -6,6 +6,8 @@
 #
 
 import sys
+from array import array
+from struct import unpack
 from decimal import Decimal
 
 try:
@@ -34,10 +36,12 @@ if sys.version_info[0] == 2:
     int_types = (int, long)
     num_types = (float, int, long, Decimal, Fraction)
     str_types = basestring
+    text_type = unicode
 else:
     int_types = (int)
     num_types = (float, int, Decimal, Fraction)
     str_types = str
+    text_type = str
 
 
 if sys.version_info < (2, 6, 0):
@@ -45,6 +49,18 @@ if sys.version_info < (2, 6, 0):
 else:
     from io import BytesIO as BytesIO
 
+# The array typecode for unsigned 64 bit ints. Python 2 doesn't support the
+# 'Q' typecode but 'L' is 64 bits on most 64 bit Unix platforms. If neither
+# is available a list is used instead.
+try:
+    array('Q')
+    uint64_typecode = 'Q'
+except ValueError:
+    if array('L').itemsize == 8:
+        uint64_typecode = 'L'
+    else:
+        uint64_typecode = None
+
 
 def force_unicode(string):
     """Return string as a native string"""
@@ -52,3 +68,20 @@ def force_unicode(string):
         if isinstance(string, unicode):
             return string.encode('utf-8')
     return string
+
+
+def uint64_array(values=()):
+    """Return an array of unsigned 64 bit ints, or a list if unsupported"""
+    if uint64_typecode is None:
+        return list(values)
+    return array(uint64_typecode, values)
+
+
+def array_frombytes(data_array, data):
+    """Append native machine values from a byte string to an array"""
+    if isinstance(data_array, list):
+        data_array.extend(unpack('=%dQ' % (len(data) // 8), data))
+    elif sys.version_info[0] == 2:
+        data_array.fromstring(data)
+    else:
+        data_array.frombytes(data)
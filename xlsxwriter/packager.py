@@ -7,11 +7,16 @@
 
 # Standard packages.
 import os
+import sys
 import stat
 import tempfile
+import zlib
+import multiprocessing
+from collections import deque
+from multiprocessing.pool import ThreadPool
 from shutil import copy
+from zipfile import ZIP_DEFLATED, ZIP_STORED
 
-from .compatibility import StringIO
 from .compatibility import BytesIO
 
 # Package imports.
@@ -27,6 +32,130 @@ from .vml import Vml
 from .table import Table
 from .comments import Comments
 
+# The worksheets and charts being serialized by a pool of workers. Forked
+# worker processes inherit this so the objects don't have to be pickled.
+_parallel_parts = []
+
+
+def _serialize_part(index):
+    # Assemble a worksheet or chart from _parallel_parts into UTF-8 encoded
+    # XML data in a worker process or thread. The external hyperlinks of a
+    # worksheet are collected while it is assembled so they are returned
+    # as well for use in the worksheet relationship files.
+    fh = BytesIO()
+    part = _parallel_parts[index]
+    part._set_xml_writer(fh)
+    part._assemble_xml_file()
+    return fh.getvalue(), getattr(part, 'external_hyper_links', None)
+
+
+# The ChunkedDeflater primes each block with the end of the previous block
+# using the zlib.compressobj() zdict argument, which was added in Python 3.3.
+try:
+    zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED,
+                     -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL,
+                     zlib.Z_DEFAULT_STRATEGY, b' ')
+    deflate_zdict = True
+except TypeError:
+    deflate_zdict = False
+
+
+def _fork_workers():
+    # Return True if worker processes are started with 'fork', either as the
+    # platform default or as set by the user, so that they inherit the
+    # _parallel_parts. Other start methods, such as 'spawn' on Windows and
+    # macOS, would have to pickle the parts so threads are used instead.
+    if hasattr(multiprocessing, 'get_all_start_methods'):
+        method = multiprocessing.get_start_method(allow_none=True)
+
+        if method is None:
+            # The first supported method is the platform default.
+            method = multiprocessing.get_all_start_methods()[0]
+
+        return method == 'fork'
+
+    # Python 2 forks worker processes on all platforms except Windows.
+    return sys.platform != 'win32'
+
+
+def _deflate_block(data, level, zdict, final):
+    # Compress a block of data to raw deflate data in a compression thread.
+    # Each block is primed with the end of the previous block so that the
+    # compression is close to that of a single stream. Blocks other than the
+    # last end with a sync flush so they can be joined into one stream.
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS,
+                                      zlib.DEF_MEM_LEVEL,
+                                      zlib.Z_DEFAULT_STRATEGY, zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    if final:
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH)
+    else:
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class ChunkedDeflater(object):
+    """
+    A replacement for the zlib compressor of a Zip file member that splits
+    the data into blocks and deflates them in parallel on a thread pool, in
+    the same way as pigz. zlib releases the GIL while it compresses so the
+    blocks are compressed concurrently. The compressed blocks are returned
+    in order as one raw deflate stream.
+
+    """
+
+    def __init__(self, pool, level=zlib.Z_DEFAULT_COMPRESSION,
+                 block_size=1048576, max_pending=16):
+        self.pool = pool
+        self.level = level
+        self.block_size = block_size
+        self.max_pending = max_pending
+        self.buffer = []
+        self.size = 0
+        self.zdict = None
+        self.pending = []
+
+    def compress(self, data):
+        self.buffer.append(bytes(data))
+        self.size += len(data)
+
+        if self.size < self.block_size:
+            return b''
+
+        self._add_block(False)
+
+        # Return the compressed blocks that are ready, waiting for the
+        # oldest one if too many blocks are pending.
+        compressed = []
+        while self.pending and (self.pending[0].ready()
+                                or len(self.pending) > self.max_pending):
+            compressed.append(self.pending.pop(0).get())
+
+        return b''.join(compressed)
+
+    def flush(self):
+        self._add_block(True)
+
+        compressed = [result.get() for result in self.pending]
+        self.pending = []
+
+        return b''.join(compressed)
+
+    def _add_block(self, final):
+        # Add the buffered data as a block to be compressed.
+        block = b''.join(self.buffer)
+        self.buffer = []
+        self.size = 0
+
+        self.pending.append(
+            self.pool.apply_async(_deflate_block,
+                                  (block, self.level, self.zdict, final)))
+
+        # The deflate window is 32KB.
+        self.zdict = block[-32768:]
+
 
 class Packager(object):
     """
@@ -86,6 +215,20 @@ class Packager(object):
 
         self.tmpdir = ''
         self.in_memory = False
+        self.zip_file = None
+        self.zip_member = None
+        self.force_zip64 = False
+        self.workers = 0
+        self.compression_threads = 0
+        self.compression_pool = None
+        self.worker_pool = None
+        self.worker_results = None
+        self.worker_window = 0
+        self.next_part = 0
+        self.parallel_parts = set()
+        self.compression_level = None
+        self.worksheet_compression_level = None
+        self.media_compression_level = None
         self.workbook = None
         self.worksheet_count = 0
         self.chartsheet_count = 0
@@ -111,6 +254,29 @@ class Packager(object):
         # Set the optional 'in_memory' mode.
         self.in_memory = in_memory
 
+    def _set_zip_file(self, zip_file, force_zip64=False):
+        # Set an optional open ZipFile to stream the XML files directly into.
+        self.zip_file = zip_file
+        self.force_zip64 = force_zip64
+
+    def _set_workers(self, workers):
+        # Set the optional number of workers used to serialize the worksheet
+        # and chart files in parallel.
+        self.workers = workers
+
+    def _set_compression_threads(self, compression_threads):
+        # Set the optional number of threads used to compress the XML files.
+        self.compression_threads = compression_threads
+
+    def _set_compression_levels(self, compression_level,
+                                worksheet_compression_level,
+                                media_compression_level):
+        # Set the optional compression levels of the XML, worksheet and
+        # media files.
+        self.compression_level = compression_level
+        self.worksheet_compression_level = worksheet_compression_level
+        self.media_compression_level = media_compression_level
+
     def _add_workbook(self, workbook):
         # Add the Excel::Writer::XLSX::Workbook object to the package.
         self.workbook = workbook
@@ -127,37 +293,96 @@ class Packager(object):
                 self.worksheet_count += 1
 
     def _create_package(self):
-        # Write the xml files that make up the XLSX OPC package.
-        self._write_worksheet_files()
-        self._write_chartsheet_files()
-        self._write_workbook_file()
-        self._write_chart_files()
-        self._write_drawing_files()
-        self._write_vml_files()
-        self._write_comment_files()
-        self._write_table_files()
-        self._write_shared_strings_file()
-        self._write_app_file()
-        self._write_core_file()
-        self._write_custom_file()
-        self._write_content_types_file()
-        self._write_styles_file()
-        self._write_theme_file()
-        self._write_root_rels_file()
-        self._write_workbook_rels_file()
-        self._write_worksheet_rels_files()
-        self._write_chartsheet_rels_files()
-        self._write_drawing_rels_files()
-        self._add_image_files()
-        self._add_vba_project()
+        # Write the xml files that make up the XLSX OPC package. The XML
+        # files are compressed on a pool of threads if the
+        # 'compression_threads' option is set. The worksheet and chart
+        # workers are started first so that worker processes aren't forked
+        # after the compression threads have started.
+        self._start_workers()
+
+        if (self.zip_file and self.compression_threads > 1
+                and deflate_zdict):
+            self.compression_pool = ThreadPool(self.compression_threads)
+
+        try:
+            self._write_worksheet_files()
+            self._write_chartsheet_files()
+            self._write_workbook_file()
+            self._write_chart_files()
+            self._write_drawing_files()
+            self._write_vml_files()
+            self._write_comment_files()
+            self._write_table_files()
+            self._write_shared_strings_file()
+            self._write_app_file()
+            self._write_core_file()
+            self._write_custom_file()
+            self._write_content_types_file()
+            self._write_styles_file()
+            self._write_theme_file()
+            self._write_root_rels_file()
+            self._write_workbook_rels_file()
+            self._write_worksheet_rels_files()
+            self._write_chartsheet_rels_files()
+            self._write_drawing_rels_files()
+            self._add_image_files()
+            self._add_vba_project()
+        finally:
+            self._stop_workers()
+
+            if self.compression_pool:
+                self.compression_pool.close()
+                self.compression_pool.join()
+                self.compression_pool = None
 
         return self.filenames
 
+    def _close_on_error(self):
+        # Close any open Zip file member and remove the tempfiles after an
+        # error while creating the package. Errors from the incomplete
+        # files are ignored so that the original error is raised.
+        if self.zip_member and not self.zip_member.closed:
+            try:
+                self.zip_member.close()
+            except Exception:
+                pass
+
+        self.zip_member = None
+
+        for os_filename, _, _ in self.filenames:
+            if self.in_memory:
+                os_filename.close()
+            elif os.path.exists(os_filename):
+                os.remove(os_filename)
+
+        self.filenames = []
+
     def _filename(self, xml_filename):
         # Create a temp filename to write the XML data to and store the Excel
-        # filename to use as the name in the Zip container.
+        # filename to use as the name in the Zip container. If there is an
+        # open Zip file the XML data is written and compressed directly into
+        # a new member of it instead.
+        if self.zip_file:
+            self._set_zip_compression(self.zip_file, xml_filename)
+            member = self.zip_file.open(xml_filename, 'w',
+                                        force_zip64=self.force_zip64)
+
+            # Replace the member's zlib compressor with one that compresses
+            # the data in blocks on the thread pool. This depends on the
+            # private _compressor attribute of the ZipFile member writer in
+            # Python 3.6+. If it isn't available plain deflate is used.
+            if (self.compression_pool
+                    and getattr(member, '_compressor', None)):
+                member._compressor = ChunkedDeflater(
+                    self.compression_pool,
+                    self._get_compression_level(xml_filename))
+
+            self.zip_member = member
+
+            return member
+
         if self.in_memory:
-            os_filename = StringIO()
+            os_filename = BytesIO()
         else:
             (fd, os_filename) = tempfile.mkstemp(dir=self.tmpdir)
             os.close(fd)
@@ -166,6 +391,134 @@ class Packager(object):
 
         return os_filename
 
+    def _get_compression_level(self, xml_filename):
+        # Get the compression level to use for a file in the package. The
+        # media files, such as images, are usually already compressed so
+        # they can be stored with level 0 for speed.
+        if xml_filename.startswith('xl/worksheets/sheet'):
+            level = self.worksheet_compression_level
+        elif (xml_filename.startswith('xl/media/')
+              or xml_filename == 'xl/vbaProject.bin'):
+            level = self.media_compression_level
+        else:
+            level = self.compression_level
+
+        if level is None:
+            level = zlib.Z_DEFAULT_COMPRESSION
+
+        return level
+
+    def _set_zip_compression(self, zip_file, xml_filename):
+        # Set the compression type and level that the ZipFile uses for the
+        # next file that is added to it. Level 0 files are stored without
+        # compression. The level requires Python 3.7+.
+        level = self._get_compression_level(xml_filename)
+
+        if level == 0:
+            zip_file.compression = ZIP_STORED
+            zip_file.compresslevel = None
+        else:
+            zip_file.compression = ZIP_DEFLATED
+            zip_file.compresslevel = level
+
+    def _start_workers(self):
+        # Start assembling the worksheets and charts into XML data in
+        # parallel using the number of workers set by the 'workers' option.
+        # The strings, formats and relationships have all been prepared by
+        # this stage so each part can be assembled independently. The
+        # results are returned in order, as they are needed, by
+        # _get_xml_data(). Only a window of 2 parts per worker is in flight
+        # at a time so that finished parts that haven't been written yet
+        # don't all accumulate in memory.
+        global _parallel_parts
+
+        # Worksheets in constant_memory mode are read back from their
+        # tempfiles so they are always written in this process.
+        worksheets = [worksheet for worksheet in self.workbook.worksheets()
+                      if not worksheet.is_chartsheet
+                      and worksheet.optimization == 0]
+
+        parts = worksheets + self.workbook.charts
+
+        workers = min(self.workers, len(parts))
+        if workers < 2:
+            return
+
+        # Freeze the format indices before the worksheets are written in
+        # parallel so that they are the same as when written in order.
+        for worksheet in worksheets:
+            worksheet._prepare_xf_indices()
+
+        # The parts must be set before the worker processes are forked.
+        _parallel_parts = parts
+
+        if _fork_workers():
+            self.worker_pool = multiprocessing.Pool(workers)
+        else:
+            self.worker_pool = ThreadPool(workers)
+
+        # The results are queued in the order that the parts are written.
+        self.worker_results = deque()
+        self.worker_window = 2 * workers
+        self.next_part = 0
+        self.parallel_parts = set(parts)
+        self._submit_parts()
+
+    def _submit_parts(self):
+        # Submit the next parts to the workers, up to the in-flight window.
+        results = self.worker_results
+
+        while (len(results) < self.worker_window
+               and self.next_part < len(_parallel_parts)):
+            results.append(self.worker_pool.apply_async(_serialize_part,
+                                                        (self.next_part,)))
+            self.next_part += 1
+
+    def _stop_workers(self):
+        # Stop the workers. All of the results have been read at this stage,
+        # unless there was an error.
+        global _parallel_parts
+
+        if self.worker_pool:
+            _parallel_parts = []
+            self.worker_pool.terminate()
+            self.worker_pool.join()
+            self.worker_pool = None
+            self.worker_results = None
+            self.worker_window = 0
+            self.next_part = 0
+            self.parallel_parts = set()
+
+    def _get_xml_data(self, part):
+        # Get the XML data of a worksheet or chart assembled by the workers,
+        # or None if it isn't assembled in parallel. The parts must be
+        # requested in the order that they were started in.
+        if part not in self.parallel_parts:
+            return None
+
+        result = self.worker_results.popleft()
+        self._submit_parts()
+
+        data, external_hyper_links = result.get()
+
+        if external_hyper_links is not None:
+            part.external_hyper_links = external_hyper_links
+
+        return data
+
+    def _write_xml_data(self, xml_filename, xml_data):
+        # Write XML data that has already been assembled and encoded.
+        if self.zip_file:
+            member = self._filename(xml_filename)
+            member.write(xml_data)
+            member.close()
+        elif self.in_memory:
+            self._filename(xml_filename).write(xml_data)
+        else:
+            os_file = open(self._filename(xml_filename), mode='wb')
+            os_file.write(xml_data)
+            os_file.close()
+
     def _write_workbook_file(self):
         # Write the workbook.xml file.
         workbook = self.workbook
@@ -175,17 +528,25 @@ class Packager(object):
 
     def _write_worksheet_files(self):
         # Write the worksheet files.
+        worksheets = [worksheet for worksheet in self.workbook.worksheets()
+                      if not worksheet.is_chartsheet]
+
         index = 1
-        for worksheet in self.workbook.worksheets():
-            if worksheet.is_chartsheet:
+        for worksheet in worksheets:
+            xml_filename = 'xl/worksheets/sheet' + str(index) + '.xml'
+
+            # Write the worksheet as it is returned by the workers, if any.
+            xml_data = self._get_xml_data(worksheet)
+            if xml_data is not None:
+                self._write_xml_data(xml_filename, xml_data)
+                index += 1
                 continue
 
-            if worksheet.optimization == 1:
+            if worksheet.optimization == 1 and not worksheet.finished:
                 worksheet._opt_reopen()
-                worksheet._write_single_row()
+                worksheet._write_single_row(worksheet.xls_rowmax)
 
-            worksheet._set_xml_writer(self._filename('xl/worksheets/sheet'
-                                                     + str(index) + '.xml'))
+            worksheet._set_xml_writer(self._filename(xml_filename))
             worksheet._assemble_xml_file()
             index += 1
 
@@ -213,10 +574,20 @@ class Packager(object):
                 raise Exception("Chart%d must contain at least one "
                                 "data series. See chart.add_series()."
                                 % index)
+            index += 1
+
+        index = 1
+        for chart in self.workbook.charts:
+            xml_filename = 'xl/charts/chart' + str(index) + '.xml'
+
+            # Write the chart as it is returned by the workers, if any.
+            xml_data = self._get_xml_data(chart)
+            if xml_data is not None:
+                self._write_xml_data(xml_filename, xml_data)
+            else:
+                chart._set_xml_writer(self._filename(xml_filename))
+                chart._assemble_xml_file()
 
-            chart._set_xml_writer(self._filename('xl/charts/chart'
-                                                 + str(index) + '.xml'))
-            chart._assemble_xml_file()
             index += 1
 
     def _write_drawing_files(self):
@@ -596,7 +967,17 @@ class Packager(object):
 
             xml_image_name = 'xl/media/image' + str(index) + ext
 
-            if not self.in_memory:
+            if self.zip_file:
+                # In streaming mode we add the image to the Zip file directly.
+                self._set_zip_compression(self.zip_file, xml_image_name)
+
+                if image_data:
+                    self.zip_file.writestr(xml_image_name,
+                                           image_data.getvalue())
+                else:
+                    self.zip_file.write(filename, xml_image_name)
+
+            elif not self.in_memory:
                 # In file mode we just write or copy the image file.
                 os_filename = self._filename(xml_image_name)
 
@@ -639,7 +1020,16 @@ class Packager(object):
 
         xml_vba_name = 'xl/vbaProject.bin'
 
-        if not self.in_memory:
+        if self.zip_file:
+            # In streaming mode we add the VBA to the Zip file directly.
+            self._set_zip_compression(self.zip_file, xml_vba_name)
+
+            if vba_is_stream:
+                self.zip_file.writestr(xml_vba_name, vba_project.getvalue())
+            else:
+                self.zip_file.write(vba_project, xml_vba_name)
+
+        elif not self.in_memory:
             # In file mode we just write or copy the VBA file.
             os_filename = self._filename(xml_vba_name)
 
@@ -7,9 +7,44 @@
 
 # Standard packages.
 import re
+import mmap
+import tempfile
+from array import array
+from collections import OrderedDict
+from struct import Struct
 
 # Package imports.
 from . import xmlwriter
+from .compatibility import uint64_array
+from .xmlwriter import Utf8Writer
+
+# A single check for strings that need any escaping or whitespace handling
+# in a <t> element. Most strings don't, and are written as they are.
+escape_needed = re.compile(r'_x[0-9a-fA-F]{4}_|[\x00-\x08\x0B-\x1F&<>]'
+                           r'|^\s|\s$')
+
+# Excel escapes control characters with _xHHHH_ and also escapes any
+# literal strings of that type by encoding the leading underscore.
+# So "\0" -> _x0000_ and "_x0000_" -> _x005F_x0000_.
+escape_literal = re.compile('(_x[0-9a-fA-F]{4}_)')
+control_chars = re.compile(r'([\x00-\x08\x0B-\x1F])')
+
+# Leading or trailing whitespace, which requires xml:space="preserve".
+edge_whitespace = re.compile(r'^\s|\s$')
+
+# The same check for UTF-8 encoded strings. The bytes \s only matches ASCII
+# whitespace so strings that start or end with a multi-byte character are
+# also checked as text.
+escape_needed_bytes = re.compile(br'_x[0-9a-fA-F]{4}_|[\x00-\x08\x0B-\x1F&<>]'
+                                 br'|^[\s\x80-\xFF]|[\s\x80-\xFF]$')
+
+
+def _escape_control_chars(string):
+    # Convert control characters, and escape existing escapes, as above.
+    string = escape_literal.sub(r'_x005F\1', string)
+
+    return control_chars.sub(lambda match: "_x%04X_" % ord(match.group(1)),
+                             string)
 
 
 class SharedStrings(xmlwriter.XMLwriter):
@@ -78,36 +113,62 @@ class SharedStrings(xmlwriter.XMLwriter):
 
     def _write_sst_strings(self):
         # Write the sst string elements.
-
-        for string in (self.string_table._get_strings()):
-            self._write_si(string)
-
-    def _write_si(self, string):
+        rich_indices = self.string_table.rich_indices
+
+        if (isinstance(self.string_table, ArenaSharedStringTable)
+                and isinstance(self.fh, Utf8Writer)):
+            self._write_sst_encoded_strings(rich_indices)
+            return
+
+        for index, string in enumerate(self.string_table._get_strings()):
+            self._write_si(string, index in rich_indices)
+
+    def _write_sst_encoded_strings(self, rich_indices):
+        # Write the sst string elements from the UTF-8 encoded strings of an
+        # ArenaSharedStringTable. Strings that don't need escaping are
+        # copied into the file, in batches, without decoding.
+        fh = self.fh
+        chunk = bytearray()
+        strings = self.string_table._get_encoded_strings()
+
+        for index, data in enumerate(strings):
+            if index in rich_indices or escape_needed_bytes.search(data):
+                fh.write_encoded(bytes(chunk))
+                del chunk[:]
+                self._write_si(data.decode('utf-8'), index in rich_indices)
+                continue
+
+            chunk += b'<si><t>'
+            chunk += data
+            chunk += b'</t></si>'
+
+            if len(chunk) >= 65536:
+                fh.write_encoded(bytes(chunk))
+                del chunk[:]
+
+        fh.write_encoded(bytes(chunk))
+
+    def _write_si(self, string, rich=False):
         # Write the <si> element.
-        attributes = []
 
-        # Excel escapes control characters with _xHHHH_ and also escapes any
-        # literal strings of that type by encoding the leading underscore.
-        # So "\0" -> _x0000_ and "_x0000_" -> _x005F_x0000_.
-        # The following substitutions deal with those cases.
+        # Write plain strings without further checks.
+        if not rich and not escape_needed.search(string):
+            self.fh.write("""<si><t>%s</t></si>""" % string)
+            return
 
-        # Escape the escape.
-        string = re.sub('(_x[0-9a-fA-F]{4}_)', r'_x005F\1', string)
+        string = _escape_control_chars(string)
 
-        # Convert control character to the _xHHHH_ escape.
-        string = re.sub(r'([\x00-\x08\x0B-\x1F])',
-                        lambda match: "_x%04X_" %
-                        ord(match.group(1)), string)
+        # Write any rich strings without further tags.
+        if rich:
+            self._xml_rich_si_element(string)
+            return
 
         # Add attribute to preserve leading or trailing whitespace.
-        if re.search('^\s', string) or re.search('\s$', string):
+        attributes = []
+        if edge_whitespace.search(string):
             attributes.append(('xml:space', 'preserve'))
 
-        # Write any rich strings without further tags.
-        if re.search('^<r>', string) and re.search('</r>$', string):
-            self._xml_rich_si_element(string)
-        else:
-            self._xml_si_element(string, attributes)
+        self._xml_si_element(string, attributes)
 
 
 # A metadata class to store Excel strings between worksheets.
@@ -122,32 +183,324 @@ class SharedStringTable(object):
         self.unique_count = 0
         self.string_table = {}
         self.string_array = []
+        self.rich_indices = set()
 
-    def _get_shared_string_index(self, string):
+    def _get_shared_string_index(self, string, count=1, rich=False):
         """" Get the index of the string in the Shared String table. """
-        if string not in self.string_table:
-            # String isn't already stored in the table so add it.
+        self.count += count
+        index = self.string_table.get(string)
+
+        if index is None:
+            # String isn't already stored in the table so add it. The string
+            # list is kept in index order as the strings are added.
             index = self.unique_count
             self.string_table[string] = index
-            self.count += 1
+            self.string_array.append(string)
             self.unique_count += 1
-            return index
-        else:
-            # String exists in the table.
-            index = self.string_table[string]
-            self.count += 1
-            return index
+
+        # Rich strings are stored as XML and are written without escaping.
+        if rich:
+            self.rich_indices.add(index)
+
+        return index
 
     def _get_shared_string(self, index):
         """" Get a shared string from the index. """
         return self.string_array[index]
 
+    def _has_string(self, string):
+        """" Check if a string is in the Shared String table. """
+        return string in self.string_table
+
     def _sort_string_data(self):
-        """" Sort the shared string data and convert from dict to list. """
-        self.string_array = sorted(self.string_table,
-                                   key=self.string_table.__getitem__)
+        """" The strings are already stored in index order. Free the dict. """
         self.string_table = {}
 
     def _get_strings(self):
-        """" Return the sorted string list. """
+        """" Return the string list in index order. """
         return self.string_array
+
+
+# A SharedStringTable that stores the strings in a compact arena.
+class ArenaSharedStringTable(SharedStringTable):
+    """
+    A class to track Excel shared strings between worksheets with a small
+    overhead per string.
+
+    The unique strings are stored UTF-8 encoded, in index order, in a single
+    bytearray arena with an array of their start offsets. They are found
+    again via an open addressing hash index, in an array, of string index
+    + 1, with 0 marking an empty slot. This avoids the memory used by a str
+    object, a dict entry and a list entry for each string.
+
+    """
+
+    def __init__(self):
+        super(ArenaSharedStringTable, self).__init__()
+        self.arena = bytearray()
+        self.offsets = uint64_array([0])
+        self.slots = None
+        self.index_slots = 0
+        self._create_index(1 << 16)
+
+    def _get_shared_string_index(self, string, count=1, rich=False):
+        """" Get the index of the string in the Shared String table. """
+        self.count += count
+        data = string.encode('utf-8')
+        slot = self._find_slot(data)
+        index = self.slots[slot] - 1
+
+        if index < 0:
+            # String isn't already stored in the table so add it.
+            index = self.unique_count
+            self.arena += data
+            self.offsets.append(len(self.arena))
+            self.slots[slot] = index + 1
+            self.unique_count += 1
+
+            # Keep the index at most two thirds full.
+            if self.unique_count * 3 > self.index_slots * 2:
+                self._create_index(self.index_slots * 2)
+
+        if rich:
+            self.rich_indices.add(index)
+
+        return index
+
+    def _get_shared_string(self, index):
+        """" Get a shared string from the index. """
+        return self._get_encoded_string(index).decode('utf-8')
+
+    def _has_string(self, string):
+        """" Check if a string is in the Shared String table. """
+        return self.slots[self._find_slot(string.encode('utf-8'))] > 0
+
+    def _sort_string_data(self):
+        """" The strings are already stored in index order. """
+        pass
+
+    def _get_strings(self):
+        """" Return an iterator over the strings in index order. """
+        for data in self._get_encoded_strings():
+            yield data.decode('utf-8')
+
+    def _get_encoded_strings(self):
+        """" Return an iterator over the UTF-8 strings in index order. """
+        for index in range(self.unique_count):
+            yield self._get_encoded_string(index)
+
+    def _get_encoded_string(self, index):
+        # Return the UTF-8 encoded string at an index.
+        return bytes(self.arena[self.offsets[index]:self.offsets[index + 1]])
+
+    def _find_slot(self, data):
+        # Return the index slot of an encoded string, or the empty slot
+        # where it should be added.
+        arena = self.arena
+        offsets = self.offsets
+        slots = self.slots
+        mask = self.index_slots - 1
+        slot = hash(data) & mask
+        length = len(data)
+
+        while True:
+            index = slots[slot]
+
+            if not index:
+                return slot
+
+            start = offsets[index - 1]
+            if (offsets[index] - start == length
+                    and arena.startswith(data, start)):
+                return slot
+
+            slot = (slot + 1) & mask
+
+    def _create_index(self, num_slots):
+        # Create a hash index of num_slots and rehash any existing strings.
+        self.slots = array('I', [0]) * num_slots
+        self.index_slots = num_slots
+        mask = num_slots - 1
+        slots = self.slots
+
+        for index in range(self.unique_count):
+            slot = hash(self._get_encoded_string(index)) & mask
+
+            while slots[slot]:
+                slot = (slot + 1) & mask
+
+            slots[slot] = index + 1
+
+
+# The records of the DiskSharedStringTable tempfiles.
+string_length = Struct('<I')
+string_offset = Struct('<Q')
+hash_slot = Struct('<qQ')
+
+
+# A SharedStringTable for constant_memory mode that keeps the strings on disk.
+class DiskSharedStringTable(SharedStringTable):
+    """
+    A class to track Excel shared strings between worksheets with a bounded
+    amount of memory.
+
+    The unique strings are appended, in index order, to a tempfile of length
+    prefixed UTF-8 records. They are found again via an open addressing hash
+    index, in a memory mapped tempfile, of string hash to string index and
+    a tempfile of the string offsets. A small LRU cache of the most recently
+    used strings avoids the disk lookups for repeated strings.
+
+    """
+
+    def __init__(self, tmpdir=None, cache_size=10000):
+        super(DiskSharedStringTable, self).__init__()
+        self.tmpdir = tmpdir
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.strings_fh = tempfile.TemporaryFile(dir=tmpdir)
+        self.offsets_fh = tempfile.TemporaryFile(dir=tmpdir)
+        self.strings_end = 0
+        self.index_fh = None
+        self.index_map = None
+        self.index_slots = 0
+        self._create_index(1 << 16)
+
+    def _get_shared_string_index(self, string, count=1, rich=False):
+        """" Get the index of the string in the Shared String table. """
+        self.count += count
+        cache = self.cache
+        index = cache.pop(string, None)
+
+        if index is None:
+            index = self._find_or_add_string(string)
+
+            if len(cache) >= self.cache_size:
+                cache.popitem(last=False)
+
+        # Store the string as the most recently used.
+        cache[string] = index
+
+        if rich:
+            self.rich_indices.add(index)
+
+        return index
+
+    def _get_shared_string(self, index):
+        """" Get a shared string from the index. """
+        self.offsets_fh.seek(index * string_offset.size)
+        offset = string_offset.unpack(
+            self.offsets_fh.read(string_offset.size))[0]
+
+        return self._read_string(offset)
+
+    def _sort_string_data(self):
+        """" The strings are already stored in index order. """
+        self.cache.clear()
+        self.strings_fh.flush()
+
+    def _get_strings(self):
+        """" Return an iterator over the strings in index order. """
+        fh = self.strings_fh
+        fh.seek(0)
+
+        for _ in range(self.unique_count):
+            length = string_length.unpack(fh.read(string_length.size))[0]
+            yield fh.read(length).decode('utf-8')
+
+    def _has_string(self, string):
+        """" Check if a string is in the Shared String table. """
+        if string in self.cache:
+            return True
+
+        return self._find_string(string, hash(string))[0] >= 0
+
+    def _find_string(self, string, string_hash):
+        # Look the string up in the hash index. Returns the string index and
+        # its slot, or -1 and the empty slot where it should be added.
+        index_map = self.index_map
+        mask = self.index_slots - 1
+        slot = string_hash & mask
+
+        while True:
+            stored_hash, stored_index = hash_slot.unpack_from(
+                index_map, slot * hash_slot.size)
+
+            # An empty slot so the string isn't in the table.
+            if not stored_index:
+                return -1, slot
+
+            if (stored_hash == string_hash
+                    and self._get_shared_string(stored_index - 1) == string):
+                return stored_index - 1, slot
+
+            slot = (slot + 1) & mask
+
+    def _find_or_add_string(self, string):
+        # Look the string up in the hash index and add it if it isn't found.
+        string_hash = hash(string)
+        index, slot = self._find_string(string, string_hash)
+
+        if index >= 0:
+            return index
+
+        # Append the string to the string and offset files.
+        index = self.unique_count
+        data = string.encode('utf-8')
+
+        self.offsets_fh.seek(index * string_offset.size)
+        self.offsets_fh.write(string_offset.pack(self.strings_end))
+
+        self.strings_fh.seek(self.strings_end)
+        self.strings_fh.write(string_length.pack(len(data)))
+        self.strings_fh.write(data)
+        self.strings_end += string_length.size + len(data)
+
+        # Store the hash and index + 1, so that 0 marks an empty slot.
+        hash_slot.pack_into(self.index_map, slot * hash_slot.size,
+                            string_hash, index + 1)
+        self.unique_count += 1
+
+        # Keep the index at most half full.
+        if self.unique_count * 2 > self.index_slots:
+            self._create_index(self.index_slots * 2)
+
+        return index
+
+    def _create_index(self, num_slots):
+        # Create a hash index of num_slots and rehash any existing entries.
+        index_fh = tempfile.TemporaryFile(dir=self.tmpdir)
+        index_fh.truncate(num_slots * hash_slot.size)
+        index_map = mmap.mmap(index_fh.fileno(), num_slots * hash_slot.size)
+        mask = num_slots - 1
+
+        if self.index_map is not None:
+            old_map = self.index_map
+
+            for old_slot in range(self.index_slots):
+                stored_hash, stored_index = hash_slot.unpack_from(
+                    old_map, old_slot * hash_slot.size)
+
+                if not stored_index:
+                    continue
+
+                slot = stored_hash & mask
+                while hash_slot.unpack_from(index_map,
+                                            slot * hash_slot.size)[1]:
+                    slot = (slot + 1) & mask
+
+                hash_slot.pack_into(index_map, slot * hash_slot.size,
+                                    stored_hash, stored_index)
+
+            old_map.close()
+            self.index_fh.close()
+
+        self.index_fh = index_fh
+        self.index_map = index_map
+        self.index_slots = num_slots
+
+    def _read_string(self, offset):
+        # Read a string record at offset in the strings file.
+        fh = self.strings_fh
+        fh.seek(offset)
+        length = string_length.unpack(fh.read(string_length.size))[0]
+        return fh.read(length).decode('utf-8')
@@ -97,3 +97,23 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_compact_cells(self):
+        """Test the creation of an array formula with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write('B1', 0)
+        worksheet.write('B2', 0)
+        worksheet.write('B3', 0)
+        worksheet.write('C1', 0)
+        worksheet.write('C2', 0)
+        worksheet.write('C3', 0)
+
+        worksheet.write_array_formula(0, 0, 2, 0, '{=SUM(B1:C1*B2:C2)}', None, 0)
+
+        workbook.close()
+
+        self.assertExcelEqual()
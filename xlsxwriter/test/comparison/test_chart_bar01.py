@@ -5,9 +5,15 @@
 # Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
 #
 
+import unittest
 from ..excel_comparsion_test import ExcelComparisonTest
 from ...workbook import Workbook
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestCompareXLSXFiles(ExcelComparisonTest):
     """
@@ -60,3 +66,137 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_compact_cells(self):
+        """Test the creation of a simple chart with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'bar'})
+
+        chart.axis_ids = [64052224, 64055552]
+
+        data = [
+            [1, 2, 3, 4, 5],
+            [2, 4, 6, 8, 10],
+            [3, 6, 9, 12, 15],
+        ]
+
+        worksheet.write_column('A1', data[0])
+        worksheet.write_column('B1', data[1])
+        worksheet.write_column('C1', data[2])
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$B$1:$B$5'
+                          })
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$C$1:$C$5',
+                          })
+
+        worksheet.insert_chart('E9', chart)
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    @unittest.skipIf(numpy is None, "numpy is required for write_array()")
+    def test_create_file_write_array(self):
+        """Test the creation of a simple chart with write_array()."""
+
+        workbook = Workbook(self.got_filename)
+
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'bar'})
+
+        chart.axis_ids = [64052224, 64055552]
+
+        data = numpy.array([
+            [1, 2, 3, 4, 5],
+            [2, 4, 6, 8, 10],
+            [3, 6, 9, 12, 15],
+        ])
+
+        worksheet.write_array('A1', data.T)
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$B$1:$B$5'
+                          })
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$C$1:$C$5',
+                          })
+
+        worksheet.insert_chart('E9', chart)
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_constant_memory(self):
+        """Test the chart cached data in constant_memory mode."""
+
+        # The row spans aren't written in constant_memory mode.
+        self.ignore_elements = {'xl/worksheets/sheet1.xml': ['<row']}
+
+        workbook = Workbook(self.got_filename, {'constant_memory': True,
+                                                'in_memory': False})
+
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'bar'})
+
+        chart.axis_ids = [64052224, 64055552]
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$B$1:$B$5'
+                          })
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$C$1:$C$5',
+                          })
+
+        for row in range(5):
+            worksheet.write_row(row, 0, [row + 1, 2 * (row + 1), 3 * (row + 1)])
+
+        worksheet.insert_chart('E9', chart)
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_with_finish(self):
+        """Test the chart cached data with a finished worksheet."""
+
+        workbook = Workbook(self.got_filename)
+
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'bar'})
+
+        chart.axis_ids = [64052224, 64055552]
+
+        data = [
+            [1, 2, 3, 4, 5],
+            [2, 4, 6, 8, 10],
+            [3, 6, 9, 12, 15],
+        ]
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$B$1:$B$5'
+                          })
+
+        worksheet.write_column('A1', data[0])
+        worksheet.write_column('B1', data[1])
+        worksheet.write_column('C1', data[2])
+
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$5',
+                          'values': '=Sheet1!$C$1:$C$5',
+                          })
+
+        worksheet.finish()
+
+        worksheet.insert_chart('E9', chart)
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -51,3 +51,85 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_with_workers(self):
+        """Test the creation of a simple XlsxWriter file with unused formats
+        and the worksheets written in parallel."""
+
+        workbook = Workbook(self.got_filename, {'workers': 2})
+
+        worksheet1 = workbook.add_worksheet()
+        worksheet2 = workbook.add_worksheet('Data Sheet')
+        worksheet3 = workbook.add_worksheet()
+
+        unused1 = workbook.add_format({'bold': 1})
+        bold = workbook.add_format({'bold': 1})
+        unused2 = workbook.add_format({'bold': 1})
+        unused3 = workbook.add_format({'italic': 1})
+
+        worksheet1.write('A1', 'Foo')
+        worksheet1.write('A2', 123)
+
+        worksheet3.write('B2', 'Foo')
+        worksheet3.write('B3', 'Bar', bold)
+        worksheet3.write('C4', 234)
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_with_finish(self):
+        """Test the creation of a simple XlsxWriter file with unused formats
+        and the worksheets finished before the workbook is closed."""
+
+        workbook = Workbook(self.got_filename)
+
+        worksheet1 = workbook.add_worksheet()
+        worksheet2 = workbook.add_worksheet('Data Sheet')
+        worksheet3 = workbook.add_worksheet()
+
+        unused1 = workbook.add_format({'bold': 1})
+        bold = workbook.add_format({'bold': 1})
+        unused2 = workbook.add_format({'bold': 1})
+        unused3 = workbook.add_format({'italic': 1})
+
+        worksheet1.write('A1', 'Foo')
+        worksheet1.write('A2', 123)
+        worksheet1.finish()
+
+        worksheet3.write('B2', 'Foo')
+        worksheet3.write('B3', 'Bar', bold)
+        worksheet3.write('C4', 234)
+        worksheet3.finish()
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_with_finish_in_background(self):
+        """Test the creation of a simple XlsxWriter file with unused formats
+        and the worksheets finished in a background thread."""
+
+        workbook = Workbook(self.got_filename, {'finish_in_background': True})
+
+        worksheet1 = workbook.add_worksheet()
+        worksheet2 = workbook.add_worksheet('Data Sheet')
+        worksheet3 = workbook.add_worksheet()
+
+        unused1 = workbook.add_format({'bold': 1})
+        bold = workbook.add_format({'bold': 1})
+        unused2 = workbook.add_format({'bold': 1})
+        unused3 = workbook.add_format({'italic': 1})
+
+        worksheet1.write('A1', 'Foo')
+        worksheet1.write('A2', 123)
+        worksheet1.finish()
+
+        worksheet3.write('B2', 'Foo')
+        worksheet3.write('B3', 'Bar', bold)
+        worksheet3.write('C4', 234)
+        worksheet3.finish()
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -58,3 +58,19 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_compact_cells(self):
+        """Test the creation of a simple XlsxWriter file with hyperlinks with compact cells"""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+
+        # Turn off default URL format for testing.
+        workbook.default_url_format = None
+
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_url('A1', 'http://www.perl.org/')
+
+        workbook.close()
+
+        self.assertExcelEqual()
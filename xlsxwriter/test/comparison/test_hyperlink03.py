@@ -51,3 +51,60 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_with_workers(self):
+        """Test the creation of a simple XlsxWriter file with hyperlinks
+        and the worksheets written in parallel."""
+
+        workbook = Workbook(self.got_filename, {'workers': 2})
+
+        # Turn off default URL format for testing.
+        workbook.default_url_format = None
+
+        worksheet1 = workbook.add_worksheet()
+        worksheet2 = workbook.add_worksheet()
+
+        worksheet1.write_url('A1', 'http://www.perl.org/')
+        worksheet1.write_url('D4', 'http://www.perl.org/')
+        worksheet1.write_url('A8', 'http://www.perl.org/')
+        worksheet1.write_url('B6', 'http://www.cpan.org/')
+        worksheet1.write_url('F12', 'http://www.cpan.org/')
+
+        worksheet2.write_url('C2', 'http://www.google.com/')
+        worksheet2.write_url('C5', 'http://www.cpan.org/')
+        worksheet2.write_url('C7', 'http://www.perl.org/')
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_with_finish(self):
+        """Test the creation of a simple XlsxWriter file with hyperlinks
+        and the worksheets finished before the workbook is closed."""
+
+        workbook = Workbook(self.got_filename)
+
+        # Turn off default URL format for testing.
+        workbook.default_url_format = None
+
+        worksheet1 = workbook.add_worksheet()
+        worksheet2 = workbook.add_worksheet()
+
+        worksheet1.write_url('A1', 'http://www.perl.org/')
+        worksheet1.write_url('D4', 'http://www.perl.org/')
+        worksheet1.write_url('A8', 'http://www.perl.org/')
+        worksheet1.write_url('B6', 'http://www.cpan.org/')
+        worksheet1.write_url('F12', 'http://www.cpan.org/')
+        worksheet1.finish()
+
+        # Data written after finish() is ignored.
+        worksheet1.write('A20', 'Ignored')
+
+        worksheet2.write_url('C2', 'http://www.google.com/')
+        worksheet2.write_url('C5', 'http://www.cpan.org/')
+        worksheet2.write_url('C7', 'http://www.perl.org/')
+        worksheet2.finish()
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -41,3 +41,19 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_compact_cells(self):
+        """Test constant_memory mode with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'constant_memory': True,
+                                                'compact_cells': True,
+                                                'strings_to_numbers': True,
+                                                'in_memory': False})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write('A1', 'Hello')
+        worksheet.write('A2', '123')
+
+        workbook.close()
+
+        self.assertExcelEqual()
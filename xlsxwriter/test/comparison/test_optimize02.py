@@ -41,3 +41,35 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_write_rows(self):
+        """Test constant_memory mode with write_rows()."""
+
+        workbook = Workbook(self.got_filename, {'constant_memory': True,
+                                                'in_memory': False})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_rows('A1', iter([['Hello'], [123]]))
+        worksheet.write('G1', 'Foo')
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_finish(self):
+        """Test constant_memory mode with finish()."""
+
+        workbook = Workbook(self.got_filename, {'constant_memory': True,
+                                                'in_memory': False})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write('A1', 'Hello')
+        worksheet.write('A2', 123)
+        worksheet.finish()
+
+        # Data written after finish() is ignored.
+        worksheet.write('A3', 'Foo')
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -48,3 +48,27 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_row_window(self):
+        """Test writing rows out of order within a constant_memory window."""
+
+        workbook = Workbook(self.got_filename, {'constant_memory': True,
+                                                'row_window': 8,
+                                                'in_memory': False})
+        worksheet = workbook.add_worksheet()
+
+        bold = workbook.add_format({'bold': 1})
+        italic = workbook.add_format({'italic': 1})
+
+        worksheet.write_rich_string('F8', italic, 'abcd', 'efg')
+        worksheet.write_rich_string('E7', 'a', bold, 'bcdef', 'g')
+        worksheet.write_rich_string('D6', 'abc', italic, 'de', 'fg')
+        worksheet.write_rich_string('C5', 'a', bold, 'bc', 'defg')
+        worksheet.write_rich_string('B4', 'abc', italic, 'de', 'fg')
+        worksheet.write_rich_string('A3', 'a', bold, 'bc', 'defg')
+        worksheet.write('A2', 'Bar', italic)
+        worksheet.write('A1', 'Foo', bold)
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -44,3 +44,21 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_compact_cells(self):
+        """Test the creation of a rich string file with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+
+        worksheet = workbook.add_worksheet()
+
+        bold = workbook.add_format({'bold': 1})
+        italic = workbook.add_format({'italic': 1})
+
+        worksheet.write('A1', 'Foo', bold)
+        worksheet.write('A2', 'Bar', italic)
+        worksheet.write_rich_string('A3', 'a', bold, 'bc', 'defg')
+
+        workbook.close()
+
+        self.assertExcelEqual()
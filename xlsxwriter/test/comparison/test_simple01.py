@@ -6,10 +6,16 @@
 #
 
 from __future__ import with_statement
+import unittest
 from ..excel_comparsion_test import ExcelComparisonTest
 from datetime import date
 from ...workbook import Workbook
 
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
 
 class TestCompareXLSXFiles(ExcelComparisonTest):
     """
@@ -130,3 +136,56 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_compact_cells(self):
+        """Test the creation of a simple workbook with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_string(0, 0, 'Hello')
+        worksheet.write_number(1, 0, 123)
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_memory_budget(self):
+        """Test the creation of a simple workbook with a memory budget."""
+
+        workbook = Workbook(self.got_filename, {'memory_budget': 1})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_number(1, 0, 123)
+        worksheet.write_string(0, 0, 'Hello')
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    def test_create_file_write_column_types(self):
+        """Test the creation of a simple workbook with typed data."""
+
+        workbook = Workbook(self.got_filename)
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_column(0, 0, ['Hello', 123], None,
+                               ['string', 'number'])
+
+        workbook.close()
+
+        self.assertExcelEqual()
+
+    @unittest.skipIf(pandas is None, "pandas is required for this test")
+    def test_create_file_write_dataframe(self):
+        """Test the creation of a simple workbook with write_dataframe()."""
+
+        workbook = Workbook(self.got_filename)
+        worksheet = workbook.add_worksheet()
+
+        df = pandas.DataFrame({'Hello': [123]})
+        worksheet.write_dataframe(0, 0, df, index=False)
+
+        workbook.close()
+
+        self.assertExcelEqual()
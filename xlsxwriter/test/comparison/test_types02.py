@@ -52,3 +52,16 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_write_boolean_compact_cells(self):
+        """Test writing boolean with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write(0, 0, True)
+        worksheet.write(1, 0, False)
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -67,3 +67,16 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_write_formula_compact_cells(self):
+        """Test writing formulas with compact cells."""
+
+        workbook = Workbook(self.got_filename, {'compact_cells': True})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write(0, 0, '=1+1', None, 2)
+        worksheet.write_string(1, 0, '=1+1')
+
+        workbook.close()
+
+        self.assertExcelEqual()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+from __future__ import unicode_literals
+import unittest
+from ...compatibility import BytesIO
+from ...sharedstrings import ArenaSharedStringTable
+from ...sharedstrings import SharedStrings
+from ...xmlwriter import Utf8Writer
+
+
+class TestArenaSharedStringTable(unittest.TestCase):
+    """
+    Test the compact arena based shared string table.
+
+    """
+
+    def test_get_shared_string_index(self):
+        """Test adding repeated strings to the table."""
+
+        string_table = ArenaSharedStringTable()
+
+        strings = ['abc', 'def', 'abc', 'ghi', '', 'def', '', 'Café']
+        got = [string_table._get_shared_string_index(s) for s in strings]
+
+        self.assertEqual(got, [0, 1, 0, 2, 3, 1, 3, 4])
+        self.assertEqual(string_table.count, 8)
+        self.assertEqual(string_table.unique_count, 5)
+        self.assertEqual(string_table._get_shared_string(4), 'Café')
+        self.assertTrue(string_table._has_string('ghi'))
+        self.assertFalse(string_table._has_string('gh'))
+        self.assertEqual(list(string_table._get_strings()),
+                         ['abc', 'def', 'ghi', '', 'Café'])
+
+    def test_index_growth(self):
+        """Test the hash index after it has been resized."""
+
+        string_table = ArenaSharedStringTable()
+        num_strings = 50000
+
+        for i in range(num_strings):
+            string_table._get_shared_string_index('String %d' % i)
+
+        self.assertEqual(string_table.index_slots, 1 << 17)
+
+        for i in range(0, num_strings, 997):
+            index = string_table._get_shared_string_index('String %d' % i)
+            self.assertEqual(index, i)
+
+        self.assertEqual(string_table.unique_count, num_strings)
+
+    def test_write_encoded_strings(self):
+        """Test writing the encoded strings with and without escapes."""
+
+        string_table = ArenaSharedStringTable()
+
+        for string in ['abc', ' abc', 'a&b', 'Café', 'é ', '<r><t>a</t></r>']:
+            string_table._get_shared_string_index(string)
+
+        string_table.rich_indices.add(5)
+
+        fh = BytesIO()
+        sharedstrings = SharedStrings()
+        sharedstrings.fh = Utf8Writer(fh, close_fh=False)
+        sharedstrings.string_table = string_table
+
+        sharedstrings._write_sst_strings()
+        sharedstrings.fh.close()
+
+        exp = ('<si><t>abc</t></si>'
+               '<si><t xml:space="preserve"> abc</t></si>'
+               '<si><t>a&amp;b</t></si>'
+               '<si><t>Café</t></si>'
+               '<si><t xml:space="preserve">é </t></si>'
+               '<si><r><t>a</t></r></si>')
+        got = fh.getvalue().decode('utf-8')
+
+        self.assertEqual(got, exp)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+from __future__ import unicode_literals
+import unittest
+from ...compatibility import StringIO
+from ..helperfunctions import _xml_to_list
+from ...sharedstrings import DiskSharedStringTable
+from ...sharedstrings import SharedStrings
+
+
+class TestDiskSharedStringTable(unittest.TestCase):
+    """
+    Test the disk based shared string table used in constant_memory mode.
+
+    """
+
+    def test_get_shared_string_index(self):
+        """Test adding repeated strings to the table."""
+
+        string_table = DiskSharedStringTable(cache_size=2)
+
+        strings = ['abc', 'def', 'abc', 'ghi', 'def', 'abc', 'jkl', 'ghi']
+        got = [string_table._get_shared_string_index(s) for s in strings]
+
+        self.assertEqual(got, [0, 1, 0, 2, 1, 0, 3, 2])
+        self.assertEqual(string_table.count, 8)
+        self.assertEqual(string_table.unique_count, 4)
+        self.assertEqual(len(string_table.cache), 2)
+        self.assertEqual(string_table._get_shared_string(2), 'ghi')
+
+    def test_has_string(self):
+        """Test checking for strings in the cache and on disk."""
+
+        string_table = DiskSharedStringTable(cache_size=2)
+
+        for string in ['abc', 'def', 'ghi']:
+            string_table._get_shared_string_index(string)
+
+        # 'abc' is only in the disk index and 'ghi' is also in the cache.
+        self.assertNotIn('abc', string_table.cache)
+        self.assertTrue(string_table._has_string('abc'))
+        self.assertTrue(string_table._has_string('ghi'))
+        self.assertFalse(string_table._has_string('jkl'))
+
+        # Checking for a string doesn't add it.
+        self.assertEqual(string_table.unique_count, 3)
+        self.assertEqual(string_table.count, 3)
+
+    def test_get_strings(self):
+        """Test reading the strings back in index order."""
+
+        string_table = DiskSharedStringTable()
+
+        strings = ['abc', '', 'Café', '☺', 'abc']
+        for string in strings:
+            string_table._get_shared_string_index(string)
+
+        string_table._sort_string_data()
+
+        self.assertEqual(list(string_table._get_strings()),
+                         ['abc', '', 'Café', '☺'])
+
+    def test_index_growth(self):
+        """Test the hash index after it has been resized."""
+
+        string_table = DiskSharedStringTable(cache_size=10)
+        num_strings = 40000
+
+        for i in range(num_strings):
+            string_table._get_shared_string_index('String %d' % i)
+
+        self.assertEqual(string_table.index_slots, 1 << 17)
+
+        for i in range(0, num_strings, 997):
+            index = string_table._get_shared_string_index('String %d' % i)
+            self.assertEqual(index, i)
+
+        self.assertEqual(string_table.unique_count, num_strings)
+
+    def test_assemble_xml_file(self):
+        """Test the _assemble_xml_file() method"""
+
+        string_table = DiskSharedStringTable()
+
+        string_table._get_shared_string_index('abcdefg')
+        string_table._get_shared_string_index('   abcdefg')
+        string_table._get_shared_string_index('abcdefg')
+
+        string_table._sort_string_data()
+
+        fh = StringIO()
+        sharedstrings = SharedStrings()
+        sharedstrings._set_filehandle(fh)
+        sharedstrings.string_table = string_table
+
+        sharedstrings._assemble_xml_file()
+
+        exp = _xml_to_list("""
+                <?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+                <sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="3" uniqueCount="2">
+                  <si>
+                    <t>abcdefg</t>
+                  </si>
+                  <si>
+                    <t xml:space="preserve">   abcdefg</t>
+                  </si>
+                </sst>
+                """)
+
+        got = _xml_to_list(fh.getvalue())
+
+        self.assertEqual(got, exp)
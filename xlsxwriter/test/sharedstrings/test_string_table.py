@@ -0,0 +1,34 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...sharedstrings import SharedStringTable
+
+
+class TestSharedStringTable(unittest.TestCase):
+    """
+    Test the SharedStringTable class.
+
+    """
+
+    def test_get_shared_string(self):
+        """Test getting strings by index before and after finalization"""
+        string_table = SharedStringTable()
+        strings = ['abc', 'def', 'abc', 'ghi', 'def']
+
+        got = [string_table._get_shared_string_index(s) for s in strings]
+
+        self.assertEqual(got, [0, 1, 0, 2, 1])
+        self.assertEqual(string_table.count, 5)
+        self.assertEqual(string_table.unique_count, 3)
+        self.assertEqual(string_table._get_shared_string(2), 'ghi')
+
+        string_table._sort_string_data()
+
+        self.assertEqual(string_table.string_table, {})
+        self.assertEqual(string_table._get_strings(), ['abc', 'def', 'ghi'])
+        self.assertEqual(string_table._get_shared_string(1), 'def')
@@ -30,3 +30,25 @@ class TestWriteSi(unittest.TestCase):
         got = self.fh.getvalue()
 
         self.assertEqual(got, exp)
+
+    def test_write_si_escapes(self):
+        """Test the _write_si() method with escapes and whitespace"""
+
+        self.sharedstrings._write_si(' a<b_x0041_\x01')
+
+        exp = ('<si><t xml:space="preserve"> a&lt;b_x005F_x0041__x0001_'
+               '</t></si>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_si_rich(self):
+        """Test the _write_si() method with rich and non-rich strings"""
+
+        self.sharedstrings._write_si('<r><t>a</t></r>', True)
+        self.sharedstrings._write_si('<r>a</r>')
+
+        exp = '<si><r><t>a</t></r></si><si><t>&lt;r&gt;a&lt;/r&gt;</t></si>'
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
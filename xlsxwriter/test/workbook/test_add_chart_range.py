@@ -0,0 +1,45 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestAddChartRange(unittest.TestCase):
+    """
+    Test the chart ranges stored in constant_memory mode.
+
+    """
+
+    def test_add_chart_range_after_rows_written(self):
+        """Test a chart range with rows that were already written"""
+        workbook = Workbook(BytesIO(), {'constant_memory': True,
+                                        'row_window': 2})
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'line'})
+
+        for row in range(6):
+            worksheet.write_row(row, 0, [row, row * 2])
+
+        # Rows 1 to 4 have been written and rows 5 and 6 are in the window.
+        self.assertEqual(worksheet.previous_row, 4)
+
+        chart.add_series({'values': '=Sheet1!$A$1:$A$6'})
+        chart.add_series({'values': '=Sheet1!$B$5:$B$6'})
+        worksheet.insert_chart('D2', chart)
+
+        exp = {(0, 0, 5, 0): False, (4, 1, 5, 1): None}
+        got = workbook.chart_ranges['Sheet1']
+
+        self.assertEqual(got, exp)
+
+        workbook.close()
+
+        # The incomplete range doesn't get partial cached data.
+        self.assertEqual(worksheet._get_range_data(0, 0, 5, 0), ())
+        self.assertEqual(worksheet._get_range_data(4, 1, 5, 1), ['8', '10'])
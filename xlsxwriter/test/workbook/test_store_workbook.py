@@ -0,0 +1,357 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from multiprocessing.pool import ThreadPool
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+from ...compatibility import BytesIO
+from ... import packager
+from ... import workbook
+from ...packager import ChunkedDeflater
+from ...workbook import Workbook
+
+
+class TestStoreWorkbook(unittest.TestCase):
+    """
+    Test storing the XML files of a Workbook in the Zip file.
+
+    """
+
+    def setUp(self):
+        self.mkstemp = packager.tempfile.mkstemp
+
+    def tearDown(self):
+        packager.tempfile.mkstemp = self.mkstemp
+
+    @unittest.skipIf(not workbook.zip_member_writes,
+                     "ZipFile member writes require Python 3.6+")
+    def test_store_workbook_without_tempfiles(self):
+        """Test that the XML files are streamed into the Zip file."""
+
+        def mkstemp(*args, **kwargs):
+            raise AssertionError("unexpected tempfile")
+
+        packager.tempfile.mkstemp = mkstemp
+
+        output = BytesIO()
+        workbook = Workbook(output)
+        worksheet = workbook.add_worksheet()
+        worksheet.write('A1', 'Foo')
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        names = xlsx_file.namelist()
+
+        self.assertEqual(names[0], 'xl/worksheets/sheet1.xml')
+        self.assertIn('xl/sharedStrings.xml', names)
+        self.assertIn(b'<t>Foo</t>', xlsx_file.read('xl/sharedStrings.xml'))
+
+    @unittest.skipIf(not workbook.zip_member_writes,
+                     "ZipFile member writes require Python 3.6+")
+    def test_store_workbook_compression_threads(self):
+        """Test compressing the XML files with compression_threads."""
+
+        output = BytesIO()
+        workbook = Workbook(output, {'compression_threads': 2})
+        worksheet = workbook.add_worksheet()
+
+        for row in range(10000):
+            worksheet.write_row(row, 0, ['Foo', row, row * 2])
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+
+        self.assertIsNone(xlsx_file.testzip())
+        self.assertIn(b'<c r="C10000"><v>19998</v></c>',
+                      xlsx_file.read('xl/worksheets/sheet1.xml'))
+
+    def test_store_workbook_workers(self):
+        """Test writing the files assembled by workers in order."""
+
+        def create_workbook(options):
+            output = BytesIO()
+            workbook = Workbook(output, options)
+
+            for index in range(3):
+                worksheet = workbook.add_worksheet()
+                worksheet.write_url('A1', 'http://www.perl.com/%d' % index)
+
+                for row in range(1, 1000):
+                    worksheet.write_row(row, 0, ['Foo', row])
+
+                chart = workbook.add_chart({'type': 'line'})
+                chart.add_series({'values': '=Sheet1!$B$2:$B$10'})
+                worksheet.insert_chart('E2', chart)
+
+            workbook.close()
+
+            xlsx_file = ZipFile(output)
+            return [(name, xlsx_file.read(name))
+                    for name in xlsx_file.namelist()
+                    if name != 'docProps/core.xml']
+
+        exp = create_workbook({})
+        got = create_workbook({'workers': 4, 'compression_threads': 2})
+
+        self.assertEqual(got, exp)
+
+    def test_store_workbook_workers_window(self):
+        """Test that the parts in flight in the workers are limited."""
+        fork_workers = packager._fork_workers
+        serialize_part = packager._serialize_part
+        get_xml_data = packager.Packager._get_xml_data
+        counts = {'started': 0, 'read': 0, 'in_flight': []}
+
+        def serialize(index):
+            counts['started'] += 1
+            counts['in_flight'].append(counts['started'] - counts['read'])
+            return serialize_part(index)
+
+        def get_data(self, part):
+            data = get_xml_data(self, part)
+            if data is not None:
+                counts['read'] += 1
+            return data
+
+        packager._fork_workers = lambda: False
+        packager._serialize_part = serialize
+        packager.Packager._get_xml_data = get_data
+
+        try:
+            output = BytesIO()
+            workbook = Workbook(output, {'workers': 2})
+
+            for index in range(20):
+                worksheet = workbook.add_worksheet()
+                worksheet.write_row(0, 0, ['Foo', index])
+
+            workbook.close()
+        finally:
+            packager._fork_workers = fork_workers
+            packager._serialize_part = serialize_part
+            packager.Packager._get_xml_data = get_xml_data
+
+        xlsx_file = ZipFile(output)
+
+        self.assertEqual(counts['read'], 20)
+        self.assertEqual(len(counts['in_flight']), 20)
+        # At most 2 parts per worker, plus the part being read.
+        self.assertLessEqual(max(counts['in_flight']), 5)
+        self.assertIn(b'<c r="B1"><v>19</v></c>',
+                      xlsx_file.read('xl/worksheets/sheet20.xml'))
+
+    @unittest.skipIf(not workbook.zip_member_writes,
+                     "ZipFile member writes require Python 3.6+")
+    def test_store_workbook_compression_threads_fallback(self):
+        """Test compression_threads falls back to plain deflate."""
+
+        class ZipMember(object):
+            # A Zip member writer without a _compressor attribute.
+            def __init__(self, member):
+                self.member = member
+                self.closed = False
+
+            def write(self, data):
+                return self.member.write(data)
+
+            def close(self):
+                self.closed = True
+                self.member.close()
+
+        zip_open = ZipFile.open
+
+        def open_member(zip_file, *args, **kwargs):
+            return ZipMember(zip_open(zip_file, *args, **kwargs))
+
+        ZipFile.open = open_member
+
+        try:
+            output = BytesIO()
+            workbook = Workbook(output, {'compression_threads': 2})
+            worksheet = workbook.add_worksheet()
+            worksheet.write('A1', 'Foo')
+            workbook.close()
+        finally:
+            ZipFile.open = zip_open
+
+        xlsx_file = ZipFile(output)
+
+        self.assertIsNone(xlsx_file.testzip())
+        self.assertIn(b'<t>Foo</t>', xlsx_file.read('xl/sharedStrings.xml'))
+
+    def test_store_workbook_compression_levels(self):
+        """Test the per file compression levels."""
+
+        output = BytesIO()
+        workbook = Workbook(output, {'compression_level': 9,
+                                     'worksheet_compression_level': 1,
+                                     'media_compression_level': 0})
+        worksheet = workbook.add_worksheet()
+        worksheet.write('A1', 'Foo')
+        worksheet.insert_image('E9', 'xlsxwriter/test/comparison/'
+                                     'images/red.png')
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+
+        self.assertIsNone(xlsx_file.testzip())
+
+        got = xlsx_file.getinfo('xl/media/image1.png').compress_type
+        self.assertEqual(got, ZIP_STORED)
+
+        got = xlsx_file.getinfo('xl/worksheets/sheet1.xml').compress_type
+        self.assertEqual(got, ZIP_DEFLATED)
+
+        got = xlsx_file.getinfo('xl/styles.xml').compress_type
+        self.assertEqual(got, ZIP_DEFLATED)
+
+    def test_store_workbook_compression_level_0(self):
+        """Test storing all the files without compression."""
+
+        output = BytesIO()
+        workbook = Workbook(output, {'compression_level': 0,
+                                     'in_memory': True})
+        worksheet = workbook.add_worksheet()
+        worksheet.write('A1', 'Foo')
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+
+        for info in xlsx_file.infolist():
+            self.assertEqual(info.compress_type, ZIP_STORED)
+
+    @unittest.skipIf(not workbook.zip_member_writes,
+                     "ZipFile member writes require Python 3.6+")
+    def test_store_workbook_constant_memory_shared_strings(self):
+        """Test constant_memory mode with a shared string table."""
+
+        def write_workbook(options):
+            output = BytesIO()
+            options['in_memory'] = False
+
+            workbook = Workbook(output, options)
+            worksheet = workbook.add_worksheet()
+
+            for row in range(100):
+                worksheet.write_row(row, 0, ['Red', 'Green', 'Blue', row])
+
+            workbook.close()
+
+            return ZipFile(output)
+
+        exp = write_workbook({})
+        got = write_workbook({'constant_memory': True,
+                              'shared_strings': True})
+
+        self.assertEqual(got.read('xl/sharedStrings.xml'),
+                         exp.read('xl/sharedStrings.xml'))
+
+        sheet_xml = got.read('xl/worksheets/sheet1.xml')
+        self.assertIn(b'<c r="C100" t="s"><v>2</v></c>', sheet_xml)
+        self.assertNotIn(b'inlineStr', sheet_xml)
+
+    @unittest.skipIf(not workbook.zip_member_writes,
+                     "Non-seekable output requires Python 3.6+")
+    def test_store_workbook_non_seekable(self):
+        """Test writing the workbook to a non-seekable file object."""
+
+        class NonSeekable(object):
+            def __init__(self):
+                self.chunks = []
+
+            def write(self, data):
+                self.chunks.append(bytes(data))
+                return len(data)
+
+            def flush(self):
+                pass
+
+        output = NonSeekable()
+        workbook = Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+
+        for row in range(1000):
+            worksheet.write_row(row, 0, ['Foo', row])
+
+        workbook.close()
+
+        # The worksheet is written first, as a series of writes.
+        self.assertIn(b'xl/worksheets/sheet1.xml', output.chunks[0])
+        self.assertGreater(len(output.chunks), 1)
+
+        xlsx_file = ZipFile(BytesIO(b''.join(output.chunks)))
+
+        self.assertIsNone(xlsx_file.testzip())
+        self.assertIn(b'<c r="B1000"><v>999</v></c>',
+                      xlsx_file.read('xl/worksheets/sheet1.xml'))
+
+    def test_store_workbook_error(self):
+        """Test that a packaging error removes the partial xlsx file."""
+        tmpdir = tempfile.mkdtemp()
+        filename = os.path.join(tmpdir, 'error.xlsx')
+
+        try:
+            for options in ({}, {'in_memory': True}, {'tmpdir': tmpdir}):
+                workbook = Workbook(filename, options)
+                worksheet = workbook.add_worksheet()
+                worksheet.write('A1', 'Foo')
+
+                # A chart without data series fails during packaging.
+                chart = workbook.add_chart({'type': 'line'})
+                worksheet.insert_chart('C1', chart)
+
+                self.assertRaises(Exception, workbook.close)
+                self.assertEqual(os.listdir(tmpdir), [])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+@unittest.skipIf(not packager.deflate_zdict,
+                 "zlib compressobj() zdict requires Python 3.3+")
+class TestChunkedDeflater(unittest.TestCase):
+    """
+    Test the ChunkedDeflater parallel compressor.
+
+    """
+
+    def setUp(self):
+        self.pool = ThreadPool(2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.pool.join()
+
+    def test_compress_blocks(self):
+        """Test that the blocks are joined into one deflate stream."""
+
+        data = b''.join([b'<row r="%d"><c><v>%d</v></c></row>' % (i, i * i)
+                         for i in range(5000)])
+
+        deflater = ChunkedDeflater(self.pool, block_size=4096, max_pending=2)
+
+        compressed = []
+        for i in range(0, len(data), 1000):
+            compressed.append(deflater.compress(data[i:i + 1000]))
+        compressed.append(deflater.flush())
+
+        got = zlib.decompress(b''.join(compressed), -zlib.MAX_WBITS)
+
+        self.assertEqual(got, data)
+
+    def test_compress_empty(self):
+        """Test compressing no data."""
+
+        deflater = ChunkedDeflater(self.pool)
+
+        got = zlib.decompress(deflater.flush(), -zlib.MAX_WBITS)
+
+        self.assertEqual(got, b'')
@@ -324,3 +324,18 @@ class TestCalculateSpans(unittest.TestCase):
         exp = {1: '2:17', 2: '18:18'}
 
         self.assertEqual(got, exp)
+
+    def test_calculate_spans_sparse(self):
+        """Test Worksheet _calculate_spans() with sparse cells and comments"""
+        self.worksheet.write_number(0, 16383, 1)
+        self.worksheet.write_number(3, 0, 1)
+        self.worksheet.write_number(20, 5, 1)
+        self.worksheet.write_comment(21, 7, 'Foo')
+        self.worksheet.set_row(40, 20)
+
+        self.worksheet._calculate_spans()
+
+        got = self.worksheet.row_spans
+        exp = {0: '1:16384', 1: '6:8'}
+
+        self.assertEqual(got, exp)
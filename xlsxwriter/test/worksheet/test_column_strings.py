@@ -0,0 +1,79 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+import warnings
+from ...compatibility import StringIO
+from ...sharedstrings import SharedStringTable
+from ...worksheet import Worksheet
+from ...worksheet import ColumnStrings
+
+
+class TestColumnStrings(unittest.TestCase):
+    """
+    Test the per column shared or in-line string storage.
+
+    """
+
+    def setUp(self):
+        self.fh = StringIO()
+        self.worksheet = Worksheet()
+        self.worksheet._set_filehandle(self.fh)
+        self.worksheet.str_table = SharedStringTable()
+
+    def test_set_column_strings(self):
+        """Test writing in-line and shared strings in the same row"""
+        worksheet = self.worksheet
+
+        worksheet.set_column_strings('A:A', 'inline')
+        worksheet.write_string(0, 0, 'Foo')
+        worksheet.write_string(0, 1, 'Bar')
+        worksheet.write_row(1, 0, ['Baz', 'Bar'], None, ['string', 'string'])
+        worksheet._write_rows()
+
+        exp = ('<row r="1" spans="1:2">'
+               '<c r="A1" t="inlineStr"><is><t>Foo</t></is></c>'
+               '<c r="B1" t="s"><v>0</v></c></row>'
+               '<row r="2" spans="1:2">'
+               '<c r="A2" t="inlineStr"><is><t>Baz</t></is></c>'
+               '<c r="B2" t="s"><v>0</v></c></row>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(worksheet.str_table.unique_count, 1)
+
+    def test_set_column_strings_invalid(self):
+        """Test set_column_strings() with an unknown storage"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            got = self.worksheet.set_column_strings(0, 0, 'other')
+
+        self.assertEqual(got, -2)
+        self.assertEqual(self.worksheet.string_columns, None)
+
+    def test_auto_unique_strings(self):
+        """Test that a column of unique strings is written in-line"""
+        worksheet = self.worksheet
+        worksheet.adaptive_strings = True
+        worksheet.string_columns = {}
+        sample_size = ColumnStrings.sample_size
+
+        for row in range(sample_size + 10):
+            worksheet.write_string(row, 0, 'id%d' % row)
+            worksheet.write_string(row, 1, 'cat%d' % (row % 3))
+
+        # The sampled strings use the SST, the later ones are in-line.
+        self.assertEqual(worksheet.str_table.unique_count, sample_size + 3)
+        self.assertEqual(worksheet.table[sample_size + 5][0].string,
+                         'id%d' % (sample_size + 5))
+        index = worksheet.table[sample_size + 5][1].string
+        self.assertEqual(worksheet.str_table._get_shared_string(index),
+                         'cat%d' % ((sample_size + 5) % 3))
+
+        # Strings already in the SST are still shared.
+        worksheet.write_string(sample_size + 20, 0, 'id1')
+        self.assertEqual(worksheet.table[sample_size + 20][0].string, 2)
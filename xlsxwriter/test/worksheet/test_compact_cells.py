@@ -0,0 +1,167 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from struct import pack
+from ...compatibility import StringIO
+from ...format import Format
+from ...worksheet import Worksheet
+from ...worksheet import CompactTable
+from ...worksheet import cell_number_tuple
+from ...worksheet import cell_string_tuple
+from ...worksheet import cell_blank_tuple
+from ...worksheet import cell_boolean_tuple
+from ...worksheet import cell_formula_tuple
+from ...worksheet import cell_arformula_tuple
+
+
+class TestCompactCells(unittest.TestCase):
+    """
+    Test the CompactTable/CompactRow cell storage.
+
+    """
+
+    def setUp(self):
+        self.fh = StringIO()
+        self.worksheet = Worksheet()
+        self.worksheet._set_filehandle(self.fh)
+        self.worksheet.compact_cells = True
+        self.worksheet.table = CompactTable()
+
+    def test_cell_round_trip(self):
+        """Test CompactRow storage of the cell types"""
+        cell_format = Format()
+        table = CompactTable()
+
+        cells = [
+            cell_number_tuple(1.25, cell_format),
+            cell_string_tuple(7, None),
+            cell_string_tuple('Foo', cell_format),
+            cell_blank_tuple(cell_format),
+            cell_boolean_tuple(1, None),
+            cell_formula_tuple('A1+1', None, 3),
+            cell_arformula_tuple('SUM(A1:A2)', cell_format, 0, 'A3:A4'),
+        ]
+
+        for col, cell in enumerate(cells):
+            table[0][col] = cell
+
+        for col, cell in enumerate(cells):
+            self.assertEqual(table[0][col], cell)
+            self.assertIs(type(table[0][col]), type(cell))
+
+    def test_column_order(self):
+        """Test CompactRow keeps columns sorted and overwrites cells"""
+        table = CompactTable()
+
+        table[3][5] = cell_number_tuple(5, None)
+        table[3][1] = cell_number_tuple(1, None)
+        table[3][16383] = cell_number_tuple(16383, None)
+        table[3][3] = cell_number_tuple(3, None)
+        table[3][1] = cell_number_tuple(10, None)
+
+        got = table[3].items()
+        exp = [(1, cell_number_tuple(10, None)),
+               (3, cell_number_tuple(3, None)),
+               (5, cell_number_tuple(5, None)),
+               (16383, cell_number_tuple(16383, None))]
+
+        self.assertEqual(got, exp)
+        self.assertTrue(3 in table[3])
+        self.assertFalse(4 in table[3])
+        self.assertFalse(table[4])
+        self.assertRaises(KeyError, table[3].__getitem__, 4)
+
+    def test_extend(self):
+        """Test CompactRow _extend() with native uint64 and double data"""
+        table = CompactTable()
+        format_id = table._get_format_id(Format())
+
+        meta = [(col << 40) | format_id for col in (2, 3, 4)]
+        table[0][0] = cell_number_tuple(1, None)
+        table[0]._extend(pack('=3Q', *meta), pack('=3d', 2, 3, 4))
+
+        got = table[0].items()
+        exp = [(0, cell_number_tuple(1, None)),
+               (2, cell_number_tuple(2, table.formats[format_id])),
+               (3, cell_number_tuple(3, table.formats[format_id])),
+               (4, cell_number_tuple(4, table.formats[format_id]))]
+
+        self.assertEqual(got, exp)
+
+    def test_calculate_spans(self):
+        """Test Worksheet _calculate_spans() with compact cells"""
+        row = 0
+        col = 0
+
+        for i in range(row, row + 17):
+            self.worksheet.write_number(i, col, 1)
+            col = col + 1
+
+        self.worksheet._calculate_spans()
+
+        exp = {0: '1:16', 1: '17:17'}
+        got = self.worksheet.row_spans
+
+        self.assertEqual(got, exp)
+
+    def test_write_sheet_data(self):
+        """Test Worksheet _write_sheet_data() with compact cells"""
+        self.worksheet.write_number(0, 2, 1)
+        self.worksheet.write_boolean(0, 0, True)
+        self.worksheet.write_formula(1, 1, '=A1+1', None, 2)
+
+        self.worksheet._write_sheet_data()
+
+        exp = ('<sheetData>'
+               '<row r="1" spans="1:3">'
+               '<c r="A1" t="b"><v>1</v></c>'
+               '<c r="C1"><v>1</v></c>'
+               '</row>'
+               '<row r="2" spans="1:3">'
+               '<c r="B2"><f>A1+1</f><v>2</v></c>'
+               '</row>'
+               '</sheetData>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_get_range_data(self):
+        """Test Worksheet _get_range_data() with compact cells"""
+        self.worksheet.write_number(0, 0, 1.5)
+        self.worksheet.write_blank(1, 0, None, Format())
+        self.worksheet.write_formula(2, 0, '=A1', None, 1.5)
+
+        got = self.worksheet._get_range_data(0, 0, 4, 0)
+        exp = ['1.5', '', 1.5, None, None]
+
+        self.assertEqual(got, exp)
+
+    def test_overwrite_object_cells(self):
+        """Test CompactRow reuses object slots for overwritten cells"""
+        table = CompactTable()
+        cells = table[0]
+
+        cells[0] = cell_formula_tuple('A2', None, 0)
+        cells[1] = cell_string_tuple('Foo', None)
+
+        for i in range(10):
+            cells[0] = cell_formula_tuple('A%d' % i, None, i)
+            cells[1] = cell_string_tuple('Bar%d' % i, None)
+
+        cells[0] = cell_arformula_tuple('SUM(B1:B2)', None, 0, 'A1')
+
+        self.assertEqual(len(cells.objects), 2)
+        self.assertEqual(cells[0],
+                         cell_arformula_tuple('SUM(B1:B2)', None, 0, 'A1'))
+        self.assertEqual(cells[1], cell_string_tuple('Bar9', None))
+
+        # Overwriting with a non-object cell releases the object data.
+        cells[1] = cell_number_tuple(1, None)
+
+        self.assertEqual(cells.objects, [('SUM(B1:B2)', 0, 'A1'), None])
+        self.assertEqual(cells[1], cell_number_tuple(1, None))
@@ -0,0 +1,92 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+import warnings
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestFinish(unittest.TestCase):
+    """
+    Test the Worksheet finish() method.
+
+    """
+
+    def setUp(self):
+        self.output = BytesIO()
+        self.workbook = Workbook(self.output)
+        self.worksheet = self.workbook.add_worksheet()
+        self.bold = self.workbook.add_format({'bold': 1})
+
+    def get_sheet_xml(self):
+        self.workbook.close()
+        xlsx_file = ZipFile(self.output)
+        return xlsx_file.read('xl/worksheets/sheet1.xml')
+
+    def test_set_row_after_finish(self):
+        """Test that set_row() after finish() warns and is ignored"""
+        worksheet = self.worksheet
+
+        worksheet.set_row(0, 30)
+        worksheet.write('A1', 'Foo')
+        worksheet.finish()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(worksheet.set_row(5, 40, self.bold), -1)
+
+        self.assertEqual(len(caught), 1)
+
+        got = self.get_sheet_xml()
+
+        self.assertIn(b'<row r="1" spans="1:1" ht="30" customHeight="1">',
+                      got)
+        self.assertNotIn(b'<row r="6"', got)
+
+    def test_set_column_after_finish(self):
+        """Test that a set_column() format after finish() is ignored"""
+        worksheet = self.worksheet
+
+        worksheet.write('A1', 'Foo')
+        worksheet.finish()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(worksheet.set_column('A:A', 20, self.bold), -1)
+            self.assertEqual(worksheet.set_column('B:B', 30), 0)
+
+        self.assertEqual(len(caught), 1)
+
+        got = self.get_sheet_xml()
+
+        self.assertIn(b'<col min="2" max="2" width="30.7109375" '
+                      b'customWidth="1"/>', got)
+        self.assertNotIn(b'<col min="1"', got)
+        self.assertIn(b'<c r="A1" t="s">', got)
+
+    def test_add_series_after_finish(self):
+        """Test that a chart series added after finish() warns"""
+        worksheet = self.worksheet
+        chart = self.workbook.add_chart({'type': 'line'})
+
+        chart.add_series({'values': '=Sheet1!$A$1:$A$2'})
+        worksheet.write_column('A1', [1, 2])
+        worksheet.write_column('B1', [3, 4])
+        worksheet.finish()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            chart.add_series({'values': '=Sheet1!$B$1:$B$2'})
+
+        self.assertEqual(len(caught), 1)
+
+        worksheet.insert_chart('D2', chart)
+        self.workbook.close()
+
+        self.assertEqual(chart.formula_data, [['1', '2'], ()])
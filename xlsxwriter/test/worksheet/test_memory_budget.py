@@ -0,0 +1,207 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...compatibility import StringIO
+from ...format import Format
+from ...sharedstrings import SharedStringTable
+from ...workbook import MemoryBudget
+from ...worksheet import Worksheet
+from ...worksheet import CompactTable
+from ...worksheet import cell_number_tuple
+from ...worksheet import cell_formula_tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """
+    Test spilling the Worksheet cell table to disk with a memory budget.
+
+    """
+
+    def setUp(self):
+        self.fh = StringIO()
+        self.worksheet = Worksheet()
+        self.worksheet._set_filehandle(self.fh)
+        self.worksheet.memory_budget = MemoryBudget(1000, min_spill_size=0)
+        self.worksheet.memory_budget._add_worksheet(self.worksheet)
+
+    def test_spill_table(self):
+        """Test that rows are spilled when the budget is exceeded"""
+        worksheet = self.worksheet
+
+        for row in range(10):
+            worksheet.write_number(row, 0, row)
+
+        # The cells of 9 rows exceed the budget. The current row is kept.
+        self.assertEqual(len(worksheet.spill_segments), 1)
+        self.assertEqual(list(worksheet.spill_segments[0].rows),
+                         list(range(8)))
+        self.assertEqual(sorted(worksheet.table), [8, 9])
+        self.assertEqual(worksheet.memory_budget.used, 120)
+
+    def test_min_spill_size(self):
+        """Test that rows aren't spilled below the minimum spill size"""
+        worksheet = self.worksheet
+        worksheet.memory_budget.min_spill_size = 1200
+
+        for row in range(20):
+            worksheet.write_number(row, 0, row)
+
+        # The budget is exceeded from the 9th row but the rows are only
+        # spilled once the worksheet has 10 rows.
+        self.assertEqual(len(worksheet.spill_segments), 2)
+        self.assertEqual(list(worksheet.spill_segments[0].rows),
+                         list(range(9)))
+        self.assertEqual(list(worksheet.spill_segments[1].rows),
+                         list(range(9, 19)))
+
+    def test_write_many_segments(self):
+        """Test writing the rows from many spilled segments"""
+        worksheet = self.worksheet
+
+        exp_worksheet = Worksheet()
+        exp_worksheet._set_filehandle(StringIO())
+
+        # Write the rows out of order so that rows are spread over several
+        # segments and cells are overwritten by later segments.
+        for sheet in (worksheet, exp_worksheet):
+            sheet.str_table = SharedStringTable()
+
+            for i in range(500):
+                row = (i * 7) % 250
+                sheet.write_number(row, i % 3, i)
+                sheet.write_string(row, 3, 'Row %d' % i)
+
+        self.assertGreater(len(worksheet.spill_segments), 100)
+
+        # The segments share a single tempfile.
+        self.assertEqual(set(segment.fh for segment
+                             in worksheet.spill_segments),
+                         set([worksheet.spill_fh]))
+
+        exp_worksheet._write_rows()
+        worksheet._write_rows()
+
+        self.assertEqual(self.fh.getvalue(), exp_worksheet.fh.getvalue())
+
+    def test_get_row_cells(self):
+        """Test merging spilled cells with the cells in memory"""
+        worksheet = self.worksheet
+        cell_format = Format()
+
+        worksheet.write_number(0, 0, 1, cell_format)
+        worksheet.write_formula(0, 1, '=A1', None, 2)
+        worksheet._spill_table()
+
+        worksheet.write_number(0, 1, 3)
+        worksheet.write_number(0, 2, 4)
+        worksheet._spill_table(0)
+
+        exp = {
+            0: cell_number_tuple(1, cell_format),
+            1: cell_number_tuple(3, None),
+            2: cell_number_tuple(4, None),
+        }
+        got = worksheet._get_row_cells(0)
+
+        self.assertEqual(got, exp)
+        self.assertIs(got[0].format, cell_format)
+
+        worksheet._spill_table()
+        self.assertEqual(len(worksheet.spill_segments), 2)
+        self.assertEqual(worksheet._get_row_cells(0), exp)
+        self.assertEqual(worksheet._get_row_cells(1), None)
+
+        worksheet.write_formula(3, 0, '=A1', None, 2)
+        self.assertEqual(worksheet._get_row_cells(3),
+                         {0: cell_formula_tuple('A1', None, 2)})
+
+    def test_write_rows(self):
+        """Test writing the rows in order from the spilled segments"""
+        worksheet = self.worksheet
+
+        worksheet.write_number(2, 0, 3)
+        worksheet._spill_table()
+        worksheet.write_number(0, 0, 1)
+        worksheet._spill_table()
+        worksheet.write_number(1, 0, 2)
+        worksheet.write_number(2, 1, 4)
+
+        self.assertEqual([row for row, _ in worksheet._get_rows()],
+                         [0, 1, 2])
+
+        worksheet._write_rows()
+
+        exp = ('<row r="1" spans="1:2"><c r="A1"><v>1</v></c></row>'
+               '<row r="2" spans="1:2"><c r="A2"><v>2</v></c></row>'
+               '<row r="3" spans="1:2"><c r="A3"><v>3</v></c>'
+               '<c r="B3"><v>4</v></c></row>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def assert_spilled_rows(self, worksheet, num_rows, cell_format):
+        # Check that rows were spilled and that the cells of each row have
+        # the values written by the bulk writers, and the cell format.
+        self.assertTrue(worksheet.spill_segments)
+
+        for row in range(num_rows):
+            exp = {0: cell_number_tuple(row * 2, cell_format),
+                   1: cell_number_tuple(row * 2 + 1, None)}
+            got = dict(worksheet._get_row_cells(row).items())
+
+            self.assertEqual(got, exp)
+            self.assertIs(got[0].format, cell_format)
+
+    @unittest.skipIf(numpy is None, "numpy is required for write_array()")
+    def test_write_array(self):
+        """Test write_array() with a format and spilled rows"""
+        cell_format = Format()
+
+        for compact_cells in (False, True):
+            self.setUp()
+            worksheet = self.worksheet
+
+            if compact_cells:
+                worksheet.compact_cells = True
+                worksheet.table = CompactTable()
+
+            data = numpy.arange(200.0).reshape(100, 2)
+            worksheet.write_array(0, 0, data[:, :1], cell_format)
+            worksheet.write_array(0, 1, data[:, 1:])
+
+            self.assert_spilled_rows(worksheet, 100, cell_format)
+
+    @unittest.skipIf(pandas is None,
+                     "pandas is required for write_dataframe()")
+    def test_write_dataframe(self):
+        """Test write_dataframe() with a format and spilled rows"""
+        cell_format = Format()
+        df = pandas.DataFrame({'a': range(0, 200, 2), 'b': range(1, 200, 2)})
+
+        for compact_cells in (False, True):
+            self.setUp()
+            worksheet = self.worksheet
+
+            if compact_cells:
+                worksheet.compact_cells = True
+                worksheet.table = CompactTable()
+
+            worksheet.write_dataframe(0, 0, df, index=False, header=False,
+                                      formats={'a': cell_format})
+
+            self.assert_spilled_rows(worksheet, 100, cell_format)
@@ -0,0 +1,76 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...compatibility import StringIO
+from ...sharedstrings import SharedStringTable
+from ...worksheet import Worksheet
+
+
+class TestRowWindow(unittest.TestCase):
+    """
+    Test the constant_memory row window of the Worksheet.
+
+    """
+
+    def setUp(self):
+        self.worksheet = Worksheet()
+        self.worksheet.str_table = SharedStringTable()
+        self.worksheet.optimization = 1
+        self.worksheet.inline_strings = True
+        self.worksheet.row_window = 3
+        self.worksheet.row_data_fh = StringIO()
+        self.worksheet.fh = self.worksheet.row_data_fh
+
+    def test_write_rows_in_window(self):
+        """Test writing rows out of order within the row window"""
+        worksheet = self.worksheet
+
+        worksheet.write_number(2, 0, 3)
+        worksheet.write_number(0, 0, 1)
+        worksheet.write_number(1, 0, 2)
+        worksheet.write_number(0, 1, 4)
+
+        self.assertEqual(worksheet.row_data_fh.getvalue(), '')
+        self.assertEqual(len(worksheet.table), 3)
+
+        # Row 0 moves out of the window and is written.
+        worksheet.write_number(3, 0, 5)
+
+        exp = '<row r="1"><c r="A1"><v>1</v></c><c r="B1"><v>4</v></c></row>'
+        got = worksheet.row_data_fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(worksheet.previous_row, 1)
+
+        # Rows that have been written are ignored.
+        self.assertEqual(worksheet.write_number(0, 2, 6), -1)
+
+    def test_write_rows_after_gap(self):
+        """Test writing a row well past the row window"""
+        worksheet = self.worksheet
+
+        worksheet.write_number(0, 0, 1)
+        worksheet.write_number(2, 0, 3)
+        worksheet.write_number(100000, 0, 4)
+
+        exp = ('<row r="1"><c r="A1"><v>1</v></c></row>'
+               '<row r="3"><c r="A3"><v>3</v></c></row>')
+        got = worksheet.row_data_fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(worksheet.previous_row, 99998)
+        self.assertEqual(list(worksheet.table), [100000])
+
+        # Write all of the remaining rows.
+        worksheet._write_single_row(worksheet.xls_rowmax)
+
+        exp += '<row r="100001"><c r="A100001"><v>4</v></c></row>'
+        got = worksheet.row_data_fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(len(worksheet.table), 0)
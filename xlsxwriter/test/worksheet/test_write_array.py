@@ -0,0 +1,121 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from datetime import datetime
+from ...compatibility import StringIO
+from ...format import Format
+from ...worksheet import Worksheet
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is required for write_array()")
+class TestWriteArray(unittest.TestCase):
+    """
+    Test the Worksheet write_array() method.
+
+    """
+
+    def setUp(self):
+        self.fh = StringIO()
+        self.worksheet = Worksheet()
+        self.worksheet._set_filehandle(self.fh)
+
+    def get_sheet_data(self, worksheet):
+        fh = StringIO()
+        worksheet._set_filehandle(fh)
+        worksheet._write_sheet_data()
+        return fh.getvalue()
+
+    def test_write_array_2d(self):
+        """Test write_array() with a 2D array of floats"""
+        data = numpy.array([[1.5, 2], [3, 4.25]])
+
+        self.worksheet.write_array(1, 1, data)
+        self.worksheet._write_sheet_data()
+
+        exp = ('<sheetData>'
+               '<row r="2" spans="2:3">'
+               '<c r="B2"><v>1.5</v></c>'
+               '<c r="C2"><v>2</v></c>'
+               '</row>'
+               '<row r="3" spans="2:3">'
+               '<c r="B3"><v>3</v></c>'
+               '<c r="C3"><v>4.25</v></c>'
+               '</row>'
+               '</sheetData>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_array_matches_write_number(self):
+        """Test write_array() gives the same XML as write_number()"""
+        data = numpy.random.RandomState(12).uniform(-1e6, 1e6, (20, 7))
+        bold = Format({'bold': 1, 'xf_index': 1})
+
+        worksheet = Worksheet()
+        worksheet.write_boolean(0, 3, True)
+        worksheet.write_number(2, 9, 1)
+        for row, row_data in enumerate(data):
+            for col, value in enumerate(row_data):
+                worksheet.write_number(row, col + 2, value, bold)
+        exp = self.get_sheet_data(worksheet)
+
+        worksheet = Worksheet()
+        worksheet.write_boolean(0, 3, True)
+        worksheet.write_number(2, 9, 1)
+        worksheet.write_array(0, 2, data, bold)
+        got = self.get_sheet_data(worksheet)
+
+        self.assertEqual(got, exp)
+
+    def test_write_array_types(self):
+        """Test write_array() with booleans, ints and datetimes"""
+        dates = ['2016-01-01T12:30:00.123456', '1900-01-01T06:00',
+                 '1900-02-28', '1900-03-01']
+
+        worksheet = Worksheet()
+        worksheet.write_row(0, 0, [True, False])
+        worksheet.write_row(1, 0, [1, 2 ** 40])
+        for col, date in enumerate(dates):
+            date = numpy.datetime64(date).astype(datetime)
+            worksheet.write_datetime(2, col, date)
+        exp = self.get_sheet_data(worksheet)
+
+        worksheet = Worksheet()
+        worksheet.write_array(0, 0, numpy.array([True, False]))
+        worksheet.write_array(1, 0, numpy.array([1, 2 ** 40]))
+        worksheet.write_array(2, 0, numpy.array(dates,
+                                                dtype='datetime64[us]'))
+        got = self.get_sheet_data(worksheet)
+
+        self.assertEqual(got, exp)
+
+    def test_write_array_bounds(self):
+        """Test write_array() bounds checking"""
+        data = numpy.zeros((2, 2))
+
+        self.assertEqual(self.worksheet.write_array(-1, 0, data), -1)
+        self.assertEqual(self.worksheet.write_array(0, 16383, data), -1)
+        self.assertEqual(self.worksheet.write_array(1048575, 0, data), -1)
+        self.assertEqual(self.worksheet.dim_rowmin, None)
+        self.assertEqual(self.worksheet.write_array(0, 0, data), 0)
+
+    def test_write_array_nan(self):
+        """Test write_array() with nan values"""
+        data = numpy.array([1, numpy.nan])
+
+        self.assertRaises(TypeError, self.worksheet.write_array, 0, 0, data)
+
+        self.worksheet.nan_inf_to_errors = True
+        self.worksheet.write_array(0, 0, data)
+
+        self.assertEqual(self.worksheet.table[0][1].formula, '#NUM!')
@@ -7,8 +7,10 @@
 
 import unittest
 from ...compatibility import StringIO
-from ...compat_collections import namedtuple
 from ...worksheet import Worksheet
+from ...worksheet import cell_number_tuple
+from ...worksheet import cell_string_tuple
+from ...worksheet import cell_formula_tuple
 
 
 class TestWriteCell(unittest.TestCase):
@@ -25,8 +27,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_number(self):
         """Test the _write_cell() method for numbers."""
 
-        cell_tuple = namedtuple('Number', 'number, format')
-        cell = cell_tuple(1, None)
+        cell = cell_number_tuple(1, None)
 
         self.worksheet._write_cell(0, 0, cell)
 
@@ -38,8 +39,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_string(self):
         """Test the _write_cell() method for strings."""
 
-        cell_tuple = namedtuple('String', 'string, format')
-        cell = cell_tuple(0, None)
+        cell = cell_string_tuple(0, None)
 
         self.worksheet._write_cell(3, 1, cell)
 
@@ -51,8 +51,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_formula01(self):
         """Test the _write_cell() method for formulas."""
 
-        cell_tuple = namedtuple('Formula', 'formula, format, value')
-        cell = cell_tuple('A3+A5', None, 0)
+        cell = cell_formula_tuple('A3+A5', None, 0)
 
         self.worksheet._write_cell(1, 2, cell)
 
@@ -64,8 +63,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_formula02(self):
         """Test the _write_cell() method for formulas."""
 
-        cell_tuple = namedtuple('Formula', 'formula, format, value')
-        cell = cell_tuple('A3+A5', None, 7)
+        cell = cell_formula_tuple('A3+A5', None, 7)
 
         self.worksheet._write_cell(1, 2, cell)
 
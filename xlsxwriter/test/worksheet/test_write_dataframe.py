@@ -0,0 +1,121 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...compatibility import StringIO
+from ...format import Format
+from ...sharedstrings import SharedStringTable
+from ...worksheet import Worksheet
+
+try:
+    import numpy
+    import pandas
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(pandas is None, "pandas is required for write_dataframe()")
+class TestWriteDataFrame(unittest.TestCase):
+    """
+    Test the Worksheet write_dataframe() method.
+
+    """
+
+    def get_worksheet(self):
+        worksheet = Worksheet()
+        worksheet.str_table = SharedStringTable()
+        return worksheet
+
+    def get_sheet_data(self, worksheet):
+        fh = StringIO()
+        worksheet._set_filehandle(fh)
+        worksheet._write_sheet_data()
+        return fh.getvalue()
+
+    def test_write_dataframe(self):
+        """Test write_dataframe() gives the same XML as write()"""
+        df = pandas.DataFrame({'num': [1, 2.5, numpy.nan],
+                               'str': ['x', None, 'x'],
+                               'cat': pandas.Categorical(['p', 'q', 'p']),
+                               'bool': [True, False, True],
+                               'mixed': [1, 'z', None]})
+
+        worksheet = self.get_worksheet()
+        worksheet.write_row(0, 1, ['num', 'str', 'cat', 'bool', 'mixed'])
+        worksheet.write_column(1, 0, [0, 1, 2])
+        worksheet.write_row(1, 1, [1, 'x', 'p', True, 1])
+        worksheet.write_row(2, 1, [2.5])
+        worksheet.write_row(2, 3, ['q', False, 'z'])
+        worksheet.write_row(3, 2, ['x', 'p', True])
+        exp = self.get_sheet_data(worksheet)
+
+        worksheet = self.get_worksheet()
+        worksheet.write_dataframe(0, 0, df)
+        got = self.get_sheet_data(worksheet)
+
+        self.assertEqual(got, exp)
+
+    def test_write_dataframe_shared_strings(self):
+        """Test write_dataframe() string counts"""
+        df = pandas.DataFrame({'a': ['x', 'y', 'x', 'x'],
+                               'b': pandas.Categorical(['y', 'y', 'x', 'y'],
+                                                       ['w', 'x', 'y'])})
+
+        worksheet = self.get_worksheet()
+        worksheet.write_dataframe(0, 0, df, index=False, header=False)
+        str_table = worksheet.str_table
+
+        self.assertEqual(str_table.count, 8)
+        self.assertEqual(str_table.unique_count, 2)
+        self.assertNotIn('w', str_table.string_table)
+
+    def test_write_dataframe_formats(self):
+        """Test write_dataframe() with column formats and datetimes"""
+        bold = Format({'bold': 1, 'xf_index': 1})
+        date = Format({'num_format': 14, 'xf_index': 2})
+        df = pandas.DataFrame({'a': [1, 2],
+                               'b': pandas.to_datetime(['2016-01-01', None])})
+
+        worksheet = self.get_worksheet()
+        worksheet.write_dataframe(1, 1, df, index=False, header=False,
+                                  formats={'a': bold, 'b': date})
+        got = self.get_sheet_data(worksheet)
+
+        exp = ('<sheetData>'
+               '<row r="2" spans="2:3">'
+               '<c r="B2" s="1"><v>1</v></c>'
+               '<c r="C2" s="2"><v>42370</v></c>'
+               '</row>'
+               '<row r="3" spans="2:3">'
+               '<c r="B3" s="1"><v>2</v></c>'
+               '</row>'
+               '</sheetData>')
+
+        self.assertEqual(got, exp)
+
+    def test_write_dataframe_bounds(self):
+        """Test write_dataframe() bounds checking"""
+        df = pandas.DataFrame({'a': [1, 2]})
+        worksheet = self.get_worksheet()
+
+        self.assertEqual(worksheet.write_dataframe(1048574, 0, df), -1)
+        self.assertEqual(worksheet.write_dataframe(0, 16383, df), -1)
+        self.assertEqual(worksheet.dim_rowmin, None)
+        self.assertEqual(worksheet.write_dataframe(0, 0, df), 0)
+
+    def test_write_dataframe_timezone(self):
+        """Test write_dataframe() with timezone aware datetimes"""
+        dates = pandas.to_datetime(['2016-01-01 12:00']).tz_localize('UTC')
+        df = pandas.DataFrame({'a': dates})
+        worksheet = self.get_worksheet()
+
+        self.assertRaises(TypeError, worksheet.write_dataframe, 0, 0, df)
+
+        worksheet.remove_timezone = True
+        worksheet.write_dataframe(0, 0, df, index=False, header=False)
+
+        self.assertEqual(worksheet.table[0][0].number, 42370.5)
@@ -0,0 +1,43 @@
+###############################################################################
+# _*_ coding: utf-8
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+from __future__ import unicode_literals
+import unittest
+from ...compatibility import StringIO
+from ...format import Format
+from ...sharedstrings import SharedStringTable
+from ...worksheet import Worksheet
+
+
+class TestWriteRichString(unittest.TestCase):
+    """
+    Test the Worksheet write_rich_string() method with in-line strings.
+
+    """
+
+    def setUp(self):
+        self.fh = StringIO()
+        self.worksheet = Worksheet()
+        self.worksheet._set_filehandle(self.fh)
+        self.worksheet.str_table = SharedStringTable()
+        self.worksheet.inline_strings = True
+
+    def test_write_rich_string_utf8(self):
+        """Test write_rich_string() with in-line non-ASCII strings"""
+        bold = Format({'bold': 1})
+
+        self.worksheet.write_rich_string(0, 0, 'Caf', bold, 'é')
+        self.worksheet._write_sheet_data()
+
+        exp = ('<sheetData><row r="1" spans="1:1"><c r="A1" t="inlineStr">'
+               '<is><r><t>Caf</t></r><r><rPr><b/><sz val="11"/>'
+               '<color theme="1"/><rFont val="Calibri"/>'
+               '<family val="2"/><scheme val="minor"/></rPr>'
+               '<t>é</t></r></is></c></row></sheetData>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
@@ -0,0 +1,94 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+import warnings
+from datetime import date
+from ...compatibility import StringIO
+from ...format import Format
+from ...sharedstrings import SharedStringTable
+from ...worksheet import Worksheet
+
+
+class TestWriteRowTypes(unittest.TestCase):
+    """
+    Test the Worksheet write_row() and write_column() types parameter.
+
+    """
+
+    def get_worksheet(self):
+        worksheet = Worksheet()
+        worksheet.str_table = SharedStringTable()
+        return worksheet
+
+    def get_sheet_data(self, worksheet):
+        fh = StringIO()
+        worksheet._set_filehandle(fh)
+        worksheet._write_sheet_data()
+        return fh.getvalue()
+
+    def test_write_row_types(self):
+        """Test write_row() with types gives the same XML as write()"""
+        bold = Format({'bold': 1, 'xf_index': 1})
+        data = ['Foo', 1.5, 3, None, True, date(2016, 1, 1), '=A1', '']
+        types = ['string', float, 'number', 'number', bool, 'datetime',
+                 'formula', str]
+
+        worksheet = self.get_worksheet()
+        worksheet.write_row(0, 0, data)
+        worksheet.write_row(1, 1, data, bold)
+        exp = self.get_sheet_data(worksheet)
+
+        worksheet = self.get_worksheet()
+        worksheet.write_row(0, 0, data, None, types)
+        worksheet.write_row(1, 1, data, bold, types)
+        got = self.get_sheet_data(worksheet)
+
+        self.assertEqual(got, exp)
+        self.assertEqual(worksheet.dim_colmax, 8)
+
+    def test_write_row_partial_types(self):
+        """Test write_row() with fewer types than tokens"""
+        worksheet = self.get_worksheet()
+        worksheet.write_row(0, 0, ['1', '2', 3], None, ['string', None])
+
+        self.assertEqual(worksheet.table[0][0].string, 0)
+        self.assertEqual(worksheet.table[0][1].string, 1)
+        self.assertEqual(worksheet.table[0][2].number, 3)
+
+    def test_write_row_types_no_conversion(self):
+        """Test that typed strings aren't converted to urls"""
+        worksheet = self.get_worksheet()
+        worksheet.write_row(0, 0, ['http://www.perl.com'], None, 'string')
+
+        self.assertEqual(worksheet.hyperlinks, {})
+
+    def test_write_column_types(self):
+        """Test write_column() with types gives the same XML as write()"""
+        worksheet = self.get_worksheet()
+        worksheet.write_column(1, 2, [1, 2.5, None, 4])
+        exp = self.get_sheet_data(worksheet)
+
+        worksheet = self.get_worksheet()
+        worksheet.write_column(1, 2, [1, 2.5, None, 4], None, 'number')
+        got = self.get_sheet_data(worksheet)
+
+        self.assertEqual(got, exp)
+
+    def test_write_row_types_errors(self):
+        """Test write_row() with types bounds and unknown types"""
+        worksheet = self.get_worksheet()
+
+        self.assertEqual(worksheet.write_row(0, 16383, [1, 2], None,
+                                             'number'), -1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.assertEqual(worksheet.write_row(0, 0, [1], None,
+                                                 'integer'), -1)
+
+        self.assertEqual(worksheet.dim_rowmin, None)
@@ -0,0 +1,90 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...compatibility import StringIO
+from ...format import Format
+from ...sharedstrings import SharedStringTable
+from ...worksheet import Worksheet
+
+
+class TestWriteRows(unittest.TestCase):
+    """
+    Test the Worksheet write_rows() method.
+
+    """
+
+    def get_worksheet(self, optimization=0):
+        worksheet = Worksheet()
+        worksheet.str_table = SharedStringTable()
+        worksheet.optimization = optimization
+        worksheet.inline_strings = bool(optimization)
+
+        if optimization:
+            worksheet.row_data_fh = StringIO()
+            worksheet.fh = worksheet.row_data_fh
+
+        return worksheet
+
+    def get_sheet_data(self, worksheet):
+        fh = StringIO()
+        worksheet._set_filehandle(fh)
+        worksheet._write_sheet_data()
+        return fh.getvalue()
+
+    def test_write_rows(self):
+        """Test write_rows() gives the same XML as write_row()"""
+        bold = Format({'bold': 1, 'xf_index': 1})
+        data = [[1, 'Foo', None, 2.5, True, '=A1', ''],
+                [],
+                ['Bar', None]]
+
+        worksheet = self.get_worksheet()
+        worksheet.write_row(1, 1, data[0][:1], bold)
+        worksheet.write_row(1, 2, data[0][1:])
+        worksheet.write_row(3, 1, data[2][:1], bold)
+        worksheet.write_row(3, 2, data[2][1:])
+        exp = self.get_sheet_data(worksheet)
+
+        worksheet = self.get_worksheet()
+        worksheet.write_rows(1, 1, iter(data), [bold])
+        got = self.get_sheet_data(worksheet)
+
+        self.assertEqual(got, exp)
+        self.assertEqual(worksheet.dim_colmax, 6)
+
+    def test_write_rows_generator(self):
+        """Test write_rows() writes each row in optimization mode"""
+        worksheet = self.get_worksheet(optimization=1)
+
+        def rows():
+            for i in range(3):
+                yield (i, 'Foo')
+                # The previous row should be written out.
+                self.assertEqual(len(worksheet.table), 0)
+
+        worksheet.write_rows(0, 0, rows())
+
+        exp = ('<row r="1"><c r="A1"><v>0</v></c>'
+               '<c r="B1" t="inlineStr"><is><t>Foo</t></is></c></row>'
+               '<row r="2"><c r="A2"><v>1</v></c>'
+               '<c r="B2" t="inlineStr"><is><t>Foo</t></is></c></row>'
+               '<row r="3"><c r="A3"><v>2</v></c>'
+               '<c r="B3" t="inlineStr"><is><t>Foo</t></is></c></row>')
+        got = worksheet.row_data_fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(worksheet.previous_row, 3)
+
+    def test_write_rows_bounds(self):
+        """Test write_rows() bounds checking"""
+        worksheet = self.get_worksheet()
+
+        self.assertEqual(worksheet.write_rows(0, 16383, [[1, 2]]), -1)
+        self.assertEqual(worksheet.write_rows(1048575, 0, [[1], [2]]), -1)
+        self.assertEqual(worksheet.dim_rowmax, 1048575)
+        self.assertEqual(worksheet.dim_colmax, 0)
@@ -7,9 +7,19 @@
 
 import unittest
 from ...compatibility import StringIO
+from ...format import Format
 from ...worksheet import Worksheet
 
 
+class CountingStringIO(StringIO):
+    # StringIO that counts the number of writes.
+    writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return StringIO.write(self, data)
+
+
 class TestWriteSheetData(unittest.TestCase):
     """
     Test the Worksheet _write_sheet_data() method.
@@ -30,3 +40,67 @@ class TestWriteSheetData(unittest.TestCase):
         got = self.fh.getvalue()
 
         self.assertEqual(got, exp)
+
+    def test_write_sheet_data_sparse(self):
+        """Test the _write_sheet_data() method with sparse cells"""
+
+        self.worksheet.write_number(5, 16383, 2)
+        self.worksheet.write_number(5, 0, 1)
+        self.worksheet.set_row(3, 20)
+
+        self.worksheet._write_sheet_data()
+
+        exp = ('<sheetData>'
+               '<row r="4" spans="1:16384" ht="20" customHeight="1"/>'
+               '<row r="6" spans="1:16384">'
+               '<c r="A6"><v>1</v></c>'
+               '<c r="XFD6"><v>2</v></c>'
+               '</row>'
+               '</sheetData>')
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_sheet_data_row_buffer(self):
+        """Test the _write_sheet_data() method writes each row once"""
+
+        fh = CountingStringIO()
+        self.worksheet._set_filehandle(fh)
+
+        row_format = Format({'bold': 1, 'xf_index': 1})
+        col_format = Format({'italic': 1, 'xf_index': 2})
+        self.worksheet.set_row(1, None, row_format)
+        self.worksheet.set_column(3, 3, None, col_format)
+
+        for row in range(3):
+            self.worksheet.write_number(row, 2, 1)
+            self.worksheet.write_boolean(row, 3, True)
+            self.worksheet.write_blank(row, 4, None, col_format)
+            self.worksheet.write_formula(row, 5, '=A1')
+
+        self.worksheet._write_sheet_data()
+
+        exp = ('<sheetData>'
+               '<row r="1" spans="3:6">'
+               '<c r="C1"><v>1</v></c>'
+               '<c r="D1" s="2" t="b"><v>1</v></c>'
+               '<c r="E1" s="2"/>'
+               '<c r="F1"><f>A1</f><v>0</v></c>'
+               '</row>'
+               '<row r="2" spans="3:6" s="1" customFormat="1">'
+               '<c r="C2" s="1"><v>1</v></c>'
+               '<c r="D2" s="1" t="b"><v>1</v></c>'
+               '<c r="E2" s="2"/>'
+               '<c r="F2" s="1"><f>A1</f><v>0</v></c>'
+               '</row>'
+               '<row r="3" spans="3:6">'
+               '<c r="C3"><v>1</v></c>'
+               '<c r="D3" s="2" t="b"><v>1</v></c>'
+               '<c r="E3" s="2"/>'
+               '<c r="F3"><f>A1</f><v>0</v></c>'
+               '</row>'
+               '</sheetData>')
+        got = fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(fh.writes, 5)
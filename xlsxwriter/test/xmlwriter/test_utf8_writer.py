@@ -0,0 +1,94 @@
+###############################################################################
+# _*_ coding: utf-8
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2016, John McNamara, jmcnamara@cpan.org
+#
+from __future__ import unicode_literals
+import unittest
+from ...compatibility import BytesIO
+from ...xmlwriter import Utf8Writer
+from ...xmlwriter import XMLwriter
+
+
+class TestUtf8Writer(unittest.TestCase):
+    """
+    Test the Utf8Writer batched UTF-8 filehandle.
+
+    """
+
+    def test_write_buffered(self):
+        """Test that writes are buffered until flushed"""
+
+        fh = BytesIO()
+        writer = Utf8Writer(fh)
+
+        writer.write('<a>')
+        writer.write('é€')
+
+        self.assertEqual(fh.getvalue(), b'')
+
+        writer.flush()
+
+        exp = b'<a>\xc3\xa9\xe2\x82\xac'
+        got = fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_buffer_size(self):
+        """Test that writes are flushed when the buffer is full"""
+
+        fh = BytesIO()
+        writer = Utf8Writer(fh, buffer_size=4)
+
+        writer.write('ab')
+        self.assertEqual(fh.getvalue(), b'')
+
+        writer.write('cd')
+        self.assertEqual(fh.getvalue(), b'abcd')
+
+    def test_write_encoded(self):
+        """Test that encoded data is written after the buffered text"""
+
+        fh = BytesIO()
+        writer = Utf8Writer(fh)
+
+        writer.write('<a>')
+        writer.write_encoded(b'<b/>')
+        writer.write('</a>')
+        writer.flush()
+
+        exp = b'<a><b/></a>'
+        got = fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_close(self):
+        """Test close() with and without closing the filehandle"""
+
+        fh = BytesIO()
+        writer = Utf8Writer(fh, close_fh=False)
+        writer.write('<a/>')
+        writer.close()
+
+        self.assertEqual(fh.getvalue(), b'<a/>')
+
+        writer = Utf8Writer(fh)
+        writer.close()
+
+        self.assertTrue(fh.closed)
+
+    def test_set_xml_writer_bytesio(self):
+        """Test _set_xml_writer() with an in-memory BytesIO"""
+
+        fh = BytesIO()
+        xmlwriter = XMLwriter()
+        xmlwriter._set_xml_writer(fh)
+        xmlwriter._xml_data_element('t', 'é')
+        xmlwriter._xml_close()
+
+        exp = b'<t>\xc3\xa9</t>'
+        got = fh.getvalue()
+
+        self.assertEqual(got, exp)
@@ -61,6 +61,17 @@ class TestXMLwriter(unittest.TestCase):
 
         self.assertEqual(got, exp)
 
+    def test_xml_start_tag_with_numeric_attributes(self):
+        """Test _xml_start_tag() with numeric and newline attributes"""
+
+        self.writer._xml_start_tag('foo', [('a', 1), ('b', 1.5),
+                                           ('c', 'x\n&&')])
+
+        exp = """<foo a="1" b="1.5" c="x&#xA;&amp;&amp;">"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
     def test_xml_start_tag_unencoded(self):
         """Test _xml_start_tag_unencoded() with attributes"""
 
@@ -6,11 +6,14 @@
 #
 
 # Standard packages.
-import codecs
 import sys
 
 # Standard packages in Python 2/3 compatibility mode.
 from .compatibility import StringIO
+from .compatibility import BytesIO
+
+# Package imports.
+from .xmlwriter import Utf8Writer
 
 
 class Theme(object):
@@ -52,9 +55,15 @@ class Theme(object):
         if isinstance(filename, StringIO):
             self.internal_fh = False
             self.fh = filename
+        elif isinstance(filename, BytesIO):
+            self.internal_fh = True
+            self.fh = Utf8Writer(filename, close_fh=False)
+        elif hasattr(filename, 'write'):
+            self.internal_fh = True
+            self.fh = Utf8Writer(filename)
         else:
             self.internal_fh = True
-            self.fh = codecs.open(filename, 'w', 'utf-8')
+            self.fh = Utf8Writer(open(filename, 'wb'))
 
     ###########################################################################
     #
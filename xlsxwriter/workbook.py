@@ -10,9 +10,11 @@ import sys
 import re
 import os
 import operator
+from collections import defaultdict
 from warnings import warn
 from datetime import datetime
 from zipfile import ZipFile, ZIP_DEFLATED
+from multiprocessing.pool import ThreadPool
 from struct import unpack
 
 from .compatibility import int_types, num_types, str_types, force_unicode
@@ -22,6 +24,8 @@ from . import xmlwriter
 from .worksheet import Worksheet
 from .chartsheet import Chartsheet
 from .sharedstrings import SharedStringTable
+from .sharedstrings import DiskSharedStringTable
+from .sharedstrings import ArenaSharedStringTable
 from .format import Format
 from .packager import Packager
 from .utility import xl_cell_to_rowcol
@@ -35,6 +39,9 @@ from .chart_radar import ChartRadar
 from .chart_scatter import ChartScatter
 from .chart_stock import ChartStock
 
+# ZipFile.open() can write to new Zip members from Python 3.6.
+zip_member_writes = sys.version_info >= (3, 6)
+
 
 class Workbook(xmlwriter.XMLwriter):
     """
@@ -67,9 +74,23 @@ class Workbook(xmlwriter.XMLwriter):
         self.nan_inf_to_errors = options.get('nan_inf_to_errors', False)
         self.default_date_format = options.get('default_date_format', None)
         self.optimization = options.get('constant_memory', False)
+        self.compact_cells = options.get('compact_cells', False)
+        self.memory_budget = options.get('memory_budget', 0)
         self.in_memory = options.get('in_memory', False)
+        self.shared_strings = options.get('shared_strings', False)
+        self.adaptive_strings = options.get('adaptive_strings', False)
+        self.compact_strings = options.get('compact_strings', False)
+        self.row_window = options.get('row_window', 1)
         self.excel2003_style = options.get('excel2003_style', False)
         self.remove_timezone = options.get('remove_timezone', False)
+        self.finish_in_background = options.get('finish_in_background', False)
+        self.workers = options.get('workers', 0)
+        self.compression_threads = options.get('compression_threads', 0)
+        self.compression_level = options.get('compression_level', None)
+        self.worksheet_compression_level = \
+            options.get('worksheet_compression_level', self.compression_level)
+        self.media_compression_level = \
+            options.get('media_compression_level', self.compression_level)
         self.default_format_properties = \
             options.get('default_format_properties', {})
 
@@ -108,6 +129,7 @@ class Workbook(xmlwriter.XMLwriter):
         self.window_height = 9660
         self.tab_ratio = 500
         self.str_table = SharedStringTable()
+        self.chart_ranges = defaultdict(dict)
         self.vba_project = None
         self.vba_is_stream = False
         self.vba_codename = None
@@ -125,6 +147,28 @@ class Workbook(xmlwriter.XMLwriter):
         if self.in_memory:
             self.optimization = False
 
+        # In 'constant_memory' mode the strings are written in-line unless
+        # they are stored in a shared string table on disk.
+        if self.optimization and self.shared_strings:
+            self.str_table = DiskSharedStringTable(self.tmpdir)
+        elif self.compact_strings:
+            # Store the shared strings encoded in a compact arena.
+            self.str_table = ArenaSharedStringTable()
+
+        # A thread to write the data of worksheets that have been finished
+        # with Worksheet.finish() while other worksheets are filled.
+        if self.finish_in_background and not self.optimization:
+            self.finish_pool = ThreadPool(1)
+        else:
+            self.finish_pool = None
+
+        # The memory budget for the worksheet cell data, which is spilled to
+        # disk when it is exceeded. Not used in constant_memory mode.
+        if self.memory_budget and not self.optimization:
+            self.table_budget = MemoryBudget(self.memory_budget)
+        else:
+            self.table_budget = None
+
         # Add the default cell format.
         if self.excel2003_style:
             self.add_format({'xf_index': 0, 'font_family': 0})
@@ -258,6 +302,11 @@ class Workbook(xmlwriter.XMLwriter):
         chart.embedded = True
         chart.date_1904 = self.date_1904
 
+        # Register the chart ranges so that their data can be stored as the
+        # worksheet rows are written in 'constant_memory' mode, or when a
+        # worksheet is finished.
+        chart.range_callback = self._add_chart_range
+
         self.charts.append(chart)
 
         return chart
@@ -567,6 +616,16 @@ class Workbook(xmlwriter.XMLwriter):
         # Assemble worksheets into a workbook.
         packager = Packager()
 
+        # Wait for any worksheets that are being finished in the background.
+        if self.finish_pool:
+            try:
+                for sheet in self.worksheets():
+                    sheet._wait_for_finish()
+            finally:
+                self.finish_pool.close()
+                self.finish_pool.join()
+                self.finish_pool = None
+
         # Add a default worksheet if non have been added.
         if not self.worksheets():
             self.add_worksheet()
@@ -581,7 +640,7 @@ class Workbook(xmlwriter.XMLwriter):
             if sheet.index == self.worksheet_meta.activesheet:
                 sheet.active = 1
 
-        # Convert the SST strings data structure.
+        # Finalize the SST strings data structure.
         self._prepare_sst_string_data()
 
         # Prepare the worksheet VML elements such as comments and buttons.
@@ -593,39 +652,85 @@ class Workbook(xmlwriter.XMLwriter):
         # Prepare the drawings, charts and images.
         self._prepare_drawings()
 
+        # Write the remaining rows of any worksheets with chart ranges in
+        # constant_memory mode so that the chart data for them is stored.
+        for sheet in self.worksheets():
+            if sheet.optimization and sheet.chart_ranges:
+                sheet.finish()
+
         # Add cached data to charts.
         self._add_chart_data()
 
         # Prepare the worksheet tables.
         self._prepare_tables()
 
-        # Package the workbook.
+        # Package the workbook. Where ZipFile supports writing to members the
+        # XML files are streamed directly into the Zip file. Otherwise they
+        # are written to tempfiles or in-memory streams and added below.
         packager._add_workbook(self)
         packager._set_tmpdir(self.tmpdir)
         packager._set_in_memory(self.in_memory)
-        xml_files = packager._create_package()
-
-        # Free up the Packager object.
-        packager = None
+        packager._set_workers(self.workers)
+        packager._set_compression_threads(self.compression_threads)
+        packager._set_compression_levels(self.compression_level,
+                                         self.worksheet_compression_level,
+                                         self.media_compression_level)
 
         xlsx_file = ZipFile(self.filename, "w", compression=ZIP_DEFLATED,
                             allowZip64=self.allow_zip64)
 
-        # Add XML sub-files to the Zip file with their Excel filename.
-        for os_filename, xml_filename, is_binary in xml_files:
-            if self.in_memory:
-                # The files are in-memory StringIOs.
-                if is_binary:
+        if zip_member_writes:
+            packager._set_zip_file(xlsx_file, self.allow_zip64)
+
+        # If packaging fails the Zip file and any open member or tempfiles
+        # are closed and the partially written xlsx file is removed.
+        complete = False
+
+        try:
+            xml_files = packager._create_package()
+
+            # Add XML sub-files to the Zip file with their Excel filename.
+            for os_filename, xml_filename, is_binary in xml_files:
+                packager._set_zip_compression(xlsx_file, xml_filename)
+
+                if self.in_memory:
+                    # The files are in-memory BytesIOs of UTF-8 encoded XML
+                    # or binary data. Close each one once it is stored.
                     xlsx_file.writestr(xml_filename, os_filename.getvalue())
+                    os_filename.close()
                 else:
-                    xlsx_file.writestr(xml_filename,
-                                       os_filename.getvalue().encode('utf-8'))
-            else:
-                # The files are tempfiles.
-                xlsx_file.write(os_filename, xml_filename)
-                os.remove(os_filename)
+                    # The files are tempfiles.
+                    xlsx_file.write(os_filename, xml_filename)
+                    os.remove(os_filename)
 
-        xlsx_file.close()
+            xlsx_file.close()
+            complete = True
+        finally:
+            if not complete:
+                packager._close_on_error()
+                self._close_partial_file(xlsx_file)
+
+        # Free up the Packager object.
+        packager = None
+
+    def _close_partial_file(self, xlsx_file):
+        # Close the Zip file after an error and remove the partial file if
+        # the output is a filename. Errors from the incomplete Zip file are
+        # ignored so that the original error is raised.
+        try:
+            xlsx_file.close()
+        except Exception:
+            pass
+
+        if isinstance(self.filename, str_types):
+            try:
+                # Close the file if ZipFile.close() failed before closing it.
+                if xlsx_file.fp:
+                    xlsx_file.fp.close()
+
+                os.remove(self.filename)
+            except OSError:
+                pass
 
     def _add_sheet(self, name, is_chartsheet):
         # Utility for shared code in add_worksheet() and add_chartsheet().
@@ -638,8 +743,14 @@ class Workbook(xmlwriter.XMLwriter):
             'name': name,
             'index': sheet_index,
             'str_table': self.str_table,
+            'chart_ranges': self.chart_ranges[name],
             'worksheet_meta': self.worksheet_meta,
             'optimization': self.optimization,
+            'row_window': self.row_window,
+            'compact_cells': self.compact_cells,
+            'memory_budget': self.table_budget,
+            'shared_strings': self.shared_strings,
+            'adaptive_strings': self.adaptive_strings,
             'tmpdir': self.tmpdir,
             'date_1904': self.date_1904,
             'strings_to_numbers': self.strings_to_numbers,
@@ -650,6 +761,7 @@ class Workbook(xmlwriter.XMLwriter):
             'default_url_format': self.default_url_format,
             'excel2003_style': self.excel2003_style,
             'remove_timezone': self.remove_timezone,
+            'finish_pool': self.finish_pool,
         }
 
         if is_chartsheet:
@@ -1429,6 +1541,38 @@ class Workbook(xmlwriter.XMLwriter):
                 # Store range data locally to avoid lookup if seen again.
                 seen_ranges[c_range] = data
 
+    def _add_chart_range(self, c_range):
+        # Register a chart range with its worksheet so that the data in the
+        # range can be stored as the rows are written in constant_memory mode
+        # or before the cell data is freed by Worksheet.finish().
+        (sheetname, cells) = self._get_chart_range(c_range)
+
+        # Skip ranges that can't be parsed and non-contiguous ranges.
+        if sheetname is None or sheetname.startswith('('):
+            return
+
+        cells = tuple(cells)
+        chart_ranges = self.chart_ranges[sheetname]
+
+        if cells in chart_ranges:
+            return
+
+        # If rows of the range have already been written the data can't be
+        # stored so the range is marked as incomplete, with False, and the
+        # chart doesn't get cached data for it instead of partial data.
+        worksheet = self.get_worksheet_by_name(sheetname)
+
+        if (worksheet and worksheet.optimization
+                and cells[0] < worksheet.previous_row):
+            chart_ranges[cells] = False
+
+            if worksheet.finished:
+                warn("Chart data for range '%s' isn't cached since the "
+                     "worksheet data has been finished"
+                     % force_unicode(c_range))
+        else:
+            chart_ranges[cells] = None
+
     def _get_chart_range(self, c_range):
         # Convert a range formula such as Sheet1!$B$1:$B$5 into a sheet name
         # and cell range such as ( 'Sheet1', 0, 1, 4, 1 ).
@@ -1466,7 +1610,8 @@ class Workbook(xmlwriter.XMLwriter):
         return sheetname, [row_start, col_start, row_end, col_end]
 
     def _prepare_sst_string_data(self):
-        # Convert the SST string data from a dict to a list.
+        # Free the SST string lookup dict. The string list is already in
+        # index order.
         self.str_table._sort_string_data()
 
     ###########################################################################
@@ -1634,3 +1779,48 @@ class WorksheetMeta(object):
     def __init__(self):
         self.activesheet = 0
         self.firstsheet = 0
+
+
+class MemoryBudget(object):
+    """
+    A class to track the approximate memory used by the cell data of all of
+    the worksheets against the 'memory_budget' Workbook option. When the
+    budget is exceeded the cell data of the worksheet using the most memory
+    is spilled to disk, once it is at least min_spill_size bytes, so that a
+    very small budget doesn't spill a few rows at a time.
+
+    """
+
+    def __init__(self, budget, min_spill_size=1048576):
+        self.budget = budget
+        self.min_spill_size = min_spill_size
+        self.used = 0
+        self.worksheets = []
+
+    def _add_worksheet(self, worksheet):
+        # Add a worksheet to the tracked worksheets.
+        self.worksheets.append(worksheet)
+
+    def _add(self, size, worksheet, row):
+        # Add the size of cell data stored in a worksheet row and spill the
+        # largest worksheet to disk if the budget is exceeded.
+        self.used += size
+
+        if self.used <= self.budget:
+            return
+
+        largest = max(self.worksheets, key=lambda sheet: sheet.table_memory)
+
+        if largest.table_memory < self.min_spill_size:
+            return
+
+        # Keep the current row of the worksheet being written in memory.
+        if largest is worksheet:
+            largest._spill_table(row)
+        else:
+            largest._spill_table()
+
+    def _release(self, worksheet):
+        # Remove the cell data memory of a worksheet that has been spilled.
+        self.used -= worksheet.table_memory
+        worksheet.table_memory = 0
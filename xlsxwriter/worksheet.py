@@ -7,9 +7,18 @@
 
 # Standard packages.
 import re
+import copy
 import tempfile
-import codecs
+import datetime
 import os
+import zlib
+import heapq
+import pickle
+
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from operator import itemgetter
 
 from warnings import warn
 
@@ -18,7 +27,9 @@ from .compatibility import StringIO
 from .compatibility import defaultdict
 from .compatibility import namedtuple
 from .compatibility import force_unicode
-from .compatibility import num_types, str_types
+from .compatibility import uint64_array
+from .compatibility import array_frombytes
+from .compatibility import num_types, str_types, text_type
 
 # Package imports.
 from . import xmlwriter
@@ -26,16 +37,21 @@ from .format import Format
 from .drawing import Drawing
 from .shape import Shape
 from .xmlwriter import XMLwriter
+from .xmlwriter import Utf8Writer
 from .utility import xl_rowcol_to_cell
 from .utility import xl_rowcol_to_cell_fast
 from .utility import xl_cell_to_rowcol
 from .utility import xl_col_to_name
+from .utility import COL_NAMES
 from .utility import xl_range
 from .utility import xl_color
 from .utility import get_sparkline_style
 from .utility import supported_datetime
 from .utility import datetime_to_excel_datetime
 from .utility import quote_sheetname
+from .sharedstrings import escape_needed
+from .sharedstrings import edge_whitespace
+from .sharedstrings import _escape_control_chars
 
 
 ###############################################################################
@@ -128,6 +144,17 @@ def convert_column_args(method):
 # Named tuples used for cell types.
 #
 ###############################################################################
+
+# Type tags for the cell types. Each cell namedtuple carries its tag in a
+# cell_type class attribute which is used to dispatch to the cell writers.
+CELL_NUMBER = 0
+CELL_STRING = 1
+CELL_INLINE_STRING = 2
+CELL_BLANK = 3
+CELL_BOOLEAN = 4
+CELL_FORMULA = 5
+CELL_ARRAY_FORMULA = 6
+
 cell_string_tuple = namedtuple('String', 'string, format')
 cell_number_tuple = namedtuple('Number', 'number, format')
 cell_blank_tuple = namedtuple('Blank', 'format')
@@ -136,6 +163,511 @@ cell_formula_tuple = namedtuple('Formula', 'formula, format, value')
 cell_arformula_tuple = namedtuple('ArrayFormula',
                                   'formula, format, value, range')
 
+cell_string_tuple.cell_type = CELL_STRING
+cell_number_tuple.cell_type = CELL_NUMBER
+cell_blank_tuple.cell_type = CELL_BLANK
+cell_boolean_tuple.cell_type = CELL_BOOLEAN
+cell_formula_tuple.cell_type = CELL_FORMULA
+cell_arformula_tuple.cell_type = CELL_ARRAY_FORMULA
+
+# The cell namedtuples for each type tag, used to restore spilled cells.
+cell_tuples = {
+    CELL_NUMBER: cell_number_tuple,
+    CELL_STRING: cell_string_tuple,
+    CELL_BLANK: cell_blank_tuple,
+    CELL_BOOLEAN: cell_boolean_tuple,
+    CELL_FORMULA: cell_formula_tuple,
+    CELL_ARRAY_FORMULA: cell_arformula_tuple,
+}
+
+# The cell types whose data is stored in the CompactRow object list.
+object_cell_types = (CELL_INLINE_STRING, CELL_FORMULA, CELL_ARRAY_FORMULA)
+
+# The approximate memory, in bytes, used by a cell in a row dict and in a
+# CompactRow. These are used to enforce the 'memory_budget' option.
+cell_dict_size = 120
+cell_compact_size = 24
+
+# Templates for the <c> elements of the most common cell types. The
+# arguments are the column name, row number, style attribute and value.
+cell_number_xml = '<c r="%s%s"%s><v>%.16g</v></c>'
+cell_string_xml = '<c r="%s%s"%s t="s"><v>%d</v></c>'
+cell_boolean_xml = '<c r="%s%s"%s t="b"><v>%s</v></c>'
+cell_blank_xml = '<c r="%s%s"%s/>'
+
+# Formula values that are written as Excel errors.
+error_codes = frozenset(['#DIV/0!', '#N/A', '#NAME?', '#NULL!',
+                         '#NUM!', '#REF!', '#VALUE!'])
+
+# Strings that are written as urls by write() with strings_to_urls.
+url_string = re.compile(r'(ftp|http)s?://|mailto:|(in|ex)ternal:')
+
+# The cell types, and their equivalent Python types, that can be used with
+# the types parameter of write_row() and write_column().
+schema_types = {
+    'number': 'number',
+    'string': 'string',
+    'boolean': 'boolean',
+    'datetime': 'datetime',
+    'formula': 'formula',
+    'url': 'url',
+    'blank': 'blank',
+    float: 'number',
+    int: 'number',
+    str: 'string',
+    bool: 'boolean',
+    datetime.datetime: 'datetime',
+    datetime.date: 'datetime',
+    datetime.time: 'datetime',
+    datetime.timedelta: 'datetime',
+}
+
+
+class RichString(text_type):
+    """
+    A text string subclass for the XML of rich strings that are written
+    in-line, so that they can be written without escaping. It is a unicode
+    subclass in Python 2 so that it can hold non-ASCII text.
+
+    """
+
+    __slots__ = ()
+
+
+class ColumnStrings(object):
+    """
+    The policy for storing the strings of a worksheet column in the shared
+    string table or in-line. The storage is 'shared', 'inline' or 'auto'.
+
+    In 'auto' mode the hashes of the first strings written to the column are
+    collected as a small sketch of its cardinality. If nearly all of them
+    are distinct the column is assumed to hold unique values, such as ids or
+    free text, and strings that aren't already in the SST are written
+    in-line. Otherwise the column keeps using the SST.
+
+    """
+
+    __slots__ = ('storage', 'count', 'hashes', 'inline')
+
+    # The number of strings sampled and the fraction of distinct strings
+    # at which a column is treated as unique values.
+    sample_size = 1000
+    unique_ratio = 0.9
+
+    def __init__(self, storage='auto'):
+        self.storage = storage
+        self.count = 0
+        self.hashes = set()
+        self.inline = storage == 'inline'
+
+    def _add_strings(self, num_strings, num_unique):
+        # Decide the storage for a column from the number of strings, and of
+        # distinct strings, written to it in bulk.
+        if self.storage == 'auto' and self.hashes is not None:
+            self.inline = num_unique > num_strings * self.unique_ratio
+            self.hashes = None
+
+    def _is_inline(self, string, str_table):
+        # Return True if a string should be written in-line.
+        if self.hashes is not None and self.storage == 'auto':
+            hashes = self.hashes
+            hashes.add(hash(string))
+            self.count += 1
+
+            if self.count >= self.sample_size:
+                self.inline = len(hashes) > self.count * self.unique_ratio
+                self.hashes = None
+
+            return False
+
+        if not self.inline:
+            return False
+
+        # Repeated strings that are already in the SST still use it.
+        return (self.storage == 'inline'
+                or not str_table._has_string(string))
+
+
+class RowBuffer(object):
+    """
+    A filehandle substitute that collects the XML of a worksheet row so that
+    the row can be written to the real filehandle in a single write.
+
+    """
+
+    __slots__ = ('parts', 'write')
+
+    def __init__(self):
+        self.parts = []
+        self.write = self.parts.append
+
+    def getvalue(self):
+        return ''.join(self.parts)
+
+
+class CompressedSpool(object):
+    """
+    A binary filehandle substitute that stores the data written to it
+    deflate compressed in memory. It is used to hold the sheet data of a
+    worksheet that has been finished until the workbook is closed.
+
+    """
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(1)
+        self.chunks = []
+
+    def write(self, data):
+        chunk = self.compressor.compress(data)
+        if chunk:
+            self.chunks.append(chunk)
+
+    def close(self):
+        if self.compressor:
+            self.chunks.append(self.compressor.flush())
+            self.compressor = None
+
+    def read_chunks(self):
+        # Return the uncompressed data in chunks.
+        decompressor = zlib.decompressobj()
+
+        for chunk in self.chunks:
+            yield decompressor.decompress(chunk)
+
+        yield decompressor.flush()
+
+
+class SpillSegment(object):
+    """
+    A set of worksheet rows that have been moved out of memory to keep
+    within the 'memory_budget' Workbook option. The segments of a worksheet
+    are appended to a single tempfile. Each row is stored as a pickled list
+    of plain tuples, in row order, with the cell formats stored as ids into
+    a format list that is shared by the segments of a worksheet. The row
+    numbers and file offsets are kept in arrays to find the rows.
+
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.rows = uint64_array()
+        self.offsets = uint64_array()
+
+    def _write_row(self, row, cells, formats, format_ids):
+        # Store the cells of a row at the end of the file. Rows must be
+        # written in row order.
+        records = []
+
+        for col, cell in cells.items():
+            format_id = format_ids.get(cell.format)
+
+            if format_id is None:
+                format_id = len(formats)
+                format_ids[cell.format] = format_id
+                formats.append(cell.format)
+
+            records.append((col, cell.cell_type,
+                            tuple(cell._replace(format=format_id))))
+
+        self.fh.seek(0, os.SEEK_END)
+        self.rows.append(row)
+        self.offsets.append(self.fh.tell())
+        pickle.dump(records, self.fh, pickle.HIGHEST_PROTOCOL)
+
+    def _read_row(self, row, formats):
+        # Return the cells of a row as a dict, or None if it isn't stored.
+        index = bisect_left(self.rows, row)
+
+        if index == len(self.rows) or self.rows[index] != row:
+            return None
+
+        return self._read_cells(self.offsets[index], formats)
+
+    def _read_cells(self, offset, formats):
+        # Return the cells of the row stored at a file offset as a dict.
+        self.fh.seek(offset)
+        cells = {}
+
+        for col, cell_type, values in pickle.load(self.fh):
+            cell = cell_tuples[cell_type]._make(values)
+            cells[col] = cell._replace(format=formats[cell.format])
+
+        return cells
+
+    def _get_entries(self, index):
+        # Return an iterator over (row, segment index, offset) tuples for
+        # the rows of the segment, so that segments can be merged in row
+        # order with the segment order kept for rows in several segments.
+        offsets = self.offsets
+
+        for i, row in enumerate(self.rows):
+            yield row, index, offsets[i]
+
+
+###############################################################################
+#
+# Compact, array based, storage for the cell data.
+#
+###############################################################################
+
+
+class CompactTable(dict):
+    """
+    A replacement for the default worksheet cell table that stores each row
+    as a CompactRow. Rows are created on demand, like a defaultdict, and the
+    cell formats are shared between rows via a format id lookup.
+
+    """
+
+    def __init__(self):
+        super(CompactTable, self).__init__()
+
+        self.formats = [None]
+        self.format_ids = {}
+
+    def __missing__(self, row):
+        cells = CompactRow(self)
+        self[row] = cells
+        return cells
+
+    def _new_table(self):
+        # Return a new empty table that shares the formats of this one so
+        # that the existing format ids are still valid.
+        table = CompactTable()
+        table.formats = self.formats
+        table.format_ids = self.format_ids
+
+        return table
+
+    def _get_format_id(self, cell_format):
+        # Get the id of a cell format, adding it to the list if it is new.
+        if cell_format is None:
+            return 0
+
+        format_id = self.format_ids.get(cell_format)
+
+        if format_id is None:
+            format_id = len(self.formats)
+            self.format_ids[cell_format] = format_id
+            self.formats.append(cell_format)
+
+        return format_id
+
+
+class CompactRow(object):
+    """
+    A dict-like container for the cells of a single worksheet row. The cell
+    data is stored in two parallel typed arrays, in column order, instead of
+    as a dict of namedtuples:
+
+        meta:   The column, type tag and format id packed into an int as
+                (col << 40) | (type << 32) | format_id. Since the column is
+                in the high bits the array is also sorted by column.
+        values: The number, boolean or SST index of the cell as a double,
+                or an index into the row object list for other data such
+                as formulas and inline strings.
+
+    Cells are converted to and from the standard cell namedtuples on access
+    so that the row can be used in the same way as a default row dict.
+
+    """
+
+    __slots__ = ('table', 'meta', 'values', 'objects')
+
+    def __init__(self, table):
+        self.table = table
+        self.meta = uint64_array()
+        self.values = array('d')
+        self.objects = None
+
+    def __len__(self):
+        return len(self.meta)
+
+    def __bool__(self):
+        return len(self.meta) > 0
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, col):
+        return self._find(col) >= 0
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, col):
+        index = self._find(col)
+
+        if index < 0:
+            raise KeyError(col)
+
+        return self._get_cell(index)
+
+    def __setitem__(self, col, cell):
+        cell_type, value = self._split_cell(cell)
+        format_id = self.table._get_format_id(cell.format)
+
+        if cell_type in object_cell_types:
+            self._set_object_cell(col, cell_type, value, format_id)
+        else:
+            self._set_cell(col, cell_type, value, format_id)
+
+    def keys(self):
+        return [meta >> 40 for meta in self.meta]
+
+    def items(self):
+        # Return the (col, cell) pairs in column order.
+        return [(meta >> 40, self._get_cell(index))
+                for index, meta in enumerate(self.meta)]
+
+    def get(self, col, default=None):
+        index = self._find(col)
+
+        if index < 0:
+            return default
+
+        return self._get_cell(index)
+
+    def _first_col(self):
+        # Return the lowest column in the row.
+        return self.meta[0] >> 40
+
+    def _last_col(self):
+        # Return the highest column in the row.
+        return self.meta[-1] >> 40
+
+    def _find(self, col):
+        # Return the array index of a column or -1 if it isn't stored.
+        meta_array = self.meta
+        index = bisect_left(meta_array, col << 40)
+
+        if index < len(meta_array) and meta_array[index] >> 40 == col:
+            return index
+
+        return -1
+
+    def _get_type(self, index):
+        # Return the type tag of the cell at an array index.
+        return (self.meta[index] >> 32) & 0xFF
+
+    def _set_cell(self, col, cell_type, value, format_id):
+        # Store the type, value and format id of a cell.
+        meta = (col << 40) | (cell_type << 32) | format_id
+        meta_array = self.meta
+
+        if not meta_array or col > meta_array[-1] >> 40:
+            # The common case where cells are written in column order.
+            meta_array.append(meta)
+            self.values.append(value)
+            return
+
+        index = bisect_left(meta_array, col << 40)
+
+        if meta_array[index] >> 40 == col:
+            # Overwrite an existing cell, releasing its object data unless
+            # the slot has been reused by _set_object_cell().
+            if (cell_type not in object_cell_types
+                    and self._get_type(index) in object_cell_types):
+                self.objects[int(self.values[index])] = None
+
+            meta_array[index] = meta
+            self.values[index] = value
+        else:
+            meta_array.insert(index, meta)
+            self.values.insert(index, value)
+
+    def _extend(self, meta_bytes, value_bytes):
+        # Append a block of cells from native uint64 and double buffers.
+        # The cells must be in column order and to the right of any cells
+        # already in the row.
+        array_frombytes(self.meta, meta_bytes)
+        array_frombytes(self.values, value_bytes)
+
+    def _set_object_cell(self, col, cell_type, data, format_id):
+        # Store a cell whose data is kept in the object list. If the cell
+        # overwrites another in-line string or formula cell its object slot
+        # is reused so that rewritten cells don't grow the list.
+        meta_array = self.meta
+
+        if meta_array and col <= meta_array[-1] >> 40:
+            index = self._find(col)
+
+            if index >= 0 and self._get_type(index) in object_cell_types:
+                slot = int(self.values[index])
+                self.objects[slot] = data
+                self._set_cell(col, cell_type, slot, format_id)
+                return
+
+        self._set_cell(col, cell_type, self._add_object(data), format_id)
+
+    def _add_object(self, data):
+        # Store non-numeric cell data and return its index.
+        if self.objects is None:
+            self.objects = []
+
+        self.objects.append(data)
+
+        return len(self.objects) - 1
+
+    def _split_cell(self, cell):
+        # Convert a cell namedtuple into a type tag and a numeric value, or
+        # the data to store in the object list for the object cell types.
+        cell_type = cell.cell_type
+
+        if cell_type == CELL_NUMBER:
+            return CELL_NUMBER, cell.number
+
+        if cell_type == CELL_STRING:
+            if isinstance(cell.string, str_types):
+                return CELL_INLINE_STRING, cell.string
+            else:
+                return CELL_STRING, cell.string
+
+        if cell_type == CELL_BLANK:
+            return CELL_BLANK, 0
+
+        if cell_type == CELL_BOOLEAN:
+            return CELL_BOOLEAN, cell.boolean
+
+        if cell_type == CELL_FORMULA:
+            data = (cell.formula, cell.value)
+            return CELL_FORMULA, data
+
+        if cell_type == CELL_ARRAY_FORMULA:
+            data = (cell.formula, cell.value, cell.range)
+            return CELL_ARRAY_FORMULA, data
+
+        raise TypeError("Unsupported cell type %s" % type(cell))
+
+    def _get_cell(self, index):
+        # Convert the cell data at an array index back to a cell namedtuple.
+        meta = self.meta[index]
+        cell_type = (meta >> 32) & 0xFF
+        cell_format = self.table.formats[meta & 0xFFFFFFFF]
+        value = self.values[index]
+
+        if cell_type == CELL_NUMBER:
+            return cell_number_tuple(value, cell_format)
+
+        if cell_type == CELL_STRING:
+            return cell_string_tuple(int(value), cell_format)
+
+        if cell_type == CELL_INLINE_STRING:
+            return cell_string_tuple(self.objects[int(value)], cell_format)
+
+        if cell_type == CELL_BLANK:
+            return cell_blank_tuple(cell_format)
+
+        if cell_type == CELL_BOOLEAN:
+            return cell_boolean_tuple(int(value), cell_format)
+
+        if cell_type == CELL_FORMULA:
+            formula, formula_value = self.objects[int(value)]
+            return cell_formula_tuple(formula, cell_format, formula_value)
+
+        formula, formula_value, cell_range = self.objects[int(value)]
+        return cell_arformula_tuple(formula, cell_format, formula_value,
+                                    cell_range)
+
 
 ###############################################################################
 #
@@ -165,8 +697,21 @@ class Worksheet(xmlwriter.XMLwriter):
         self.name = None
         self.index = None
         self.str_table = None
+        self.chart_ranges = {}
         self.palette = None
         self.optimization = 0
+        self.row_window = 1
+        self.inline_strings = False
+        self.adaptive_strings = False
+        self.string_columns = None
+        self.compact_cells = False
+        self.compact_rows = None
+        self.memory_budget = None
+        self.table_memory = 0
+        self.spill_segments = []
+        self.spill_fh = None
+        self.spill_formats = [None]
+        self.spill_format_ids = {None: 0}
         self.tmpdir = None
         self.is_chartsheet = False
 
@@ -267,6 +812,7 @@ class Worksheet(xmlwriter.XMLwriter):
         self.table = defaultdict(dict)
         self.merge = []
         self.row_spans = {}
+        self.cell_spans = {}
 
         self.has_vml = False
         self.has_header_vml = False
@@ -345,6 +891,11 @@ class Worksheet(xmlwriter.XMLwriter):
         self.row_data_fh = None
         self.row_data_fh_closed = False
 
+        self.finished = False
+        self.finish_pool = None
+        self.finish_job = None
+        self.sheet_data_spool = None
+
         self.vertical_dpi = 0
         self.horizontal_dpi = 0
 
@@ -397,13 +948,7 @@ class Worksheet(xmlwriter.XMLwriter):
             elif self.strings_to_formulas and token.startswith('='):
                 return self.write_formula(row, col, *args)
 
-            elif self.strings_to_urls and re.match('(ftp|http)s?://', token):
-                return self.write_url(row, col, *args)
-
-            elif self.strings_to_urls and re.match('mailto:', token):
-                return self.write_url(row, col, *args)
-
-            elif self.strings_to_urls and re.match('(in|ex)ternal:', token):
+            elif self.strings_to_urls and url_string.match(token):
                 return self.write_url(row, col, *args)
 
             elif self.strings_to_numbers:
@@ -466,11 +1011,13 @@ class Worksheet(xmlwriter.XMLwriter):
             string = string[:self.xls_strmax]
             str_error = -2
 
-        # Write a shared string or an in-line string in optimization mode.
-        if self.optimization == 0:
-            string_index = self.str_table._get_shared_string_index(string)
-        else:
+        # Write a shared string or an in-line string in optimization mode
+        # or as chosen for the column.
+        if self.inline_strings or (self.string_columns is not None
+                                   and self._is_inline_string(col, string)):
             string_index = string
+        else:
+            string_index = self.str_table._get_shared_string_index(string)
 
         # Write previous row if in in-line string optimization mode.
         if self.optimization and row > self.previous_row:
@@ -478,6 +1025,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_string_tuple(string_index, cell_format)
+        self._update_spans(row, col, col)
 
         return str_error
 
@@ -520,6 +1068,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_number_tuple(number, cell_format)
+        self._update_spans(row, col, col)
 
         return 0
 
@@ -554,6 +1103,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_blank_tuple(cell_format)
+        self._update_spans(row, col, col)
 
         return 0
 
@@ -593,6 +1143,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_formula_tuple(formula, cell_format, value)
+        self._update_spans(row, col, col)
 
         return 0
 
@@ -651,6 +1202,7 @@ class Worksheet(xmlwriter.XMLwriter):
                                                                 cell_format,
                                                                 value,
                                                                 cell_range)
+        self._update_spans(first_row, first_col, first_col)
 
         # Pad out the rest of the area with formatted zeroes.
         if not self.optimization:
@@ -694,6 +1246,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_number_tuple(number, cell_format)
+        self._update_spans(row, col, col)
 
         return 0
 
@@ -728,6 +1281,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_boolean_tuple(value, cell_format)
+        self._update_spans(row, col, col)
 
         return 0
 
@@ -958,10 +1512,11 @@ class Worksheet(xmlwriter.XMLwriter):
             return -2
 
         # Write a shared string or an in-line string in optimization mode.
-        if self.optimization == 0:
-            string_index = self.str_table._get_shared_string_index(string)
+        if not self.inline_strings:
+            string_index = self.str_table._get_shared_string_index(
+                string, rich=True)
         else:
-            string_index = string
+            string_index = RichString(string)
 
         # Write previous row if in in-line string optimization mode.
         if self.optimization and row > self.previous_row:
@@ -969,11 +1524,12 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Store the cell data in the worksheet data table.
         self.table[row][col] = cell_string_tuple(string_index, cell_format)
+        self._update_spans(row, col, col)
 
         return 0
 
     @convert_cell_args
-    def write_row(self, row, col, data, cell_format=None):
+    def write_row(self, row, col, data, cell_format=None, types=None):
         """
         Write a row of data starting from (row, col).
 
@@ -982,11 +1538,21 @@ class Worksheet(xmlwriter.XMLwriter):
             col:    The cell column (zero indexed).
             data:   A list of tokens to be written with write().
             format: An optional cell Format object.
+            types:  An optional cell type, or list of types for each token,
+                    used instead of checking the type of each token.
         Returns:
             0:  Success.
+            -1: Row or column is out of worksheet bounds.
             other: Return value of write() method.
 
         """
+        if types is not None:
+            types = self._get_schema_types(types, len(data))
+            if types is None:
+                return -1
+
+            return self._write_typed_row(row, col, data, cell_format, types)
+
         for token in data:
             error = self.write(row, col, token, cell_format)
             if error:
@@ -996,7 +1562,7 @@ class Worksheet(xmlwriter.XMLwriter):
         return 0
 
     @convert_cell_args
-    def write_column(self, row, col, data, cell_format=None):
+    def write_column(self, row, col, data, cell_format=None, types=None):
         """
         Write a column of data starting from (row, col).
 
@@ -1005,11 +1571,27 @@ class Worksheet(xmlwriter.XMLwriter):
             col:    The cell column (zero indexed).
             data:   A list of tokens to be written with write().
             format: An optional cell Format object.
+            types:  An optional cell type, or list of types for each token,
+                    used instead of checking the type of each token.
         Returns:
             0:  Success.
+            -1: Row or column is out of worksheet bounds.
             other: Return value of write() method.
 
         """
+        if types is not None:
+            types = self._get_schema_types(types, len(data))
+            if types is None:
+                return -1
+
+            for i, token in enumerate(data):
+                error = self._write_typed_row(row + i, col, (token,),
+                                              cell_format, types[i:i + 1])
+                if error:
+                    return error
+
+            return 0
+
         for token in data:
             error = self.write(row, col, token, cell_format)
             if error:
@@ -1018,6 +1600,405 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return 0
 
+    @convert_cell_args
+    def write_rows(self, row, col, data, formats=None):
+        """
+        Write rows of data from an iterable starting from (row, col).
+
+        Args:
+            row:     The first cell row (zero indexed).
+            col:     The first cell column (zero indexed).
+            data:    An iterable of rows. Each row is a sequence of tokens
+                     to be written as with write().
+            formats: An optional list of cell Format objects, one per column.
+        Returns:
+            0:  Success.
+            -1: Row or column is out of worksheet bounds.
+            other: Return value of write() method.
+
+        """
+        if formats is None:
+            formats = []
+
+        num_formats = len(formats)
+        str_table = self.str_table
+        strmax = self.xls_strmax
+
+        strings_to_formulas = self.strings_to_formulas
+        strings_to_urls = self.strings_to_urls
+
+        for row_data in data:
+            row_data = tuple(row_data)
+
+            if not row_data:
+                row += 1
+                continue
+
+            # Check the row bounds once rather than for each cell.
+            last_col = col + len(row_data) - 1
+            if (self._check_dimensions(row, col, True, True)
+                    or self._check_dimensions(row, last_col, True, True)):
+                return -1
+
+            # In optimization mode rows that are already written are ignored.
+            if self.optimization and row < self.previous_row:
+                return -1
+
+            # Write previous row if in in-line string optimization mode.
+            if self.optimization and row > self.previous_row:
+                self._write_single_row(row)
+
+            # Store the common cell types directly in the row. Other types,
+            # and strings that may be converted, are written with write().
+            cells = self.table[row]
+            first_stored = None
+
+            for i, token in enumerate(row_data):
+                if i < num_formats:
+                    cell_format = formats[i]
+                else:
+                    cell_format = None
+
+                token_type = type(token)
+
+                if token_type is float or token_type is int:
+                    if token - token == 0:
+                        cells[col + i] = cell_number_tuple(token, cell_format)
+                        last_stored = col + i
+                        if first_stored is None:
+                            first_stored = last_stored
+                        continue
+
+                elif isinstance(token, str_types):
+                    if (token and len(token) <= strmax
+                            and not self.strings_to_numbers
+                            and not (strings_to_formulas
+                                     and token.startswith('='))
+                            and not (strings_to_urls
+                                     and url_string.match(token))):
+
+                        if not (self.inline_strings
+                                or (self.string_columns is not None
+                                    and self._is_inline_string(col + i,
+                                                               token))):
+                            token = str_table._get_shared_string_index(token)
+
+                        cells[col + i] = cell_string_tuple(token, cell_format)
+                        last_stored = col + i
+                        if first_stored is None:
+                            first_stored = last_stored
+                        continue
+
+                elif token is None and cell_format is None:
+                    continue
+
+                error = self.write(row, col + i, token, cell_format)
+                if error:
+                    return error
+
+            # Store the dimensions of the cells written directly.
+            if first_stored is not None:
+                self._check_dimensions(row, first_stored)
+                self._check_dimensions(row, last_stored)
+                self._update_spans(row, first_stored, last_stored)
+
+            # Write the completed row in optimization mode.
+            if self.optimization:
+                self._write_single_row(row + 1)
+
+            row += 1
+
+        return 0
+
+    @convert_cell_args
+    def write_array(self, row, col, data, cell_format=None):
+        """
+        Write a 1D or 2D numpy array of numbers, booleans or datetimes
+        starting from (row, col). A 1D array is written as a row.
+
+        Args:
+            row:         The cell row (zero indexed).
+            col:         The cell column (zero indexed).
+            data:        A numpy array.
+            cell_format: An optional cell Format object.
+        Returns:
+            0:  Success.
+            -1: Row or column is out of worksheet bounds.
+            other: Return value of write() method for non-numeric arrays.
+
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("write_array() requires the numpy module")
+
+        data = numpy.asarray(data)
+
+        if data.ndim == 1:
+            data = data.reshape(1, -1)
+        elif data.ndim != 2:
+            warn("Only 1D and 2D arrays are supported in write_array()")
+            return -1
+
+        if not data.size:
+            return 0
+
+        num_rows, num_cols = data.shape
+        last_row = row + num_rows - 1
+        last_col = col + num_cols - 1
+
+        # Check the bounds of the array once instead of for every cell.
+        if self._check_dimensions(last_row, last_col, True, True):
+            return -1
+        if self._check_dimensions(row, col):
+            return -1
+        self._check_dimensions(last_row, last_col)
+
+        kind = data.dtype.kind
+        invalid = None
+
+        if kind == 'b':
+            cell_type = CELL_BOOLEAN
+            values = data.astype(numpy.float64)
+
+        elif kind in 'iuf':
+            cell_type = CELL_NUMBER
+            values = data.astype(numpy.float64)
+            invalid = ~numpy.isfinite(values)
+
+            if invalid.any() and not self.nan_inf_to_errors:
+                raise TypeError(
+                    "NAN/INF not supported in write_array() "
+                    "without 'nan_inf_to_errors' Workbook() option")
+
+        elif kind in 'mM':
+            cell_type = CELL_NUMBER
+            values = self._convert_datetime64(data, numpy)
+            invalid = numpy.isnat(data)
+
+            # Add the default date format.
+            if cell_format is None:
+                cell_format = self.default_date_format
+
+        else:
+            # Write strings and other types with the standard write().
+            for row_data in data:
+                error = self.write_row(row, col, row_data.tolist(),
+                                       cell_format)
+                if error:
+                    return error
+                row += 1
+
+            return 0
+
+        if invalid is not None and not invalid.any():
+            invalid = None
+
+        values = numpy.ascontiguousarray(values, dtype=numpy.float64)
+
+        # The column, type and format data is the same for every row so it
+        # is packed into the CompactRow meta format once.
+        format_id = self._get_compact_table()._get_format_id(cell_format)
+        meta = numpy.arange(col, last_col + 1, dtype=numpy.uint64)
+        meta = ((meta << numpy.uint64(40))
+                | numpy.uint64((cell_type << 32) | format_id))
+        meta_bytes = meta.tobytes()
+
+        for i in range(num_rows):
+            row_num = row + i
+
+            # Write previous row if in in-line string optimization mode.
+            if self.optimization and row_num > self.previous_row:
+                self._write_single_row(row_num)
+
+            cells = self._get_compact_row(row_num)
+
+            if invalid is not None and invalid[i].any():
+                # Handle NAN/INF and NaT values on a cell by cell basis.
+                for j in range(num_cols):
+                    if not invalid[i, j]:
+                        cells._set_cell(col + j, cell_type,
+                                        values[i, j], format_id)
+                    elif kind in 'mM':
+                        self.write_blank(row_num, col + j, None, cell_format)
+                    else:
+                        self.write_number(row_num, col + j, values[i, j],
+                                          cell_format)
+
+            elif not cells or cells._last_col() < col:
+                # Append the row data in bulk.
+                cells._extend(meta_bytes, values[i].tobytes())
+
+            else:
+                # Merge the row data with existing cells.
+                for j in range(num_cols):
+                    cells._set_cell(col + j, cell_type, values[i, j],
+                                    format_id)
+
+            if cells:
+                self._update_spans(row_num, cells._first_col(),
+                                   cells._last_col())
+
+        return 0
+
+    @convert_cell_args
+    def write_dataframe(self, row, col, df, index=True, header=True,
+                        formats=None):
+        """
+        Write a pandas DataFrame starting from (row, col).
+
+        Args:
+            row:     The cell row (zero indexed).
+            col:     The cell column (zero indexed).
+            df:      A pandas DataFrame.
+            index:   Write the index as the first column(s). Default True.
+            header:  Write the column names as the first row. Default True.
+            formats: An optional dict of column names to Format objects.
+        Returns:
+            0:  Success.
+            -1: Row or column is out of worksheet bounds.
+
+        """
+        try:
+            import numpy
+            import pandas
+        except ImportError:
+            raise ImportError("write_dataframe() requires the pandas module")
+
+        if formats is None:
+            formats = {}
+
+        # Get the index and data columns as (name, Series) pairs.
+        columns = []
+
+        if index:
+            for level in range(df.index.nlevels):
+                columns.append((df.index.names[level],
+                                pandas.Series(
+                                    df.index.get_level_values(level))))
+
+        for i, name in enumerate(df.columns):
+            columns.append((name, df.iloc[:, i].reset_index(drop=True)))
+
+        num_rows = len(df)
+        num_cols = len(columns)
+        first_row = row
+
+        if header:
+            first_row += 1
+
+        last_row = max(first_row + num_rows - 1, row)
+        last_col = col + num_cols - 1
+
+        if not num_cols:
+            return 0
+
+        # Check the bounds of the data once instead of for every cell.
+        if self._check_dimensions(last_row, last_col, True, True):
+            return -1
+        if self._check_dimensions(row, col):
+            return -1
+        self._check_dimensions(last_row, last_col)
+
+        if header:
+            for j, (name, _) in enumerate(columns):
+                if name is None:
+                    continue
+                if not isinstance(name, str_types):
+                    name = str(name)
+                self.write_string(row, col + j, name)
+
+        if not num_rows:
+            return 0
+
+        # Resolve the writer for each column from its dtype once.
+        writers = []
+        for j, (name, series) in enumerate(columns):
+            writers.append(self._get_dataframe_writer(
+                series, col + j, formats.get(name), numpy, pandas))
+
+        compact_table = self._get_compact_table()
+        bulk_cols = []
+        other_cols = []
+
+        for j, writer in enumerate(writers):
+            if writer[0] == 'bulk':
+                bulk_cols.append(j)
+            else:
+                other_cols.append(j)
+
+        if bulk_cols:
+            # Pack the values and missing data masks of the bulk columns
+            # into 2D arrays that can be added a row at a time.
+            values = numpy.empty((num_rows, len(bulk_cols)))
+            present = numpy.ones((num_rows, len(bulk_cols)), dtype=bool)
+            meta = numpy.empty(len(bulk_cols), dtype=numpy.uint64)
+
+            for k, j in enumerate(bulk_cols):
+                _, cell_type, col_values, col_present, cell_format = writers[j]
+                format_id = compact_table._get_format_id(cell_format)
+                values[:, k] = col_values
+                meta[k] = ((col + j) << 40) | (cell_type << 32) | format_id
+
+                if col_present is not None:
+                    present[:, k] = col_present
+
+            all_present = present.all()
+
+        for i in range(num_rows):
+            row_num = first_row + i
+
+            # Write previous row if in in-line string optimization mode.
+            if self.optimization and row_num > self.previous_row:
+                self._write_single_row(row_num)
+
+            cells = self._get_compact_row(row_num)
+
+            if bulk_cols:
+                if all_present:
+                    row_meta = meta
+                    row_values = values[i]
+                else:
+                    mask = present[i]
+                    row_meta = meta[mask]
+                    row_values = values[i][mask]
+
+                if not cells or cells._last_col() < col:
+                    # Append the row data in bulk.
+                    cells._extend(row_meta.tobytes(), row_values.tobytes())
+                else:
+                    # Merge the row data with existing cells.
+                    for cell_meta, value in zip(row_meta.tolist(),
+                                                row_values.tolist()):
+                        cells._set_cell(cell_meta >> 40,
+                                        (cell_meta >> 32) & 0xFF,
+                                        value,
+                                        cell_meta & 0xFFFFFFFF)
+
+            for j in other_cols:
+                writer = writers[j]
+
+                if writer[0] == 'inline':
+                    # In-line strings in constant_memory mode.
+                    _, codes, strings, cell_format = writer
+                    code = codes[i]
+                    if code >= 0:
+                        format_id = compact_table._get_format_id(cell_format)
+                        cells._set_object_cell(col + j, CELL_INLINE_STRING,
+                                               strings[code], format_id)
+                else:
+                    # Mixed types are written with the standard write().
+                    _, tokens, cell_format = writer
+                    token = tokens[i]
+                    if not self._is_dataframe_na(token, pandas):
+                        self.write(row_num, col + j, token, cell_format)
+
+            if cells:
+                self._update_spans(row_num, cells._first_col(),
+                                   cells._last_col())
+
+        return 0
+
     @convert_cell_args
     def insert_image(self, row, col, filename, options={}):
         """
@@ -1148,6 +2129,7 @@ class Worksheet(xmlwriter.XMLwriter):
         # Process the properties of the cell comment.
         self.comments[row][col] = \
             self._comment_params(row, col, comment, options)
+        self._update_spans(row, col, col)
 
     def show_comments(self):
         """
@@ -1277,9 +2259,17 @@ class Worksheet(xmlwriter.XMLwriter):
 
         Returns:
             0:  Success.
-            -1: Column number is out of worksheet bounds.
+            -1: Column number is out of worksheet bounds or the worksheet
+                is finished and a format is set.
 
         """
+        # The cells of a finished worksheet have already been written so
+        # column formats can't be applied to them.
+        if self.finished and cell_format:
+            warn("Column format ignored in set_column() since the "
+                 "worksheet data has been finished")
+            return -1
+
         # Ensure 2nd col is larger than first.
         if firstcol > lastcol:
             (firstcol, lastcol) = (lastcol, firstcol)
@@ -1334,6 +2324,46 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return 0
 
+    @convert_column_args
+    def set_column_strings(self, firstcol, lastcol, storage):
+        """
+        Set how the strings of a single column or a range of columns are
+        stored: in the shared string table or in-line in the worksheet.
+
+        Args:
+            firstcol: First column (zero-indexed).
+            lastcol:  Last column (zero-indexed). Can be same as firstcol.
+            storage:  One of 'shared', 'inline' or 'auto'.
+
+        Returns:
+            0:  Success.
+            -1: Column number is out of worksheet bounds.
+            -2: Unknown storage type.
+
+        """
+        if storage not in ('shared', 'inline', 'auto'):
+            warn("Unknown string storage '%s' in set_column_strings()"
+                 % storage)
+            return -2
+
+        # Ensure 2nd col is larger than first.
+        if firstcol > lastcol:
+            (firstcol, lastcol) = (lastcol, firstcol)
+
+        # Check that each column is valid without storing the dimensions.
+        if self._check_dimensions(0, lastcol, True, True):
+            return -1
+        if self._check_dimensions(0, firstcol, True, True):
+            return -1
+
+        if self.string_columns is None:
+            self.string_columns = {}
+
+        for col in range(firstcol, lastcol + 1):
+            self.string_columns[col] = ColumnStrings(storage)
+
+        return 0
+
     def set_row(self, row, height=None, cell_format=None, options={}):
         """
         Set the width, and other properties of a row.
@@ -1346,9 +2376,16 @@ class Worksheet(xmlwriter.XMLwriter):
 
         Returns:
             0:  Success.
-            -1: Row number is out of worksheet bounds.
+            -1: Row number is out of worksheet bounds or the worksheet is
+                finished.
 
         """
+        # The rows of a finished worksheet have already been written.
+        if self.finished:
+            warn("set_row() ignored since the worksheet data has been "
+                 "finished")
+            return -1
+
         # Use minimum col in _check_dimensions().
         if self.dim_colmin is not None:
             min_col = self.dim_colmin
@@ -2864,12 +3901,81 @@ class Worksheet(xmlwriter.XMLwriter):
             0:  Success.
             -1: Row or column is out of worksheet bounds.
 
-        """
-        button = self._button_params(row, col, options)
+        """
+        button = self._button_params(row, col, options)
+
+        self.buttons_list.append(button)
+
+        self.has_vml = 1
+
+    def finish(self):
+        """
+        Finish writing data to the worksheet and store the worksheet cell
+        data in compressed form so that the memory it uses is freed before
+        the workbook is closed.
+
+        Args:
+            None.
+
+        Returns:
+            Nothing.
+
+        """
+        if self.finished:
+            return
+
+        self.finished = True
 
-        self.buttons_list.append(button)
+        if self.optimization:
+            # Write the last row of data to the tempfile.
+            self._write_single_row(self.xls_rowmax)
+            return
 
-        self.has_vml = 1
+        # Store the data of the chart ranges that have been added so far
+        # for the chart cached data, before the cell data is freed.
+        for cell_range, range_data in self.chart_ranges.items():
+            if range_data is None:
+                row_end = cell_range[2]
+                data = self._get_range_data(*cell_range)
+                self.chart_ranges[cell_range] = [row_end + 1, data]
+
+        # The sheet data XML is written into a compressed spool from a
+        # shallow copy of the worksheet, which keeps the cell data, so that
+        # it can be written in a background thread if required.
+        sheet_data = copy.copy(self)
+
+        # Keep only the hyperlink cells, which are needed to write the
+        # hyperlinks, and free the rest of the cell data.
+        if self.compact_cells:
+            table = CompactTable()
+        else:
+            table = defaultdict(dict)
+
+        for row_num in self.hyperlinks:
+            cells = self.table.get(row_num)
+            for col_num in self.hyperlinks[row_num]:
+                if cells and col_num in cells:
+                    table[row_num][col_num] = cells[col_num]
+
+        self.table = table
+        self.compact_rows = None
+
+        # The spilled rows, if any, are now only used by the copy.
+        if self.memory_budget:
+            self.spill_segments = []
+            self.spill_fh = None
+            self.memory_budget._release(self)
+
+        # Further data is ignored in the same way as for rows that have
+        # already been written in constant_memory mode.
+        self.optimization = 1
+        self.previous_row = self.xls_rowmax
+
+        if self.finish_pool:
+            self.finish_job = self.finish_pool.apply_async(
+                self._spool_sheet_data, (sheet_data,))
+        else:
+            self._spool_sheet_data(sheet_data)
 
     ###########################################################################
     #
@@ -3362,9 +4468,21 @@ class Worksheet(xmlwriter.XMLwriter):
         self.name = init_data['name']
         self.index = init_data['index']
         self.str_table = init_data['str_table']
+        self.chart_ranges = init_data['chart_ranges']
         self.worksheet_meta = init_data['worksheet_meta']
         self.optimization = init_data['optimization']
+        self.row_window = init_data['row_window']
+        self.inline_strings = (bool(self.optimization)
+                               and not init_data['shared_strings'])
+        self.adaptive_strings = init_data['adaptive_strings']
+
+        # Track the strings of each column to choose their storage.
+        if self.adaptive_strings:
+            self.string_columns = {}
+        self.compact_cells = init_data['compact_cells']
+        self.memory_budget = init_data['memory_budget']
         self.tmpdir = init_data['tmpdir']
+        self.finish_pool = init_data['finish_pool']
         self.date_1904 = init_data['date_1904']
         self.strings_to_numbers = init_data['strings_to_numbers']
         self.strings_to_formulas = init_data['strings_to_formulas']
@@ -3387,14 +4505,22 @@ class Worksheet(xmlwriter.XMLwriter):
             self.margin_footer = 0.5
             self.header_footer_aligns = False
 
+        # Use the array based cell storage to reduce memory usage.
+        if self.compact_cells:
+            self.table = CompactTable()
+
+        # Track the memory used by the cell data against the workbook budget.
+        if self.memory_budget and not self.optimization:
+            self.memory_budget._add_worksheet(self)
+
         # Open a temp filehandle to store row data in optimization mode.
         if self.optimization == 1:
-            # This is sub-optimal but we need to create a temp file
-            # with utf8 encoding in Python < 3.
+            # The row data is stored UTF-8 encoded so that it can be copied
+            # into the worksheet XML file without decoding.
             (fd, filename) = tempfile.mkstemp(dir=self.tmpdir)
             os.close(fd)
             self.row_data_filename = filename
-            self.row_data_fh = codecs.open(filename, 'w+', 'utf-8')
+            self.row_data_fh = Utf8Writer(open(filename, 'w+b'))
 
             # Set as the worksheet filehandle until the file is assembled.
             self.fh = self.row_data_fh
@@ -3424,7 +4550,9 @@ class Worksheet(xmlwriter.XMLwriter):
         self._write_cols()
 
         # Write the worksheet data such as rows columns and cells.
-        if self.optimization == 0:
+        if self.sheet_data_spool:
+            self._write_spooled_sheet_data()
+        elif self.optimization == 0:
             self._write_sheet_data()
         else:
             self._write_optimized_sheet_data()
@@ -3523,12 +4651,438 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return 0
 
+    def _update_spans(self, row, first_col, last_col):
+        # Store the min and max columns of the cell data in each block of
+        # 16 rows as the cells are written. These are used for the <row>
+        # spans attribute which isn't written in optimization mode.
+        if self.optimization:
+            return
+
+        span_index = row >> 4
+        span = self.cell_spans.get(span_index)
+
+        if span is None:
+            self.cell_spans[span_index] = [first_col, last_col]
+        else:
+            if first_col < span[0]:
+                span[0] = first_col
+            if last_col > span[1]:
+                span[1] = last_col
+
+        if self.memory_budget:
+            if self.compact_cells:
+                size = (last_col - first_col + 1) * cell_compact_size
+            else:
+                size = (last_col - first_col + 1) * cell_dict_size
+
+            self.table_memory += size
+            self.memory_budget._add(size, self, row)
+
+    def _spill_table(self, current_row=None):
+        # Move the rows of the cell table to a new on-disk segment to free
+        # memory in 'memory_budget' mode. The current row, which the caller
+        # may still be adding cells to, and rows with hyperlinks, which are
+        # needed by _write_hyperlinks(), are kept in memory. The segments
+        # are merged back in row order when the rows are written. The new
+        # table shares the CompactRow formats of the old one since the bulk
+        # writers may still be adding cells with existing format ids.
+        if self.compact_cells:
+            table = self.table._new_table()
+        else:
+            table = defaultdict(dict)
+
+        # The segments of the worksheet share a single tempfile.
+        if self.spill_fh is None:
+            self.spill_fh = tempfile.TemporaryFile(dir=self.tmpdir)
+
+        segment = SpillSegment(self.spill_fh)
+
+        for row_num in sorted(self.table):
+            cells = self.table[row_num]
+
+            if row_num == current_row or row_num in self.hyperlinks:
+                table[row_num] = cells
+            elif cells:
+                segment._write_row(row_num, cells, self.spill_formats,
+                                   self.spill_format_ids)
+
+        if segment.rows:
+            self.spill_segments.append(segment)
+
+        self.table = table
+        self.memory_budget._release(self)
+
+    def _get_row_cells(self, row_num):
+        # Get the cells of a row, or None if there are none. Any cells of
+        # the row that have been spilled to disk are merged, in the order
+        # they were stored, with the cells in memory taking precedence.
+        cells = self.table.get(row_num)
+
+        if not self.spill_segments:
+            return cells
+
+        merged = None
+
+        for segment in self.spill_segments:
+            spilled_cells = segment._read_row(row_num, self.spill_formats)
+
+            if spilled_cells is None:
+                continue
+
+            if merged is None:
+                merged = spilled_cells
+            else:
+                merged.update(spilled_cells)
+
+        if merged is None:
+            return cells
+
+        if cells:
+            merged.update(cells.items())
+
+        return merged
+
     def _convert_date_time(self, dt_obj):
         # Convert a datetime object to an Excel serial date and time.
         return datetime_to_excel_datetime(dt_obj,
                                           self.date_1904,
                                           self.remove_timezone)
 
+    def _convert_datetime64(self, data, numpy):
+        # Convert a numpy datetime64 or timedelta64 array to Excel serial
+        # dates and times. This is a vectorized version of the calculation
+        # in datetime_to_excel_datetime() and gives the same results.
+        one_day = numpy.timedelta64(1, 'D')
+
+        if data.dtype.kind == 'M':
+            if self.date_1904:
+                epoch = numpy.datetime64('1904-01-01')
+            else:
+                epoch = numpy.datetime64('1899-12-31')
+
+            delta = data - epoch
+        else:
+            delta = data
+
+        # Split the delta into days, seconds and microseconds like a Python
+        # timedelta so that the floating point calculation is the same.
+        with numpy.errstate(invalid='ignore'):
+            days = delta // one_day
+            remainder = delta - days * one_day
+            seconds = remainder // numpy.timedelta64(1, 's')
+            remainder = remainder - seconds * numpy.timedelta64(1, 's')
+            microseconds = remainder // numpy.timedelta64(1, 'us')
+
+        excel_time = (days.astype(numpy.float64)
+                      + (seconds.astype(numpy.float64)
+                         + microseconds.astype(numpy.float64) / 1E6)
+                      / (60 * 60 * 24))
+
+        # Special case for datetimes where the default date of 1900-01-01
+        # is used with a time only value.
+        if data.dtype.kind == 'M':
+            default_date = numpy.datetime64('1900-01-01')
+            excel_time[data.astype('datetime64[D]') == default_date] -= 1
+
+        # Account for Excel erroneously treating 1900 as a leap year.
+        if not self.date_1904:
+            excel_time[excel_time > 59] += 1
+
+        return excel_time
+
+    def _get_schema_types(self, types, count):
+        # Convert the types parameter of write_row() and write_column() into
+        # a list of cell type names, one for each of the count tokens. A type
+        # of None means the token is written with write().
+        if not isinstance(types, (list, tuple)):
+            types = [types] * count
+
+        schema = []
+        for cell_type in types:
+            if cell_type is None:
+                schema.append(None)
+            elif cell_type in schema_types:
+                schema.append(schema_types[cell_type])
+            else:
+                warn("Unknown cell type '%s' in types list" % cell_type)
+                return None
+
+        # Tokens without a type are written with write().
+        schema.extend([None] * (count - len(schema)))
+
+        return schema
+
+    def _write_typed_row(self, row, col, data, cell_format, types):
+        # Write a row of data using the given cell type for each token,
+        # rather than checking the type as write() does. Number, string,
+        # boolean and date cells are stored directly in the row.
+        last_col = col + len(data) - 1
+
+        # Check the row bounds once rather than for each cell.
+        if (self._check_dimensions(row, col, True, True)
+                or self._check_dimensions(row, last_col, True, True)):
+            return -1
+
+        # In optimization mode rows that are already written are ignored.
+        if self.optimization and row < self.previous_row:
+            return -1
+
+        # Write previous row if in in-line string optimization mode.
+        if self.optimization and row > self.previous_row:
+            self._write_single_row(row)
+
+        cells = self.table[row]
+        first_stored = None
+        error = 0
+
+        for i, token in enumerate(data):
+            cell_type = types[i]
+            cell_col = col + i
+
+            if cell_type is None:
+                error = self.write(row, cell_col, token, cell_format)
+                if error:
+                    break
+                continue
+
+            if token is None or (cell_type == 'string' and token == ''):
+                # Write missing values and empty strings as blanks.
+                if cell_format is None:
+                    continue
+                cell = cell_blank_tuple(cell_format)
+
+            elif cell_type == 'number':
+                if token - token != 0:
+                    # Let write_number() handle NaN and INF.
+                    error = self.write_number(row, cell_col, token,
+                                              cell_format)
+                    if error:
+                        break
+                    continue
+                cell = cell_number_tuple(token, cell_format)
+
+            elif cell_type == 'string':
+                if len(token) > self.xls_strmax:
+                    # Let write_string() truncate long strings.
+                    error = self.write_string(row, cell_col, token,
+                                              cell_format)
+                    break
+                if not (self.inline_strings
+                        or (self.string_columns is not None
+                            and self._is_inline_string(cell_col, token))):
+                    token = self.str_table._get_shared_string_index(token)
+                cell = cell_string_tuple(token, cell_format)
+
+            elif cell_type == 'boolean':
+                if token:
+                    cell = cell_boolean_tuple(1, cell_format)
+                else:
+                    cell = cell_boolean_tuple(0, cell_format)
+
+            elif cell_type == 'datetime':
+                number = self._convert_date_time(token)
+                if cell_format is None:
+                    cell = cell_number_tuple(number, self.default_date_format)
+                else:
+                    cell = cell_number_tuple(number, cell_format)
+
+            else:
+                # Write formulas, urls and blanks with their write_*() method.
+                writer = getattr(self, 'write_' + cell_type)
+                error = writer(row, cell_col, token, cell_format)
+                if error:
+                    break
+                continue
+
+            cells[cell_col] = cell
+            last_stored = cell_col
+            if first_stored is None:
+                first_stored = cell_col
+
+        # Store the dimensions of the cells written directly.
+        if first_stored is not None:
+            self._check_dimensions(row, first_stored)
+            self._check_dimensions(row, last_stored)
+            self._update_spans(row, first_stored, last_stored)
+
+        return error
+
+    def _get_dataframe_writer(self, series, col, cell_format, numpy,
+                              pandas):
+        # Get the writer used by write_dataframe() for a column based on its
+        # dtype. The writers are:
+        #
+        #   ('bulk', cell_type, values, present, cell_format)
+        #   ('inline', codes, strings, cell_format)
+        #   ('write', tokens, cell_format)
+        #
+        # Bulk columns have their values converted to doubles, such as SST
+        # indices for strings, with a mask of the non-missing values.
+        dtype = series.dtype
+
+        if isinstance(dtype, pandas.CategoricalDtype):
+            categories = list(series.cat.categories)
+
+            if all(isinstance(c, str_types) for c in categories):
+                # Add each category to the SST once.
+                codes = series.cat.codes.to_numpy()
+                return self._get_dataframe_string_writer(codes, categories,
+                                                         col, cell_format,
+                                                         numpy)
+
+            # Write other categories using their values.
+            series = pandas.Series(numpy.asarray(series))
+            dtype = series.dtype
+
+        kind = dtype.kind
+
+        if kind in 'biuf':
+            present = (~series.isna()).to_numpy()
+            values = series.to_numpy(dtype=numpy.float64,
+                                     na_value=numpy.nan)
+
+            if kind == 'b':
+                return ('bulk', CELL_BOOLEAN, values, present, cell_format)
+
+            if numpy.isinf(values).any():
+                # Let write_number() handle INF values.
+                return ('write', values.tolist(), cell_format)
+
+            return ('bulk', CELL_NUMBER, values, present, cell_format)
+
+        if kind in 'mM':
+            if getattr(dtype, 'tz', None) is not None:
+                if not self.remove_timezone:
+                    raise TypeError(
+                        "Excel doesn't support timezones in datetimes. "
+                        "Set the tzinfo in the datetime/time object to None "
+                        "or use the 'remove_timezone' Workbook() option")
+                series = series.dt.tz_localize(None)
+
+            data = series.to_numpy()
+            present = ~numpy.isnat(data)
+            values = self._convert_datetime64(data, numpy)
+
+            # Add the default date format.
+            if cell_format is None:
+                cell_format = self.default_date_format
+
+            return ('bulk', CELL_NUMBER, values, present, cell_format)
+
+        # Object and string columns.
+        try:
+            codes, uniques = pandas.factorize(series)
+            strings = list(uniques)
+        except TypeError:
+            strings = None
+
+        if (strings is not None
+                and all(isinstance(s, str_types) for s in strings)):
+            return self._get_dataframe_string_writer(codes, strings, col,
+                                                     cell_format, numpy)
+
+        # Write columns of mixed types with write().
+        return ('write', series.tolist(), cell_format)
+
+    def _get_dataframe_string_writer(self, codes, strings, col,
+                                     cell_format, numpy):
+        # Get the write_dataframe() writer for a column of strings stored
+        # as factorized codes into a list of unique strings.
+        strings = [string[:self.xls_strmax] for string in strings]
+
+        # Empty strings are written as blanks, like write(), so they are
+        # treated as missing values.
+        codes = numpy.array(codes, dtype=numpy.int64)
+        for code, string in enumerate(strings):
+            if string == '':
+                codes[codes == code] = -1
+
+        if self.inline_strings:
+            return ('inline', codes, strings, cell_format)
+
+        present = codes >= 0
+        counts = numpy.bincount(codes[present], minlength=len(strings))
+
+        # The cardinality of the column is known so the storage can be
+        # chosen directly.
+        if self.string_columns is not None:
+            column = self._get_column_strings(col)
+
+            if column is not None:
+                column._add_strings(int(present.sum()),
+                                    int(numpy.count_nonzero(counts)))
+
+                if column.inline:
+                    return ('inline', codes, strings, cell_format)
+        indices = numpy.zeros(len(strings) + 1)
+
+        # Add each unique string to the SST once with its total count.
+        for code, string in enumerate(strings):
+            if counts[code]:
+                indices[code] = self.str_table._get_shared_string_index(
+                    string, int(counts[code]))
+
+        values = indices[codes]
+
+        return ('bulk', CELL_STRING, values, present, cell_format)
+
+    def _is_dataframe_na(self, token, pandas):
+        # Check for a missing value such as None, NaN or NaT.
+        try:
+            return bool(pandas.isna(token))
+        except (TypeError, ValueError):
+            return False
+
+    def _get_column_strings(self, col):
+        # Get the string storage policy of a column, creating one in
+        # 'adaptive_strings' mode.
+        column = self.string_columns.get(col)
+
+        if column is None and self.adaptive_strings:
+            column = ColumnStrings()
+            self.string_columns[col] = column
+
+        return column
+
+    def _is_inline_string(self, col, string):
+        # Return True if a string in a column should be written in-line
+        # rather than stored in the SST.
+        column = self._get_column_strings(col)
+
+        if column is None:
+            return False
+
+        return column._is_inline(string, self.str_table)
+
+    def _get_compact_table(self):
+        # Return the CompactTable that holds the formats for CompactRows.
+        # This is the cell table in 'compact_cells' mode or else a separate
+        # table used by rows converted by _get_compact_row().
+        if self.compact_cells:
+            return self.table
+
+        if self.compact_rows is None:
+            self.compact_rows = CompactTable()
+
+        return self.compact_rows
+
+    def _get_compact_row(self, row):
+        # Return the cells of a row as a CompactRow so that data can be
+        # added to it in bulk. Default dict rows are converted.
+        cells = self.table[row]
+
+        if isinstance(cells, CompactRow):
+            return cells
+
+        compact_row = CompactRow(self._get_compact_table())
+
+        for col in sorted(cells):
+            compact_row[col] = cells[col]
+
+        self.table[row] = compact_row
+
+        return compact_row
+
     def _convert_name_area(self, row_num_1, col_num_1, row_num_2, col_num_2):
         # Convert zero indexed rows and columns to the format required by
         # worksheet named ranges, eg, "Sheet1!$A$1:$C$13".
@@ -4422,52 +5976,144 @@ class Worksheet(xmlwriter.XMLwriter):
         # Excel can chart series with data missing.
 
         if self.optimization:
-            return ()
+            # Return the data stored as the rows were written, if any. No
+            # data is returned for ranges that are marked as incomplete.
+            range_data = self.chart_ranges.get(
+                (row_start, col_start, row_end, col_end))
+
+            if not range_data:
+                return ()
+
+            next_row, data = range_data
+            return data + [None] * (row_end + 1 - next_row)
 
         data = []
 
         # Iterate through the table data.
         for row_num in range(row_start, row_end + 1):
+            cells = self._get_row_cells(row_num)
+
             # Store None if row doesn't exist.
-            if row_num not in self.table:
+            if cells is None:
                 data.append(None)
                 continue
 
-            for col_num in range(col_start, col_end + 1):
+            self._get_row_range_data(cells, col_start, col_end, data)
 
-                if col_num in self.table[row_num]:
-                    cell = self.table[row_num][col_num]
+        return data
 
-                    if type(cell).__name__ == 'Number':
-                        # Return a number with Excel's precision.
-                        data.append("%.16g" % cell.number)
+    def _get_row_range_data(self, cells, col_start, col_end, data):
+        # Add the chart cached data for a range of the cells in a row.
+        if isinstance(cells, CompactRow):
+            self._get_compact_row_data(cells, col_start, col_end, data)
+            return
 
-                    elif type(cell).__name__ == 'String':
-                        # Return a string from it's shared string index.
-                        index = cell.string
-                        string = self.str_table._get_shared_string(index)
+        for col_num in range(col_start, col_end + 1):
 
-                        data.append(string)
+            if col_num in cells:
+                cell = cells[col_num]
+                cell_type = cell.cell_type
 
-                    elif (type(cell).__name__ == 'Formula'
-                            or type(cell).__name__ == 'ArrayFormula'):
-                        # Return the formula value.
-                        value = cell.value
+                if cell_type == CELL_NUMBER:
+                    # Return a number with Excel's precision.
+                    data.append("%.16g" % cell.number)
 
-                        if value is None:
-                            value = 0
+                elif cell_type == CELL_STRING:
+                    if isinstance(cell.string, str_types):
+                        # Return an in-line string.
+                        data.append(cell.string)
+                        continue
 
-                        data.append(value)
+                    # Return a string from it's shared string index.
+                    index = cell.string
+                    string = self.str_table._get_shared_string(index)
 
-                    elif type(cell).__name__ == 'Blank':
-                        # Return a empty cell.
-                        data.append('')
-                else:
+                    data.append(string)
 
-                    # Store None if column doesn't exist.
-                    data.append(None)
+                elif (cell_type == CELL_FORMULA
+                        or cell_type == CELL_ARRAY_FORMULA):
+                    # Return the formula value.
+                    value = cell.value
 
-        return data
+                    if value is None:
+                        value = 0
+
+                    data.append(value)
+
+                elif cell_type == CELL_BLANK:
+                    # Return a empty cell.
+                    data.append('')
+            else:
+
+                # Store None if column doesn't exist.
+                data.append(None)
+
+    def _store_chart_data(self, row_num, cells):
+        # Store the data of a row that is in a chart range, as the rows are
+        # written in optimization mode, for use as the chart cached data.
+        for cell_range, range_data in self.chart_ranges.items():
+            row_start, col_start, row_end, col_end = cell_range
+
+            if row_num < row_start or row_num > row_end:
+                continue
+
+            # Skip ranges that were added after some of their rows were
+            # written.
+            if range_data is False:
+                continue
+
+            if range_data is None:
+                range_data = [row_start, []]
+                self.chart_ranges[cell_range] = range_data
+
+            next_row, data = range_data
+
+            # Store None for the rows that don't exist.
+            data.extend([None] * (row_num - next_row))
+
+            self._get_row_range_data(cells, col_start, col_end, data)
+            range_data[0] = row_num + 1
+
+    def _get_compact_row_data(self, cells, col_start, col_end, data):
+        # Version of _get_range_data() that reads the cell data of a
+        # CompactRow directly from its arrays without creating namedtuples.
+        for col_num in range(col_start, col_end + 1):
+            index = cells._find(col_num)
+
+            if index < 0:
+                # Store None if column doesn't exist.
+                data.append(None)
+                continue
+
+            cell_type = cells._get_type(index)
+            value = cells.values[index]
+
+            if cell_type == CELL_NUMBER:
+                # Return a number with Excel's precision.
+                data.append("%.16g" % value)
+
+            elif cell_type == CELL_STRING:
+                # Return a string from it's shared string index.
+                string = self.str_table._get_shared_string(int(value))
+                data.append(string)
+
+            elif cell_type == CELL_INLINE_STRING:
+                # Return an in-line string.
+                data.append(cells.objects[int(value)])
+
+            elif (cell_type == CELL_FORMULA
+                    or cell_type == CELL_ARRAY_FORMULA):
+                # Return the formula value.
+                value = cells.objects[int(value)][1]
+
+                if value is None:
+                    value = 0
+
+                data.append(value)
+
+            elif cell_type == CELL_BLANK:
+                # Return a empty cell.
+                data.append('')
 
     def _csv_join(self, *items):
         # Create a csv string for use with data validation formulas and lists.
@@ -4607,7 +6253,7 @@ class Worksheet(xmlwriter.XMLwriter):
         # Reopen the row data filehandle in optimization mode.
         if self.row_data_fh_closed:
             filename = self.row_data_filename
-            self.row_data_fh = codecs.open(filename, 'a+', 'utf-8')
+            self.row_data_fh = Utf8Writer(open(filename, 'a+b'))
             self.row_data_fh_closed = False
             self.fh = self.row_data_fh
 
@@ -4843,20 +6489,46 @@ class Worksheet(xmlwriter.XMLwriter):
         else:
             self._xml_start_tag('sheetData')
 
-            # Rewind the filehandle that was used for temp row data.
+            # Rewind the filehandle that was used for temp row data and
+            # copy the encoded data into the XML file.
             buff_size = 65536
-            self.row_data_fh.seek(0)
-            data = self.row_data_fh.read(buff_size)
+            self.row_data_fh.flush()
+            row_data_fh = self.row_data_fh.fh
+            row_data_fh.seek(0)
 
-            while data:
-                self.fh.write(data)
-                data = self.row_data_fh.read(buff_size)
+            if isinstance(self.fh, Utf8Writer):
+                data = row_data_fh.read(buff_size)
+
+                while data:
+                    self.fh.write_encoded(data)
+                    data = row_data_fh.read(buff_size)
+            else:
+                # Text filehandles, used in testing.
+                self.fh.write(row_data_fh.read().decode('utf-8'))
 
             self.row_data_fh.close()
             os.unlink(self.row_data_filename)
 
             self._xml_end_tag('sheetData')
 
+    def _write_spooled_sheet_data(self):
+        # Write the <sheetData> element for a worksheet that has been
+        # finished. In this case we copy the sheet data that was stored in
+        # the compressed spool into the XML file.
+        self._xml_start_tag('sheetData')
+
+        if isinstance(self.fh, Utf8Writer):
+            for data in self.sheet_data_spool.read_chunks():
+                self.fh.write_encoded(data)
+        else:
+            # Text filehandles, used in testing.
+            data = b''.join(self.sheet_data_spool.read_chunks())
+            self.fh.write(data.decode('utf-8'))
+
+        self.sheet_data_spool = None
+
+        self._xml_end_tag('sheetData')
+
     def _write_page_margins(self):
         # Write the <pageMargins> element.
         attributes = [
@@ -4989,14 +6661,129 @@ class Worksheet(xmlwriter.XMLwriter):
         # Write the <headerFooter> element.
         self._xml_data_element('oddFooter', self.footer)
 
+    def _get_rows(self):
+        # Get the (row number, cells) of the rows with cell data, formatting
+        # and/or comments, in row order, so that the rows are iterated in
+        # proportion to the data rather than the worksheet dimensions. The
+        # cells are None for rows without cell data. Any spilled rows are
+        # merged in a single pass over the segments, in the order they were
+        # stored, with the cells in memory taking precedence.
+        table = self.table
+        row_nums = set(table)
+        row_nums.update(self.set_rows)
+        row_nums.update(self.comments)
+        row_nums = sorted(row_nums)
+
+        if not self.spill_segments:
+            for row_num in row_nums:
+                if self.dim_rowmin <= row_num <= self.dim_rowmax:
+                    yield row_num, table.get(row_num)
+            return
+
+        segments = self.spill_segments
+        formats = self.spill_formats
+
+        # The rows in memory are merged as a final segment without offsets.
+        entries = [segment._get_entries(index)
+                   for index, segment in enumerate(segments)]
+        entries.append((row_num, len(segments), None)
+                       for row_num in row_nums)
+
+        for row_num, row_entries in groupby(heapq.merge(*entries),
+                                            key=itemgetter(0)):
+            if not self.dim_rowmin <= row_num <= self.dim_rowmax:
+                continue
+
+            cells = None
+
+            for _, index, offset in row_entries:
+                if offset is None:
+                    continue
+
+                spilled_cells = segments[index]._read_cells(offset, formats)
+
+                if cells is None:
+                    cells = spilled_cells
+                else:
+                    cells.update(spilled_cells)
+
+            if cells is None:
+                yield row_num, table.get(row_num)
+                continue
+
+            row_cells = table.get(row_num)
+            if row_cells:
+                cells.update(row_cells.items())
+
+            yield row_num, cells
+
+    def _spool_sheet_data(self, sheet_data):
+        # Write the sheet data XML of a finished worksheet into a compressed
+        # spool from a copy of the worksheet with the cell data. The column
+        # format indices are assigned first, in the same order as when the
+        # worksheet is assembled.
+        sheet_data._prepare_col_xf_indices()
+
+        if sheet_data.dim_rowmin is None:
+            return
+
+        spool = CompressedSpool()
+        sheet_data.fh = Utf8Writer(spool)
+        sheet_data._write_rows()
+        sheet_data.fh.close()
+
+        self.sheet_data_spool = spool
+
+    def _wait_for_finish(self):
+        # Wait for the sheet data of a worksheet that is being finished in a
+        # background thread. Any exception in the thread is raised here.
+        if self.finish_job:
+            self.finish_job.get()
+            self.finish_job = None
+
+    def _prepare_col_xf_indices(self):
+        # Assign the XF indices of the column formats, which are written
+        # before the cell data.
+        for col in sorted(self.colinfo.keys()):
+            cell_format = self.colinfo[col][3]
+            if cell_format:
+                cell_format._get_xf_index()
+
+    def _prepare_xf_indices(self):
+        # Assign the XF indices of the column, row and cell formats in the
+        # same order that _assemble_xml_file() would. The indices are
+        # otherwise assigned as each worksheet is written so this allows the
+        # worksheets to be assembled in parallel with the same output.
+        self._prepare_col_xf_indices()
+
+        if self.dim_rowmin is None:
+            return
+
+        for row_num, cells in self._get_rows():
+            if row_num in self.set_rows and self.set_rows[row_num][1]:
+                self.set_rows[row_num][1]._get_xf_index()
+
+            if not cells:
+                continue
+
+            if isinstance(cells, CompactRow):
+                formats = cells.table.formats
+                cell_formats = [formats[meta & 0xFFFFFFFF]
+                                for meta in cells.meta]
+            else:
+                cell_formats = [cells[col].format for col in sorted(cells)]
+
+            for cell_format in cell_formats:
+                if cell_format:
+                    cell_format._get_xf_index()
+
     def _write_rows(self):
         # Write out the worksheet data as a series of rows and cells.
         self._calculate_spans()
 
-        for row_num in range(self.dim_rowmin, self.dim_rowmax + 1):
-
+        for row_num, cells in self._get_rows():
             if (row_num in self.set_rows or row_num in self.comments
-                    or self.table[row_num]):
+                    or cells):
                 # Only process rows with formatting, cell data and/or comments.
 
                 span_index = int(row_num / 16)
@@ -5006,19 +6793,9 @@ class Worksheet(xmlwriter.XMLwriter):
                 else:
                     span = None
 
-                if self.table[row_num]:
+                if cells:
                     # Write the cells if the row contains data.
-                    if row_num not in self.set_rows:
-                        self._write_row(row_num, span)
-                    else:
-                        self._write_row(row_num, span, self.set_rows[row_num])
-
-                    for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                        if col_num in self.table[row_num]:
-                            col_ref = self.table[row_num][col_num]
-                            self._write_cell(row_num, col_num, col_ref)
-
-                    self._xml_end_tag('row')
+                    self._write_row_data(row_num, span, cells)
 
                 elif row_num in self.comments:
                     # Row with comments in cells.
@@ -5031,88 +6808,60 @@ class Worksheet(xmlwriter.XMLwriter):
 
     def _write_single_row(self, current_row_num=0):
         # Write out the worksheet data as a single row with cells.
-        # This method is used when memory optimization is on. A single
-        # row is written and the data table is reset. That way only
-        # one row of data is kept in memory at any one time. We don't
-        # write span data in the optimized case since it is optional.
-
-        # Set the new previous row as the current row.
-        row_num = self.previous_row
-        self.previous_row = current_row_num
-
-        if (row_num in self.set_rows or row_num in self.comments
-                or self.table[row_num]):
-            # Only process rows with formatting, cell data and/or comments.
-
-            # No span data in optimized mode.
-            span = None
-
-            if self.table[row_num]:
-                # Write the cells if the row contains data.
-                if row_num not in self.set_rows:
-                    self._write_row(row_num, span)
-                else:
-                    self._write_row(row_num, span, self.set_rows[row_num])
+        # This method is used when memory optimization is on. The rows that
+        # have moved out of the window of row_window rows before the current
+        # row are written and removed from the data table. That way only
+        # row_window rows of data, by default one, are kept in memory at any
+        # one time. A current row of xls_rowmax writes all of the remaining
+        # rows. We don't write span data in the optimized case since it is
+        # optional.
+        first_row = self.previous_row
+
+        if current_row_num >= self.xls_rowmax:
+            last_row = current_row_num
+        else:
+            last_row = current_row_num - self.row_window + 1
 
-                for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                    if col_num in self.table[row_num]:
-                        col_ref = self.table[row_num][col_num]
-                        self._write_cell(row_num, col_num, col_ref)
+        if last_row <= first_row:
+            return
 
-                self._xml_end_tag('row')
-            else:
-                # Row attributes or comments only.
-                self._write_empty_row(row_num, span, self.set_rows[row_num])
+        # Set the new previous row as the first row kept in the window.
+        self.previous_row = last_row
 
-        # Reset table.
-        self.table.clear()
+        # Rows with data can only be in the previous window.
+        last_row = min(last_row, first_row + self.row_window)
+
+        for row_num in range(first_row, last_row):
+            cells = self.table.pop(row_num, None)
+
+            if row_num in self.set_rows or row_num in self.comments or cells:
+                # Only process rows with formatting, cell data and/or comments.
+
+                # No span data in optimized mode.
+                span = None
+
+                if cells:
+                    # Store any chart data before writing the cells.
+                    if self.chart_ranges:
+                        self._store_chart_data(row_num, cells)
+
+                    # Write the cells if the row contains data.
+                    self._write_row_data(row_num, span, cells)
+                else:
+                    # Row attributes or comments only.
+                    self._write_empty_row(row_num, span,
+                                          self.set_rows[row_num])
 
     def _calculate_spans(self):
         # Calculate the "spans" attribute of the <row> tag. This is an
         # XLSX optimization and isn't strictly required. However, it
         # makes comparing files easier. The span is the same for each
-        # block of 16 rows.
+        # block of 16 rows. The min and max columns of each block are
+        # stored by _update_spans() as the cells are written.
         spans = {}
-        span_min = None
-        span_max = None
-
-        for row_num in range(self.dim_rowmin, self.dim_rowmax + 1):
-
-            if row_num in self.table:
-                # Calculate spans for cell data.
-                for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                    if col_num in self.table[row_num]:
-                        if span_min is None:
-                            span_min = col_num
-                            span_max = col_num
-                        else:
-                            if col_num < span_min:
-                                span_min = col_num
-                            if col_num > span_max:
-                                span_max = col_num
-
-            if row_num in self.comments:
-                # Calculate spans for comments.
-                for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                    if (row_num in self.comments
-                            and col_num in self.comments[row_num]):
-                        if span_min is None:
-                            span_min = col_num
-                            span_max = col_num
-                        else:
-                            if col_num < span_min:
-                                span_min = col_num
-                            if col_num > span_max:
-                                span_max = col_num
 
-            if ((row_num + 1) % 16 == 0) or row_num == self.dim_rowmax:
-                span_index = int(row_num / 16)
-
-                if span_min is not None:
-                    span_min += 1
-                    span_max += 1
-                    spans[span_index] = "%s:%s" % (span_min, span_max)
-                    span_min = None
+        for span_index, (span_min, span_max) in self.cell_spans.items():
+            spans[span_index] = "%s:%s" % (span_min + 1, span_max + 1)
 
         self.row_spans = spans
 
@@ -5174,17 +6923,108 @@ class Worksheet(xmlwriter.XMLwriter):
     def _write_cell(self, row, col, cell):
         # Write the <cell> element.
         # Note. This is the innermost loop so efficiency is important.
+        attributes = self._get_cell_attributes(row, col, cell.format)
+
+        # Write the cell with the writer for its cell type.
+        self._cell_writers[cell.cell_type](self, cell, attributes)
+
+    def _write_number_cell(self, cell, attributes):
+        # Write a number.
+        self._xml_number_element(cell.number, attributes)
+
+    def _write_string_cell(self, cell, attributes):
+        # Write a string.
+        string = cell.string
+
+        if not isinstance(string, str_types):
+            # Write a shared string.
+            self._xml_string_element(string, attributes)
+        elif isinstance(string, RichString):
+            # Write a rich in-line string without further tags.
+            string = _escape_control_chars(string)
+            self._xml_rich_inline_string(string, attributes)
+
+        elif not escape_needed.search(string):
+            # Write a plain in-line string without further checks.
+            self._xml_inline_string(string, 0, attributes)
+
+        else:
+            # Write an in-line string with escapes. See SharedStrings.
+            string = _escape_control_chars(string)
+
+            # Add attribute to preserve leading or trailing whitespace.
+            preserve = 0
+            if edge_whitespace.search(string):
+                preserve = 1
+
+            self._xml_inline_string(string, preserve, attributes)
+
+    def _write_formula_cell(self, cell, attributes):
+        # Write a formula. First check the formula value type.
+        value = cell.value
+        if type(cell.value) == bool:
+            attributes.append(('t', 'b'))
+            if cell.value:
+                value = 1
+            else:
+                value = 0
+
+        elif isinstance(cell.value, str_types):
+            if cell.value in error_codes:
+                attributes.append(('t', 'e'))
+            else:
+                attributes.append(('t', 'str'))
+
+        self._xml_formula_element(cell.formula, value, attributes)
 
-        error_codes = ['#DIV/0!', '#N/A', '#NAME?', '#NULL!',
-                       '#NUM!', '#REF!', '#VALUE!']
+    def _write_array_formula_cell(self, cell, attributes):
+        # Write a array formula.
 
+        # First check if the formula value is a string.
+        try:
+            float(cell.value)
+        except ValueError:
+            attributes.append(('t', 'str'))
+
+        # Write an array formula.
+        self._xml_start_tag('c', attributes)
+        self._write_cell_array_formula(cell.formula, cell.range)
+        self._write_cell_value(cell.value)
+        self._xml_end_tag('c')
+
+    def _write_blank_cell(self, cell, attributes):
+        # Write a empty cell.
+        self._xml_empty_tag('c', attributes)
+
+    def _write_boolean_cell(self, cell, attributes):
+        # Write a boolean cell.
+        attributes.append(('t', 'b'))
+        self._xml_start_tag('c', attributes)
+        self._write_cell_value(cell.boolean)
+        self._xml_end_tag('c')
+
+    # The cell writers indexed by cell type tag. Shared and in-line strings
+    # use the same writer.
+    _cell_writers = (
+        _write_number_cell,
+        _write_string_cell,
+        _write_string_cell,
+        _write_blank_cell,
+        _write_boolean_cell,
+        _write_formula_cell,
+        _write_array_formula_cell,
+    )
+
+    def _get_cell_attributes(self, row, col, cell_format):
+        # Get the cell reference and the cell, row or column format index
+        # attributes for a <c> element.
         cell_range = xl_rowcol_to_cell_fast(row, col)
 
         attributes = [('r', cell_range)]
 
-        if cell.format:
+        if cell_format:
             # Add the cell format index.
-            xf_index = cell.format._get_xf_index()
+            xf_index = cell_format._get_xf_index()
             attributes.append(('s', xf_index))
         elif row in self.set_rows and self.set_rows[row][1]:
             # Add the row format.
@@ -5195,81 +7035,138 @@ class Worksheet(xmlwriter.XMLwriter):
             col_xf = self.col_formats[col]
             attributes.append(('s', col_xf._get_xf_index()))
 
-        # Write the various cell types.
-        if type(cell).__name__ == 'Number':
-            # Write a number.
-            self._xml_number_element(cell.number, attributes)
+        return attributes
 
-        elif type(cell).__name__ == 'String':
-            # Write a string.
-            string = cell.string
+    def _write_row_data(self, row, span, cells):
+        # Write a <row> element and its cells. The XML is collected in a
+        # RowBuffer and written to the filehandle in one write per row.
+        fh = self.fh
+        self.fh = RowBuffer()
 
-            if not self.optimization:
-                # Write a shared string.
-                self._xml_string_element(string, attributes)
+        try:
+            if row not in self.set_rows:
+                self._write_row(row, span)
             else:
-                # Write an optimized in-line string.
-
-                # Escape control characters. See SharedString.pm for details.
-                string = re.sub('(_x[0-9a-fA-F]{4}_)', r'_x005F\1', string)
-                string = re.sub(r'([\x00-\x08\x0B-\x1F])',
-                                lambda match: "_x%04X_" %
-                                ord(match.group(1)), string)
-
-                # Write any rich strings without further tags.
-                if re.search('^<r>', string) and re.search('</r>$', string):
-                    self._xml_rich_inline_string(string, attributes)
-                else:
-                    # Add attribute to preserve leading or trailing whitespace.
-                    preserve = 0
-                    if re.search('^\s', string) or re.search('\s$', string):
-                        preserve = 1
-
-                    self._xml_inline_string(string, preserve, attributes)
-
-        elif type(cell).__name__ == 'Formula':
-            # Write a formula. First check the formula value type.
-            value = cell.value
-            if type(cell.value) == bool:
-                attributes.append(('t', 'b'))
-                if cell.value:
-                    value = 1
-                else:
-                    value = 0
+                self._write_row(row, span, self.set_rows[row])
 
-            elif isinstance(cell.value, str_types):
-                if cell.value in error_codes:
-                    attributes.append(('t', 'e'))
-                else:
-                    attributes.append(('t', 'str'))
-
-            self._xml_formula_element(cell.formula, value, attributes)
-
-        elif type(cell).__name__ == 'ArrayFormula':
-            # Write a array formula.
+            if isinstance(cells, CompactRow):
+                self._write_compact_cells(row, cells)
+            else:
+                self._write_dict_cells(row, cells)
+
+            self.fh.write('</row>')
+            data = self.fh.getvalue()
+        finally:
+            self.fh = fh
+
+        fh.write(data)
+
+    def _get_row_style(self, row):
+        # Get the style attribute of the row format, if any, which applies
+        # to unformatted cells in the row.
+        if row in self.set_rows and self.set_rows[row][1]:
+            return ' s="%s"' % self.set_rows[row][1]._get_xf_index()
+
+        return ''
+
+    def _write_dict_cells(self, row, cells):
+        # Write the cells of a row dict in column order. The columns are
+        # usually added in order so the sort is linear. The common cell
+        # types are written with the cell templates, the other types with
+        # _write_cell(). This is the innermost loop so efficiency is
+        # important.
+        write = self.fh.write
+        row_ref = row + 1
+        row_style = self._get_row_style(row)
+        col_formats = self.col_formats
+        col_names = COL_NAMES
+        inline_strings = self.inline_strings
+
+        for col in sorted(cells):
+            cell = cells[col]
+            cell_type = cell.cell_type
+
+            # Strings are in-line if they aren't an int SST index.
+            if (cell_type > CELL_BOOLEAN
+                    or (cell_type == CELL_STRING
+                        and (inline_strings
+                             or type(cell.string) is not int))):
+                self._write_cell(row, col, cell)
+                continue
 
-            # First check if the formula value is a string.
-            try:
-                float(cell.value)
-            except ValueError:
-                attributes.append(('t', 'str'))
+            col_name = col_names.get(col)
+            if col_name is None:
+                col_name = xl_col_to_name(col)
+                col_names[col] = col_name
 
-            # Write an array formula.
-            self._xml_start_tag('c', attributes)
-            self._write_cell_array_formula(cell.formula, cell.range)
-            self._write_cell_value(cell.value)
-            self._xml_end_tag('c')
+            cell_format = cell.format
+            if cell_format:
+                style = ' s="%s"' % cell_format._get_xf_index()
+            elif row_style:
+                style = row_style
+            elif col in col_formats:
+                style = ' s="%s"' % col_formats[col]._get_xf_index()
+            else:
+                style = ''
+
+            if cell_type == CELL_NUMBER:
+                write(cell_number_xml % (col_name, row_ref, style,
+                                         cell.number))
+            elif cell_type == CELL_STRING:
+                write(cell_string_xml % (col_name, row_ref, style,
+                                         cell.string))
+            elif cell_type == CELL_BOOLEAN:
+                write(cell_boolean_xml % (col_name, row_ref, style,
+                                          cell.boolean))
+            else:
+                write(cell_blank_xml % (col_name, row_ref, style))
+
+    def _write_compact_cells(self, row, cells):
+        # Write the cells of a CompactRow in column order. The common cell
+        # types are written with the cell templates directly from the row
+        # arrays without creating cell namedtuples.
+        write = self.fh.write
+        row_ref = row + 1
+        row_style = self._get_row_style(row)
+        col_formats = self.col_formats
+        col_names = COL_NAMES
+        formats = cells.table.formats
+        values = cells.values
+
+        for index, meta in enumerate(cells.meta):
+            col = meta >> 40
+            cell_type = (meta >> 32) & 0xFF
+
+            if cell_type == CELL_INLINE_STRING or cell_type > CELL_BOOLEAN:
+                self._write_cell(row, col, cells._get_cell(index))
+                continue
 
-        elif type(cell).__name__ == 'Blank':
-            # Write a empty cell.
-            self._xml_empty_tag('c', attributes)
+            col_name = col_names.get(col)
+            if col_name is None:
+                col_name = xl_col_to_name(col)
+                col_names[col] = col_name
 
-        elif type(cell).__name__ == 'Boolean':
-            # Write a boolean cell.
-            attributes.append(('t', 'b'))
-            self._xml_start_tag('c', attributes)
-            self._write_cell_value(cell.boolean)
-            self._xml_end_tag('c')
+            cell_format = formats[meta & 0xFFFFFFFF]
+            if cell_format:
+                style = ' s="%s"' % cell_format._get_xf_index()
+            elif row_style:
+                style = row_style
+            elif col in col_formats:
+                style = ' s="%s"' % col_formats[col]._get_xf_index()
+            else:
+                style = ''
+
+            if cell_type == CELL_NUMBER:
+                write(cell_number_xml % (col_name, row_ref, style,
+                                         values[index]))
+            elif cell_type == CELL_STRING:
+                write(cell_string_xml % (col_name, row_ref, style,
+                                         values[index]))
+            elif cell_type == CELL_BOOLEAN:
+                write(cell_boolean_xml % (col_name, row_ref, style,
+                                          int(values[index])))
+            else:
+                write(cell_blank_xml % (col_name, row_ref, style))
 
     def _write_cell_value(self, value):
         # Write the cell value <v> element.
@@ -5466,7 +7363,7 @@ class Worksheet(xmlwriter.XMLwriter):
                         and self.table[row_num]
                         and self.table[row_num][col_num]):
                     cell = self.table[row_num][col_num]
-                    if type(cell).__name__ != 'String':
+                    if cell.cell_type != CELL_STRING:
                         display = link["url"]
 
                 if link_type == 1:
@@ -9,10 +9,54 @@
 
 # Standard packages.
 import re
-import codecs
 
 # Standard packages in Python 2/3 compatibility mode.
 from .compatibility import StringIO
+from .compatibility import BytesIO
+from .compatibility import str_types
+
+# The characters that are escaped in attributes, and a subset of them in
+# data. A single search for them lets most strings be returned unchanged.
+xml_escapes = re.compile('["&<>\n]')
+
+
+class Utf8Writer(object):
+    """
+    A text filehandle for a binary file or BytesIO. The text is collected
+    and encoded to UTF-8 in large batches rather than on every write.
+
+    """
+
+    def __init__(self, fh, close_fh=True, buffer_size=65536):
+        self.fh = fh
+        self.close_fh = close_fh
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def write_encoded(self, data):
+        # Write data that is already UTF-8 encoded.
+        self.flush()
+        self.fh.write(data)
+
+    def flush(self):
+        if self.parts:
+            self.fh.write(''.join(self.parts).encode('utf-8'))
+            self.parts = []
+            self.size = 0
+
+    def close(self):
+        self.flush()
+
+        if self.close_fh:
+            self.fh.close()
 
 
 class XMLwriter(object):
@@ -23,7 +67,6 @@ class XMLwriter(object):
 
     def __init__(self):
         self.fh = None
-        self.escapes = re.compile('["&<>\n]')
         self.internal_fh = False
 
     def _set_filehandle(self, filehandle):
@@ -32,13 +75,22 @@ class XMLwriter(object):
         self.internal_fh = False
 
     def _set_xml_writer(self, filename):
-        # Set the XML writer filehandle for the object.
+        # Set the XML writer filehandle for the object. The XML is encoded
+        # in batches into a binary file, into a BytesIO in in_memory mode
+        # which is left open for the packager to read, or into an open Zip
+        # file member which is closed to complete it.
         if isinstance(filename, StringIO):
             self.internal_fh = False
             self.fh = filename
+        elif isinstance(filename, BytesIO):
+            self.internal_fh = True
+            self.fh = Utf8Writer(filename, close_fh=False)
+        elif hasattr(filename, 'write'):
+            self.internal_fh = True
+            self.fh = Utf8Writer(filename)
         else:
             self.internal_fh = True
-            self.fh = codecs.open(filename, 'w', 'utf-8')
+            self.fh = Utf8Writer(open(filename, 'wb'))
 
     def _xml_close(self):
         # Close the XML filehandle if we created it.
@@ -178,18 +230,26 @@ class XMLwriter(object):
                       (attr, string))
 
     def _escape_attributes(self, attribute):
-        # Escape XML characters in attributes.
-        try:
-            if not self.escapes.search(attribute):
-                return attribute
-        except TypeError:
+        # Escape XML characters in attributes. Numeric attributes, and most
+        # strings, don't need escaping. Otherwise only the characters that
+        # are present are replaced. This is faster than str.translate() or
+        # re.sub() with a callback, which build the result char by char.
+        if not isinstance(attribute, str_types):
+            return attribute
+
+        if not xml_escapes.search(attribute):
             return attribute
 
-        attribute = attribute.replace('&', '&amp;')
-        attribute = attribute.replace('"', '&quot;')
-        attribute = attribute.replace('<', '&lt;')
-        attribute = attribute.replace('>', '&gt;')
-        attribute = attribute.replace('\n', '&#xA;')
+        if '&' in attribute:
+            attribute = attribute.replace('&', '&amp;')
+        if '"' in attribute:
+            attribute = attribute.replace('"', '&quot;')
+        if '<' in attribute:
+            attribute = attribute.replace('<', '&lt;')
+        if '>' in attribute:
+            attribute = attribute.replace('>', '&gt;')
+        if '\n' in attribute:
+            attribute = attribute.replace('\n', '&#xA;')
 
         return attribute
 
@@ -197,14 +257,17 @@ class XMLwriter(object):
         # Escape XML characters in data sections of tags.  Note, this
         # is different from _escape_attributes() in that double quotes
         # are not escaped by Excel.
-        try:
-            if not self.escapes.search(data):
-                return data
-        except TypeError:
+        if not isinstance(data, str_types):
+            return data
+
+        if not xml_escapes.search(data):
             return data
 
-        data = data.replace('&', '&amp;')
-        data = data.replace('<', '&lt;')
-        data = data.replace('>', '&gt;')
+        if '&' in data:
+            data = data.replace('&', '&amp;')
+        if '<' in data:
+            data = data.replace('<', '&lt;')
+        if '>' in data:
+            data = data.replace('>', '&gt;')
 
         return data